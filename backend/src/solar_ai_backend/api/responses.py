@@ -0,0 +1,37 @@
+"""Response classes for large JSON payloads."""
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import pydantic_core
+from fastapi.responses import Response
+
+
+class ModelJSONResponse(Response):
+    """JSON response encoded straight from Pydantic models by pydantic-core's serializer.
+
+    FastAPI returns Response instances as-is, so a route returning one skips
+    the ``response_model`` re-validation and the ``jsonable_encoder`` pass.
+    The route still declares ``response_model`` for the OpenAPI schema; the
+    content must already be a validated model (or plain JSON data).
+
+    ``include`` (a Pydantic include tree) and ``exclude_none`` project the
+    output while encoding, so dropped fields cost nothing to serialize.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: Any,
+        *,
+        include: Optional[Dict[str, Any]] = None,
+        exclude_none: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        self.include = include
+        self.exclude_none = exclude_none
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content, include=self.include, exclude_none=self.exclude_none)
@@ -1,8 +1,16 @@
-from typing import List, Dict, Any
+import hmac
+import json
+import math
+import os
+import time
+from dataclasses import replace
+from functools import partial
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple, Union
 
 import logging
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 
 from ..config import get_settings
 from ..schemas.models import (
@@ -19,11 +27,45 @@ from ..schemas.models import (
     ZillowMeta,
     ImageryMeta,
     VisionMeta,
+    VisionBatchRequest,
+    VisionBatchResponse,
+    ZillowQuotaResponse,
+    LeadsNearbyResponse,
+    NearbyLead,
+    ExportRef,
 )
 from ..services.google_maps_client import GoogleMapsClient
+from ..services.tile_cache import snap_to_grid, spatial_order
+from ..services.image_store import ImageKey, ImageStore, get_image_store, is_valid_digest
+from ..services.imagery_prefetch import ImageryPrefetcher, buffered_size
+from ..services.imagery_router import ImageryRouter, ImagerySource, google_source, mapbox_source
+from ..services.export_store import ExportArtifact, get_export_store
+from ..services.lead_index import get_lead_index
+from ..services.mapbox_client import MapboxClient
 from ..services.vision_agent import GeminiVisionService
-from ..services.enrichment import ZillowClient, LeadScorer
-from ..utils.excel_export import leads_to_excel_b64, leads_to_excel_bytes, leads_to_csv_bytes, leads_to_csv_b64
+from ..services.vision_batch import (
+    BATCH_PREPARING,
+    BatchBackend,
+    BatchItem,
+    GeminiBatchBackend,
+    LocalBatchBackend,
+    VisionBatchRunner,
+    create_batch,
+    fail_batch,
+)
+from ..services.enrichment import PropertyRecord, ZillowClient, LeadScorer, get_zillow_cache, get_zillow_rate_limiter
+from ..utils.excel_export import EXCEL_MEDIA_TYPE, leads_to_excel_b64, leads_to_csv_b64, iter_leads_csv, spool_export, write_leads_excel
+from ..utils.columnar_export import (
+    ARROW_STREAM_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    pyarrow_available,
+    write_leads_arrow,
+    write_leads_parquet,
+)
+from ..utils.metrics import observe_stage, record_cache, record_leads
+from ..utils.rate_limiter import RateLimitExceeded
+from ..utils.profiling import RunProfile, current_profile, profile_run
+from .responses import ModelJSONResponse
 
 
 logger = logging.getLogger(__name__)
@@ -45,6 +87,8 @@ def _get_zillow_client() -> ZillowClient:
         api_key=settings.zillow_api_key,
         base_url=settings.zillow_api_base,
         rapidapi_host=settings.zillow_rapidapi_host,
+        cache=get_zillow_cache(),
+        rate_limiter=get_zillow_rate_limiter(),
     )
 
 
@@ -52,6 +96,443 @@ def _get_vision_service() -> GeminiVisionService:
     return GeminiVisionService()
 
 
+def _get_batch_backend() -> BatchBackend:
+    settings = get_settings()
+    if settings.vision_batch_backend == "local":
+        # Answers are placeholders unless a responder is plugged in, so nothing reaches the vision cache
+        return LocalBatchBackend(settings.vision_batch_dir)
+    if not settings.gemini_api_key:
+        raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured")
+    return GeminiBatchBackend(api_key=settings.gemini_api_key)
+
+
+def _resolve_filters(payload: LeadsEndpointRequest) -> Dict[str, Any]:
+    # Build default filters for wealthy neighborhoods
+    # Note: keywords filter may not be supported by Zillow API, so we make it optional
+    default_filters = {
+        "minPrice": 1500000,  # $1.5M minimum
+        "maxPrice": 5000000,  # $5M maximum
+        # "keywords": "backyard",  # Removed as it may not be supported or too restrictive
+    }
+
+    # Merge user filters with defaults (user filters take precedence)
+    if payload.zillow_filters:
+        user_filters = payload.zillow_filters.model_dump(exclude_none=True)
+        default_filters.update(user_filters)
+    return default_filters
+
+
+def _discover_properties(payload: LeadsEndpointRequest, max_props: int) -> List[PropertyRecord]:
+    """Fetch up to ``max_props`` Zillow properties for the request location."""
+    zillow = _get_zillow_client()
+    final_filters = _resolve_filters(payload)
+
+    logger.info(f"Using filters: {final_filters}")
+    logger.info(f"Searching for properties in: {payload.location}")
+
+    settings = get_settings()
+    page_size = min(max_props, 50)  # 50 per page is the API limit
+    try:
+        with observe_stage("discovery"):
+            bounds = _area_bounds(payload.location, final_filters, max_props, page_size)
+            if bounds is not None:
+                return zillow.search_area(
+                    bounds=bounds,
+                    max_properties=max_props,
+                    filters=final_filters,
+                    page_size=page_size,
+                    max_pages=settings.zillow_max_pages,
+                    concurrency=settings.zillow_page_concurrency,
+                    cell_concurrency=settings.zillow_area_concurrency,
+                    grid=settings.zillow_area_grid,
+                    max_depth=settings.zillow_area_max_depth,
+                )
+            # Pages are fetched concurrently and deduplicated by zpid
+            return zillow.search_pages(
+                location=payload.location,
+                max_properties=max_props,
+                filters=final_filters,
+                page_size=page_size,
+                max_pages=settings.zillow_max_pages,
+                concurrency=settings.zillow_page_concurrency,
+            )
+    except RateLimitExceeded as exc:
+        # Not a "no results" ValueError: the caller should retry later rather than get short leads
+        logger.warning("Zillow discovery rate-limited: %s", exc)
+        headers = {"Retry-After": str(math.ceil(exc.retry_after))} if exc.retry_after is not None else None
+        raise HTTPException(status_code=429 if exc.quota_exhausted else 503, detail=str(exc), headers=headers) from exc
+    finally:
+        zillow.close()
+
+
+def _area_bounds(
+    location: str, filters: Dict[str, Any], max_props: int, page_size: int
+) -> Optional[Tuple[float, float, float, float]]:
+    """Viewport to tile for area search, or None when one paginated search can return ``max_props``."""
+    settings = get_settings()
+    if not settings.zillow_area_tiling or max_props <= page_size * settings.zillow_max_pages:
+        return None
+    if filters.get("polygon") or filters.get("coordinates") or not settings.google_maps_api_key:
+        return None
+    maps_client = _get_maps_client()
+    try:
+        return maps_client.geocode_viewport(location)
+    except ValueError as ve:
+        logger.warning(f"No viewport for {location!r}, searching by location only: {ve}")
+        return None
+    finally:
+        maps_client.close()
+
+
+def _imagery_center(longitude: float, latitude: float, *, zoom: int, size_w: int, size_h: int) -> Tuple[float, float]:
+    """Quantize a property coordinate to the imagery dedupe grid (see IMAGERY_DEDUPE_CELL_FRACTION)."""
+    cell_px = int(min(size_w, size_h) * get_settings().imagery_dedupe_cell_fraction)
+    return snap_to_grid(longitude, latitude, zoom, cell_px)
+
+
+def _get_imagery_router(maps_client: GoogleMapsClient, *, use_tiles: bool) -> Tuple[ImageryRouter, List[MapboxClient]]:
+    """Router over the configured imagery providers, plus the extra clients it opened (close them when done)."""
+    settings = get_settings()
+    sources: List[ImagerySource] = []
+    extra_clients: List[MapboxClient] = []
+    for name in settings.imagery_providers:
+        if name == "google":
+            sources.append(google_source(maps_client, use_tiles=use_tiles))
+        elif name == "mapbox":
+            if not settings.mapbox_access_token:
+                continue
+            mapbox = MapboxClient(
+                access_token=settings.mapbox_access_token,
+                image_size_px=settings.mapbox_image_size,
+                style=settings.mapbox_style,
+                country_filter=settings.mapbox_country_filter,
+            )
+            extra_clients.append(mapbox)
+            sources.append(mapbox_source(mapbox))
+        else:
+            logger.warning("Ignoring unknown imagery provider %r", name)
+    if not sources:
+        sources.append(google_source(maps_client, use_tiles=use_tiles))
+    return ImageryRouter(sources), extra_clients
+
+
+def _load_image(store: Optional[ImageStore], key: ImageKey, fetch: Callable[[], Tuple[bytes, str]]) -> Any:
+    """Return the image for ``key``: memory-mapped from the local store, or freshly fetched bytes."""
+    if store is None:
+        return fetch()[0]
+    fetched = False
+
+    def counted_fetch() -> Tuple[bytes, str]:
+        nonlocal fetched
+        fetched = True
+        return fetch()
+
+    image = store.get_or_fetch(key, counted_fetch)[1]
+    record_cache("image_store", not fetched)
+    return image
+
+
+def _ready_image(image: Any, error: Optional[BaseException], fallback: Callable[[], Any]) -> Any:
+    """Image loader handed to the vision stage once the prefetcher has finished a download.
+
+    Falls back to a synchronous load when the prefetcher skipped the image
+    (e.g. it was still in the vision cache at prefetch time).
+    """
+    if error is not None:
+        raise error
+    return image if image is not None else fallback()
+
+
+def _build_leads(
+    properties: List[PropertyRecord],
+    *,
+    zoom: int,
+    size_w: int,
+    size_h: int,
+    vision_model: str,
+    confidence_threshold: float,
+    target_leads: Optional[int] = None,
+) -> Tuple[List[LeadItem], Dict[str, int]]:
+    """Fetch imagery for each property, classify its backyard and score the survivors.
+
+    Coordinates are snapped to the imagery dedupe grid, so properties a few
+    meters apart share one image and one classification. Imagery is
+    downloaded by a prefetch stage running ahead of classification, so Gemini
+    calls don't wait on the network. Stops early once ``target_leads`` leads
+    were produced, when given.
+
+    Returns the leads and run stats (``dedupe_saved_calls``: properties served
+    by another property's imagery and classification).
+    """
+    settings = get_settings()
+    maps_client = _get_maps_client()
+    leads: List[LeadItem] = []
+    vision = _get_vision_service()
+    seen_results: dict[Tuple[Any, ...], Tuple[str, str, Dict[str, Any]]] = {}
+    dedupe_saved = 0
+    filtered_landscaped = 0
+    use_tiles = settings.imagery_mode == "tiles"
+    store = get_image_store()
+    lead_index = get_lead_index()
+    classified: List[LeadItem] = []
+    profile = current_profile()
+    if use_tiles:
+        # Neighbors share tiles; processing them together keeps the tile cache hot
+        properties = spatial_order(properties, zoom)
+    # Scored up front in one batch: cheap, and lets the best candidates be classified first
+    with observe_stage("scoring"):
+        ranked = list(zip(properties, LeadScorer().score_records(properties)))
+    if settings.leads_score_first and target_leads is not None and not use_tiles:
+        ranked.sort(key=lambda pair: pair[1], reverse=True)
+
+    router, extra_clients = _get_imagery_router(maps_client, use_tiles=use_tiles)
+    candidates: List[Dict[str, Any]] = []
+    for prop, score in ranked:
+        lat = prop.get("lat")
+        lng = prop.get("lng")
+        if lat is None or lng is None:
+            continue
+        center_lng, center_lat = _imagery_center(float(lng), float(lat), zoom=zoom, size_w=size_w, size_h=size_h)
+        candidates.append(
+            {
+                "prop": prop,
+                "score": float(score),
+                "lat": float(lat),
+                "lng": float(lng),
+                "center_lat": center_lat,
+                "center_lng": center_lng,
+                # Provider is filled in per download; the rest of the key identifies the window
+                "image_key": ImageKey(
+                    lat=center_lat,
+                    lng=center_lng,
+                    zoom=zoom,
+                    width=size_w,
+                    height=size_h,
+                    provider=router.primary,
+                ),
+            }
+        )
+
+    # Only the first candidate of each window is downloaded; repeats reuse its vision result
+    first_seen: set[int] = set()
+    windows_seen: set[Tuple[float, ...]] = set()
+    for idx, cand in enumerate(candidates):
+        window = cand["image_key"].as_row()
+        if window not in windows_seen:
+            windows_seen.add(window)
+            first_seen.add(idx)
+
+    def window_url(cand: Dict[str, Any], provider: str) -> str:
+        return router.image_url(provider, cand["center_lng"], cand["center_lat"], zoom, size_w, size_h)
+
+    def route(cand: Dict[str, Any], providers: Optional[List[str]] = None) -> Tuple[str, str, Any]:
+        return router.fetch(
+            cand["center_lng"],
+            cand["center_lat"],
+            zoom,
+            size_w,
+            size_h,
+            load=lambda provider, fetch: _load_image(store, replace(cand["image_key"], provider=provider), fetch),
+            providers=providers,
+        )
+
+    def refetch(cand: Dict[str, Any], provider: str) -> Any:
+        return route(cand, [provider])[2]
+
+    def source(job: Tuple[int, Dict[str, Any]]) -> Optional[Tuple[str, str, Any]]:
+        """Pick the provider for a window: one whose classification is cached, else the healthiest download."""
+        idx, cand = job
+        if idx not in first_seen:
+            return None
+        if not vision.available:
+            return router.primary, window_url(cand, router.primary), None
+        # Rank once per window: ranking counts toward probe turns, so the download reuses this order
+        order = router.ranked()
+        for provider in order:
+            url = window_url(cand, provider)
+            if vision.get_cached(url, provider=provider) is not None:
+                return provider, url, None
+        if profile is None:
+            return route(cand, order)
+        # Prefetch threads don't see the request's profile; attribute the download explicitly
+        with profile.timed("image_download", index=idx):
+            return route(cand, order)
+
+    prefetcher = ImageryPrefetcher(
+        lookahead=settings.imagery_prefetch_lookahead,
+        max_buffered_bytes=settings.imagery_prefetch_max_bytes,
+        # source() returns (provider, url, image); only the image counts against the cap
+        sizeof=lambda sourced: buffered_size(sourced[2]) if sourced is not None else 0,
+    )
+    ready = prefetcher.map(source, list(enumerate(candidates)))
+    try:
+        for (idx, cand), sourced, error in ready:
+            lat, lng, prop = cand["lat"], cand["lng"], cand["prop"]
+            window = cand["image_key"].as_row()
+            if profile is not None:
+                profile.begin_property(idx, address=prop.get("address"), zpid=prop.get("zpid"))
+                profile.add_stage("queue_wait", prefetcher.last_wait_seconds)
+
+            # Reuse vision result if we've already processed the same window
+            if window in seen_results:
+                logger.debug("Reusing vision result for window %s", window)
+                provider, img_url, vision_result = seen_results[window]
+                dedupe_saved += 1
+                reused = True
+            else:
+                if sourced is None:
+                    # Every provider failed; classify still reports the download error
+                    provider, img_url, image = router.primary, window_url(cand, router.primary), None
+                else:
+                    provider, img_url, image = sourced
+                reused = False
+                vision_result = vision.classify(
+                    image_url=img_url,
+                    model=vision_model,
+                    confidence_threshold=confidence_threshold,
+                    longitude=cand["center_lng"],
+                    latitude=cand["center_lat"],
+                    image_loader=partial(_ready_image, image, error, partial(refetch, cand, provider)),
+                    provider=provider,
+                )
+                seen_results[window] = (provider, img_url, vision_result)
+
+            digest = store.lookup(replace(cand["image_key"], provider=provider)) if store is not None else None
+
+            lead = LeadItem(
+                address=prop.get("address"),
+                coordinates=Coordinates(lat=lat, lng=lng),
+                zillow=ZillowMeta(
+                    zpid=str(prop.get("zpid")) if prop.get("zpid") is not None else None,
+                    price=prop.get("price"),
+                    beds=prop.get("beds"),
+                    baths=prop.get("baths"),
+                    livingArea=prop.get("livingArea"),
+                    lotSize=prop.get("lotSize"),
+                ),
+                imagery=ImageryMeta(
+                    image_url=img_url,
+                    zoom=zoom,
+                    size={"w": size_w, "h": size_h},
+                    provider=provider,
+                    local_url=f"/api/v1/imagery/{digest}" if digest else None,
+                ),
+                vision=VisionMeta(
+                    backyard_status=vision_result.get("backyard_status"),
+                    backyard_confidence=vision_result.get("backyard_confidence"),
+                    notes=vision_result.get("notes"),
+                    model=vision_result.get("model"),
+                ),
+                lead_score=cand["score"],
+            )
+
+            # Every real classification goes to the spatial index, landscaped ones included;
+            # failed ones (uncertain at zero confidence) would only shadow a later good result
+            if lead_index is not None and not (
+                vision_result.get("backyard_status") == "uncertain" and not vision_result.get("backyard_confidence")
+            ):
+                classified.append(lead)
+
+            # Filter: prioritize undeveloped and partially_developed backyards
+            backyard_status = vision_result.get("backyard_status")
+            if profile is not None:
+                profile.note_property(
+                    provider=provider,
+                    reused=reused,
+                    backyard_status=backyard_status,
+                    lead_score=cand["score"],
+                    outcome="filtered" if backyard_status == "fully_landscaped" else "lead",
+                )
+            if backyard_status == "fully_landscaped":
+                # Skip fully landscaped properties as they're less likely to need landscaping services
+                filtered_landscaped += 1
+                continue
+
+            leads.append(lead)
+
+            # Early exit if we have enough leads
+            if target_leads is not None and len(leads) >= target_leads:
+                break
+    finally:
+        ready.close()
+        if profile is not None:
+            profile.end_property()
+        record_leads(len(leads), filtered_landscaped)
+        logger.info(
+            "Imagery: %d Google requests for %d properties (%d served by grid dedupe, %d provider failovers); classification waited %.2fs on downloads",
+            maps_client.imagery_requests,
+            len(candidates),
+            dedupe_saved,
+            router.failovers,
+            prefetcher.wait_seconds,
+        )
+        clients: List[Union[GoogleMapsClient, MapboxClient]] = [maps_client, *extra_clients]
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                logger.debug("Imagery client close failed", exc_info=True)
+        try:
+            vision.close()
+        except Exception:
+            logger.debug("Vision service close failed", exc_info=True)
+        if lead_index is not None:
+            try:
+                lead_index.upsert_many([lead.model_dump() for lead in classified])
+            except Exception:
+                logger.warning("Failed to index %d classified leads", len(classified), exc_info=True)
+    return leads, {"dedupe_saved_calls": dedupe_saved}
+
+
+def _profile_level(
+    profile: Optional[str] = Query(
+        default=None,
+        pattern="^(timing|trace|cpu)$",
+        description="Admin only (X-Admin-Token): timing adds a Server-Timing header, trace a JSON trace, cpu a sampling profile",
+    ),
+    x_admin_token: Optional[str] = Header(default=None),
+) -> Optional[str]:
+    """Requested profiling level, once the caller proved it is an admin."""
+    if profile is None:
+        return None
+    token = get_settings().admin_token
+    if not token:
+        raise HTTPException(status_code=403, detail="Profiling is disabled (ADMIN_TOKEN is not set)")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), token.encode()):
+        raise HTTPException(status_code=403, detail="Profiling requires a valid X-Admin-Token")
+    return profile
+
+
+def _profile_headers(profile: Optional[RunProfile], *, store_trace: bool = False) -> Dict[str, str]:
+    """``Server-Timing`` for a profiled run; with ``store_trace``, also a link to its JSON trace in the export store."""
+    if profile is None:
+        return {}
+    headers = {"Server-Timing": profile.server_timing()}
+    store = get_export_store()
+    if store_trace and profile.level != "timing" and store is not None:
+        try:
+            artifact = store.put_chunks(
+                [json.dumps(profile.to_dict()).encode()],
+                filename=f"profile-{profile.id}.json",
+                content_type="application/json",
+            )
+            headers["X-Profile-Trace"] = f"/api/v1/exports/{artifact.id}"
+        except Exception:
+            logger.warning("Failed to store profile trace %s", profile.id, exc_info=True)
+    return headers
+
+
+def _export_ref(artifact: ExportArtifact) -> ExportRef:
+    return ExportRef(
+        id=artifact.id,
+        url=f"/api/v1/exports/{artifact.id}",
+        filename=artifact.filename,
+        content_type=artifact.content_type,
+        size=artifact.size,
+        sha256=artifact.id,
+    )
+
+
 @router.post("/validate-location", response_model=LocationResponse)
 def validate_location(payload: LocationRequest) -> LocationResponse:
     try:
@@ -66,10 +547,11 @@ def validate_location(payload: LocationRequest) -> LocationResponse:
 
     # Generate a few preview images for UI consumption
     try:
-        urls: List[str] = client.get_satellite_images((lon, lat), count=3)
+        # Each preview reports the center of its own window, not the query point
+        windows: List[Tuple[str, float, float]] = client.get_satellite_windows((lon, lat), count=3)
     except Exception:  # pragma: no cover
         logger.warning("Failed to obtain preview images", exc_info=True)
-        urls = []
+        windows = []
     finally:
         client.close()
 
@@ -79,11 +561,11 @@ def validate_location(payload: LocationRequest) -> LocationResponse:
             width=get_settings().mapbox_image_size,
             height=get_settings().mapbox_image_size,
             zoom=get_settings().mapbox_zoom,
-            center_longitude=lon,
-            center_latitude=lat,
+            center_longitude=c_lon,
+            center_latitude=c_lat,
             style=get_settings().mapbox_style,
         )
-        for u in urls
+        for u, c_lon, c_lat in windows
         if u
     ]
 
@@ -119,10 +601,15 @@ def generate_lead(payload: LeadGenerationRequest) -> LeadGenerationResponse:
     finally:
         client.close()
 
+    # Classify each distinct window once; repeated URLs would only pay for the same answer again
+    unique_urls = list(dict.fromkeys(image_urls))
+    if len(unique_urls) < len(image_urls):
+        logger.info("Dropped %d duplicate imagery windows before classification", len(image_urls) - len(unique_urls))
+
     # Analyze each image with OpenAI Vision (replaces legacy VisionAgent)
     vision = _get_vision_service()
     analyses: list[RoofAnalysis] = []
-    for url in image_urls:
+    for url in unique_urls:
         result = vision.classify(image_url=url)
         analyses.append(
             RoofAnalysis(
@@ -151,7 +638,19 @@ def generate_lead(payload: LeadGenerationRequest) -> LeadGenerationResponse:
 
 
 @router.post("/leads", response_model=LeadsEndpointResponse)
-def create_leads(payload: LeadsEndpointRequest) -> LeadsEndpointResponse:
+def create_leads(payload: LeadsEndpointRequest, profile_level: Optional[str] = Depends(_profile_level)) -> ModelJSONResponse:
+    with profile_run(profile_level) as profile:
+        envelope, include = _leads_envelope(payload)
+    if profile is not None and profile.level != "timing":
+        envelope.profile = profile.to_dict()
+    # Leads were validated when built; the envelope is encoded once
+    response = ModelJSONResponse(envelope, include=include, exclude_none=payload.compact)
+    response.headers.update(_profile_headers(profile))
+    return response
+
+
+def _leads_envelope(payload: LeadsEndpointRequest) -> Tuple[LeadsEndpointResponse, Optional[Dict[str, Any]]]:
+    """Run the /leads pipeline; return the response envelope and the include tree for field projection."""
     settings = get_settings()
     # Defaults from settings if not provided
     max_props = payload.max_properties or settings.leads_max_properties
@@ -165,64 +664,14 @@ def create_leads(payload: LeadsEndpointRequest) -> LeadsEndpointResponse:
     size_w = payload.imagery.size.w if payload.imagery else settings.mapbox_image_size
     size_h = payload.imagery.size.h if payload.imagery else settings.mapbox_image_size
 
-    # Fetch leads in batches until we have enough
     target_leads = payload.max_properties or settings.leads_max_properties
-    all_properties = []
-    # Use target_leads as batch size, but cap at 50 per page (API limit)
-    batch_size = min(target_leads, 50)
-    max_attempts = 5  # Prevent infinite loops
-    page = 1  # Start with page 1
-
-    zillow = _get_zillow_client()
-    
-    # Build default filters for wealthy neighborhoods
-    # Note: keywords filter may not be supported by Zillow API, so we make it optional
-    default_filters = {
-        "minPrice": 1500000,  # $1.5M minimum
-        "maxPrice": 5000000,  # $5M maximum
-        # "keywords": "backyard",  # Removed as it may not be supported or too restrictive
-    }
-    
-    # Merge user filters with defaults (user filters take precedence)
-    if payload.zillow_filters:
-        user_filters = payload.zillow_filters.model_dump(exclude_none=True)
-        default_filters.update(user_filters)
-        final_filters = default_filters
-    else:
-        final_filters = default_filters
-    
-    logger.info(f"Using filters: {final_filters}")
-    logger.info(f"Searching for properties in: {payload.location}")
-    
-    # Fetch properties until we have enough (fetch extra to account for filtering)
-    while len(all_properties) < target_leads * 2 and page <= max_attempts:
-        # Calculate how many more we need
-        remaining = (target_leads * 2) - len(all_properties)
-        current_batch_size = min(batch_size, remaining)
-        
-        try:
-            batch = zillow.search_properties(
-                location=payload.location,
-                max_properties=current_batch_size,
-                filters=final_filters,
-                page=page,
-            )
-            all_properties.extend(batch)
-            logger.info(f"Fetched {len(batch)} properties from page {page}, total so far: {len(all_properties)}")
-            if len(batch) == 0:
-                logger.warning(f"No properties returned from Zillow API on page {page}. Filters may be too restrictive.")
-            page += 1
-
-            # If we got fewer results than requested, we've likely reached the end
-            if len(batch) < batch_size:
-                logger.info(f"Reached end of results at page {page-1}")
-                break
-        except ValueError as ve:
-            logger.error(f"Zillow API error on page {page}: {ve}")
-            break
+    # Fetch extra properties to account for filtering
+    try:
+        all_properties = _discover_properties(payload, target_leads * 2)
+    except ValueError as ve:
+        logger.error(f"Zillow API error: {ve}")
+        all_properties = []
 
-    zillow.close()
-    
     logger.info(f"Total properties fetched: {len(all_properties)}")
     if len(all_properties) == 0:
         logger.warning("No properties found. This could be due to:")
@@ -230,90 +679,15 @@ def create_leads(payload: LeadsEndpointRequest) -> LeadsEndpointResponse:
         logger.warning("2. Location has no properties matching criteria")
         logger.warning("3. Zillow API returned no results")
 
-    # Build imagery URLs per property and filter
-    maps_client = _get_maps_client()
-    leads: List[LeadItem] = []
-    vision = _get_vision_service()
-    scorer = LeadScorer()
-    seen_results: dict[str, Dict[str, Any]] = {}
-    try:
-        for prop in all_properties:
-            lat = prop.get("lat")
-            lng = prop.get("lng")
-            if lat is None or lng is None:
-                continue
-            img_url = maps_client.get_satellite_image_url(
-                longitude=float(lng),
-                latitude=float(lat),
-                zoom=zoom,
-                width_px=size_w,
-                height_px=size_h,
-            )
-
-            # Reuse vision result if we've already processed the same image URL
-            if img_url in seen_results:
-                logger.debug("Reusing cached vision result for %s", img_url)
-                vision_result = seen_results[img_url]
-            else:
-                vision_result = vision.classify(
-                    image_url=img_url,
-                    model=vision_model,
-                    confidence_threshold=confidence_threshold,
-                    longitude=float(lng),
-                    latitude=float(lat),
-                )
-                seen_results[img_url] = vision_result
-
-            # Filter: prioritize undeveloped and partially_developed backyards
-            backyard_status = vision_result.get("backyard_status")
-            if backyard_status == "fully_landscaped":
-                # Skip fully landscaped properties as they're less likely to need landscaping services
-                continue
-
-            score = scorer.score(
-                price=prop.get("price"),
-                living_area=prop.get("livingArea"),
-                lot_size=prop.get("lotSize")
-            )
-
-            leads.append(
-                LeadItem(
-                    address=prop.get("address"),
-                    coordinates=Coordinates(lat=float(lat), lng=float(lng)),
-                    zillow=ZillowMeta(
-                        zpid=str(prop.get("zpid")) if prop.get("zpid") is not None else None,
-                        price=prop.get("price"),
-                        beds=prop.get("beds"),
-                        baths=prop.get("baths"),
-                        livingArea=prop.get("livingArea"),
-                    ),
-                    imagery=ImageryMeta(
-                        image_url=img_url,
-                        zoom=zoom,
-                        size={"w": size_w, "h": size_h},
-                    ),
-                    vision=VisionMeta(
-                        backyard_status=vision_result.get("backyard_status"),
-                        backyard_confidence=vision_result.get("backyard_confidence"),
-                        notes=vision_result.get("notes"),
-                        model=vision_result.get("model"),
-                    ),
-                    lead_score=score,
-                )
-            )
-
-            # Early exit if we have enough leads
-            if len(leads) >= target_leads:
-                break
-    finally:
-        try:
-            maps_client.close()
-        except Exception:
-            logger.debug("Mapbox client close failed", exc_info=True)
-        try:
-            vision.close()
-        except Exception:
-            logger.debug("Vision service close failed", exc_info=True)
+    leads, run_stats = _build_leads(
+        all_properties,
+        zoom=zoom,
+        size_w=size_w,
+        size_h=size_h,
+        vision_model=vision_model,
+        confidence_threshold=confidence_threshold,
+        target_leads=target_leads,
+    )
 
     # Sort by lead_score desc and limit to target
     leads_sorted = sorted(leads, key=lambda x: x.lead_score, reverse=True)[:target_leads]
@@ -321,37 +695,66 @@ def create_leads(payload: LeadsEndpointRequest) -> LeadsEndpointResponse:
     # Convert Pydantic objects to dict for exporter
     leads_serializable = [l.model_dump() if hasattr(l, "model_dump") else l for l in leads_sorted]
     
+    # Exports are stored and referenced by id; base64 copies only for legacy clients or without a store
+    store = get_export_store()
+    inline = settings.leads_inline_exports or store is None
+    basename = f"leads-{payload.location.replace(' ', '_')}"
+    exports: Dict[str, ExportRef] = {}
+    csv_payload = excel_payload = None
+
     # CSV attachment (lightweight alternative to Excel)
     try:
-        csv_payload = leads_to_csv_b64(leads_serializable, filename=f"leads-{payload.location.replace(' ', '_')}.csv")
+        if store is not None:
+            with observe_stage("export"):
+                exports["csv"] = _export_ref(
+                    store.put_chunks(iter_leads_csv(leads_serializable), filename=f"{basename}.csv", content_type="text/csv")
+                )
+        if inline:
+            csv_payload = leads_to_csv_b64(leads_serializable, filename=f"{basename}.csv")
     except Exception:
         logger.exception("Failed generating CSV payload")
         csv_payload = None
         # Fall back to Excel if CSV fails
         try:
-            excel_payload = leads_to_excel_b64(leads_serializable, filename=f"leads-{payload.location.replace(' ', '_')}.xlsx")
+            if store is not None:
+                path = spool_export(write_leads_excel, leads_serializable, suffix=".xlsx")
+                try:
+                    exports["excel"] = _export_ref(
+                        store.put_file(path, filename=f"{basename}.xlsx", content_type=EXCEL_MEDIA_TYPE)
+                    )
+                finally:
+                    os.unlink(path)
+            if inline:
+                excel_payload = leads_to_excel_b64(leads_serializable, filename=f"{basename}.xlsx")
         except Exception:
             logger.exception("Failed generating Excel payload")
             excel_payload = None
-    else:
-        # Only generate Excel if CSV succeeded (to avoid duplicate errors)
-        excel_payload = None
 
-    return LeadsEndpointResponse(
+    # Field projection (fields / compact) is applied while encoding
+    lead_include = payload.lead_include()
+    include: Optional[Dict[str, Any]] = None
+    if lead_include is not None:
+        include = {name: True for name in LeadsEndpointResponse.model_fields}
+        include["leads"] = {"__all__": lead_include}
+
+    # Leads were validated when built; no need to validate the envelope again
+    envelope = LeadsEndpointResponse.model_construct(
         location=payload.location,
         count=len(leads_sorted),
         leads=leads_sorted,
+        exports=exports,
         excel=excel_payload,
         csv=csv_payload,  # New field for CSV
+        dedupe_saved_calls=run_stats["dedupe_saved_calls"],
+        profile=None,
     )
+    return envelope, include
 
 
-@router.post("/leads/excel")
-def create_leads_excel(payload: LeadsEndpointRequest) -> Response:
-    """Return the leads as an XLSX binary download.
+def _export_rows(payload: LeadsEndpointRequest) -> Iterator[Dict[str, Any]]:
+    """Run the lead pipeline for a file export and return the ranked leads as dicts.
 
-    Note: This mirrors the logic of /leads to build the same set of leads,
-    but streams the Excel file rather than embedding base64.
+    Leads are dumped lazily, one at a time as the export writer consumes them.
     """
     # Build leads using the same orchestration as create_leads
     settings = get_settings()
@@ -366,155 +769,155 @@ def create_leads_excel(payload: LeadsEndpointRequest) -> Response:
         else settings.vision_confidence_threshold
     )
 
-    zillow = _get_zillow_client()
-    
-    # Build default filters for wealthy neighborhoods
-    # Note: keywords filter may not be supported by Zillow API, so we make it optional
-    default_filters = {
-        "minPrice": 1500000,  # $1.5M minimum
-        "maxPrice": 5000000,  # $5M maximum
-        # "keywords": "backyard",  # Removed as it may not be supported or too restrictive
-    }
-    
-    # Merge user filters with defaults (user filters take precedence)
-    if payload.zillow_filters:
-        user_filters = payload.zillow_filters.model_dump(exclude_none=True)
-        default_filters.update(user_filters)
-        final_filters = default_filters
-    else:
-        final_filters = default_filters
-    
-    logger.info(f"Using filters: {final_filters}")
-    logger.info(f"Searching for properties in: {payload.location}")
-    
-    try:
-        # Fetch properties with pagination for variety
-        properties = []
-        # Use max_props as batch size, but cap at 50 per page (API limit)
-        batch_size = min(max_props, 50)
-        max_pages = 5
-        page = 1
-
-        while len(properties) < max_props and page <= max_pages:
-            # Calculate how many more we need
-            remaining = max_props - len(properties)
-            current_batch_size = min(batch_size, remaining)
-            
-            batch = zillow.search_properties(
-                location=payload.location,
-                max_properties=current_batch_size,
-                filters=final_filters,
-                page=page,
-            )
-            properties.extend(batch)
-            page += 1
+    properties = _discover_properties(payload, max_props)
 
-            # If we got fewer results than requested, we've likely reached the end
-            if len(batch) < current_batch_size:
-                break
+    leads, _ = _build_leads(
+        properties,
+        zoom=zoom,
+        size_w=size_w,
+        size_h=size_h,
+        vision_model=vision_model,
+        confidence_threshold=confidence_threshold,
+    )
 
-        # Limit to requested max_properties (should already be limited, but ensure)
-        properties = properties[:max_props]
-    finally:
-        zillow.close()
+    leads_sorted = sorted(leads, key=lambda x: x.lead_score, reverse=True)
+    return (l.model_dump() if hasattr(l, "model_dump") else l for l in leads_sorted)
 
-    maps_client = _get_maps_client()
-    vision = _get_vision_service()
-    scorer = LeadScorer()
-    leads: List[LeadItem] = []
-    seen_results: dict[str, Dict[str, Any]] = {}
-    try:
-        for prop in properties:
-            lat = prop.get("lat")
-            lng = prop.get("lng")
-            if lat is None or lng is None:
-                continue
-            img_url = maps_client.get_satellite_image_url(
-                longitude=float(lng),
-                latitude=float(lat),
-                zoom=zoom,
-                width_px=size_w,
-                height_px=size_h,
-            )
-            if img_url in seen_results:
-                vision_result = seen_results[img_url]
-            else:
-                vision_result = vision.classify(
-                    image_url=img_url,
-                    model=vision_model,
-                    confidence_threshold=confidence_threshold,
-                    longitude=float(lng),
-                    latitude=float(lat),
-                )
-                seen_results[img_url] = vision_result
-            backyard_status = vision_result.get("backyard_status")
-            if backyard_status == "fully_landscaped":
-                continue
-            score = scorer.score(
-                price=prop.get("price"),
-                living_area=prop.get("livingArea"),
-                lot_size=prop.get("lotSize")
-            )
-            leads.append(
-                LeadItem(
-                    address=prop.get("address"),
-                    coordinates=Coordinates(lat=float(lat), lng=float(lng)),
-                    zillow=ZillowMeta(
-                        zpid=str(prop.get("zpid")) if prop.get("zpid") is not None else None,
-                        price=prop.get("price"),
-                        beds=prop.get("beds"),
-                        baths=prop.get("baths"),
-                        livingArea=prop.get("livingArea"),
-                        lotSize=prop.get("lotSize"),
-                    ),
-                    imagery=ImageryMeta(
-                        image_url=img_url,
-                        zoom=zoom,
-                        size={"w": size_w, "h": size_h},
-                    ),
-                    vision=VisionMeta(
-                        backyard_status=vision_result.get("backyard_status"),
-                        backyard_confidence=vision_result.get("backyard_confidence"),
-                        notes=vision_result.get("notes"),
-                        model=vision_result.get("model"),
-                    ),
-                    lead_score=score,
-                )
-            )
-    finally:
-        try:
-            maps_client.close()
-        except Exception:
-            logger.debug("Mapbox client close failed", exc_info=True)
-        try:
-            vision.close()
-        except Exception:
-            logger.debug("Vision service close failed", exc_info=True)
 
-    leads_sorted = sorted(leads, key=lambda x: x.lead_score, reverse=True)
-    leads_serializable = [l.model_dump() if hasattr(l, "model_dump") else l for l in leads_sorted]
-    data = leads_to_excel_bytes(leads_serializable)
-    filename = f"leads-{payload.location.replace(' ', '_')}.xlsx"
-    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
-    return Response(
-        content=data,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers=headers,
+def _spooled_download(
+    payload: LeadsEndpointRequest,
+    write: Callable[[Iterable[Dict[str, Any]], Any], None],
+    *,
+    suffix: str,
+    media_type: str,
+    profile_level: Optional[str] = None,
+) -> FileResponse:
+    """Write the export to a temp file and stream it, deleting the file once sent."""
+    with profile_run(profile_level) as profile:
+        rows = _export_rows(payload)
+        with observe_stage("export"):
+            path = spool_export(write, rows, suffix=suffix)
+    return FileResponse(
+        path,
+        media_type=media_type,
+        filename=f"leads-{payload.location.replace(' ', '_')}{suffix}",
+        headers=_profile_headers(profile, store_trace=True),
+        background=BackgroundTask(os.unlink, path),
+    )
+
+
+@router.post("/leads/excel")
+def create_leads_excel(payload: LeadsEndpointRequest, profile_level: Optional[str] = Depends(_profile_level)) -> FileResponse:
+    """Return the leads as an XLSX binary download.
+
+    Note: This mirrors the logic of /leads to build the same set of leads,
+    but streams the Excel file rather than embedding base64. The workbook is
+    spooled to a temp file with a write-only sheet, streamed from disk and
+    deleted once sent.
+    """
+    return _spooled_download(
+        payload, write_leads_excel, suffix=".xlsx", media_type=EXCEL_MEDIA_TYPE, profile_level=profile_level
     )
 
 
+def _observed_stream(chunks: Iterator[bytes], stage: str) -> Iterator[bytes]:
+    """Pass chunks through, timing the whole stream as ``stage``."""
+    with observe_stage(stage):
+        yield from chunks
+
+
 @router.post("/leads/csv")
-def create_leads_csv(payload: LeadsEndpointRequest) -> Response:
+def create_leads_csv(payload: LeadsEndpointRequest, profile_level: Optional[str] = Depends(_profile_level)) -> StreamingResponse:
     """Return the leads as a CSV binary download.
 
     Note: This is a lightweight alternative to Excel, providing the same data
-    in a simpler format that's easier to process.
+    in a simpler format that's easier to process. Once the leads are ranked,
+    rows are encoded and streamed in chunks (chunked transfer encoding).
+    """
+    with profile_run(profile_level) as profile:
+        rows = _export_rows(payload)
+    filename = f"leads-{payload.location.replace(' ', '_')}.csv"
+    # Rows are encoded while streaming, after the Server-Timing header was sent
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', **_profile_headers(profile, store_trace=True)}
+    return StreamingResponse(
+        _observed_stream(iter_leads_csv(rows), "export"),
+        media_type="text/csv",
+        headers=headers,
+    )
+
+
+@router.post("/leads/parquet")
+def create_leads_parquet(payload: LeadsEndpointRequest, profile_level: Optional[str] = Depends(_profile_level)) -> FileResponse:
+    """Return the leads as a zstd-compressed Parquet file with a fixed, typed schema.
+
+    Meant for bulk analytics ingestion; needs pyarrow (501 otherwise).
+    """
+    if not pyarrow_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+    return _spooled_download(
+        payload, write_leads_parquet, suffix=".parquet", media_type=PARQUET_MEDIA_TYPE, profile_level=profile_level
+    )
+
+
+@router.post("/leads/arrow")
+def create_leads_arrow(payload: LeadsEndpointRequest, profile_level: Optional[str] = Depends(_profile_level)) -> FileResponse:
+    """Return the leads as an Arrow IPC stream (zstd-compressed batches), same schema as /leads/parquet."""
+    if not pyarrow_available():
+        raise HTTPException(status_code=501, detail="Arrow export requires pyarrow")
+    return _spooled_download(
+        payload, write_leads_arrow, suffix=".arrows", media_type=ARROW_STREAM_MEDIA_TYPE, profile_level=profile_level
+    )
+
+
+def _parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    try:
+        west, south, east, north = (float(part) for part in bbox.split(","))
+    except ValueError:
+        raise ValueError("bbox must be 'west,south,east,north'")
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= north <= 90) or west > east:
+        raise ValueError("bbox must be 'west,south,east,north' with west <= east and south <= north")
+    return west, south, east, north
+
+
+@router.get("/leads/nearby", response_model=LeadsNearbyResponse)
+def leads_nearby(
+    lat: Optional[float] = Query(default=None, ge=-90, le=90),
+    lng: Optional[float] = Query(default=None, ge=-180, le=180),
+    radius_m: Optional[float] = Query(default=None, gt=0, le=50_000),
+    bbox: Optional[str] = Query(default=None, description="west,south,east,north"),
+    statuses: Optional[str] = Query(default=None, description="Comma-separated backyard statuses, e.g. undeveloped,partially_developed"),
+    max_age_days: Optional[float] = Query(default=None, gt=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+) -> ModelJSONResponse:
+    """Previously classified properties around a point (``lat``/``lng``/``radius_m``) or inside ``bbox``.
+
+    Served from the local spatial index only: no Zillow, imagery or Gemini calls.
+    Radius results are nearest first, bounding-box results best score first.
+    """
+    index = get_lead_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Lead index is disabled")
+    status_list = [s.strip() for s in statuses.split(",") if s.strip()] if statuses else None
+    max_age_seconds = max_age_days * 86400 if max_age_days is not None else None
+    try:
+        if bbox is not None:
+            rows = index.query_bbox(_parse_bbox(bbox), statuses=status_list, max_age_seconds=max_age_seconds, limit=limit)
+        elif lat is not None and lng is not None and radius_m is not None:
+            rows = index.query_radius(lat, lng, radius_m, statuses=status_list, max_age_seconds=max_age_seconds, limit=limit)
+        else:
+            raise ValueError("Provide either bbox or lat, lng and radius_m")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    leads = [NearbyLead(**row) for row in rows]
+    return ModelJSONResponse(LeadsNearbyResponse.model_construct(count=len(leads), leads=leads))
+
+
+def _run_vision_batch(payload: VisionBatchRequest, batch_id: str) -> None:
+    """Discover, download and submit a batch created by ``submit_vision_batch``.
+
+    Runs after the response is sent; failures are recorded in the batch manifest.
     """
-    # Build leads using the same orchestration as create_leads
     settings = get_settings()
-    max_props = payload.max_properties or settings.leads_max_properties
-    # Always use zoom 20 for Google Maps satellite imagery
-    zoom = 20
     size_w = payload.imagery.size.w if payload.imagery else settings.mapbox_image_size
     size_h = payload.imagery.size.h if payload.imagery else settings.mapbox_image_size
     vision_model = payload.vision.model if payload.vision and payload.vision.model else settings.vision_model
@@ -523,138 +926,132 @@ def create_leads_csv(payload: LeadsEndpointRequest) -> Response:
         else settings.vision_confidence_threshold
     )
 
-    zillow = _get_zillow_client()
-    
-    # Build default filters for wealthy neighborhoods
-    # Note: keywords filter may not be supported by Zillow API, so we make it optional
-    default_filters = {
-        "minPrice": 1500000,  # $1.5M minimum
-        "maxPrice": 5000000,  # $5M maximum
-        # "keywords": "backyard",  # Removed as it may not be supported or too restrictive
-    }
-    
-    # Merge user filters with defaults (user filters take precedence)
-    if payload.zillow_filters:
-        user_filters = payload.zillow_filters.model_dump(exclude_none=True)
-        default_filters.update(user_filters)
-        final_filters = default_filters
-    else:
-        final_filters = default_filters
-    
-    logger.info(f"Using filters: {final_filters}")
-    logger.info(f"Searching for properties in: {payload.location}")
-    
+    backend: Optional[BatchBackend] = None
+    vision: Optional[GeminiVisionService] = None
     try:
-        # Fetch properties with pagination for variety
-        properties = []
-        # Use max_props as batch size, but cap at 50 per page (API limit)
-        batch_size = min(max_props, 50)
-        max_pages = 5
-        page = 1
-
-        while len(properties) < max_props and page <= max_pages:
-            # Calculate how many more we need
-            remaining = max_props - len(properties)
-            current_batch_size = min(batch_size, remaining)
-            
-            batch = zillow.search_properties(
-                location=payload.location,
-                max_properties=current_batch_size,
-                filters=final_filters,
-                page=page,
-            )
-            properties.extend(batch)
-            page += 1
-
-            # If we got fewer results than requested, we've likely reached the end
-            if len(batch) < current_batch_size:
-                break
+        properties = _discover_properties(payload, payload.max_properties)
+        maps_client = _get_maps_client()
+        items: List[BatchItem] = []
+        try:
+            for prop in properties:
+                if prop.get("lat") is None or prop.get("lng") is None:
+                    continue
+                # Same grid snapping as /leads so the ingested results match its cache keys
+                center_lng, center_lat = _imagery_center(float(prop["lng"]), float(prop["lat"]), zoom=20, size_w=size_w, size_h=size_h)
+                items.append(
+                    BatchItem(
+                        image_url=maps_client.get_satellite_image_url(
+                            longitude=center_lng,
+                            latitude=center_lat,
+                            zoom=20,
+                            width_px=size_w,
+                            height_px=size_h,
+                        ),
+                        longitude=center_lng,
+                        latitude=center_lat,
+                    )
+                )
+        finally:
+            maps_client.close()
 
-        # Limit to requested max_properties (should already be limited, but ensure)
-        properties = properties[:max_props]
+        backend = _get_batch_backend()
+        vision = _get_vision_service()
+        runner = VisionBatchRunner(vision, backend, work_dir=settings.vision_batch_dir)
+        runner.submit(batch_id, items, model=vision_model, confidence_threshold=confidence_threshold)
+    except Exception as exc:
+        logger.error("Vision batch %s failed before submission: %s", batch_id, exc, exc_info=not isinstance(exc, ValueError))
+        try:
+            fail_batch(settings.vision_batch_dir, batch_id, str(getattr(exc, "detail", None) or exc))
+        except ValueError:
+            logger.error("Could not record failure of vision batch %s", batch_id, exc_info=True)
     finally:
-        zillow.close()
+        if backend is not None:
+            backend.close()
+        if vision is not None:
+            vision.close()
 
-    maps_client = _get_maps_client()
+
+@router.post("/vision/batch", response_model=VisionBatchResponse, status_code=202)
+def submit_vision_batch(payload: VisionBatchRequest, background_tasks: BackgroundTasks) -> VisionBatchResponse:
+    """Queue discovery and offline classification of properties as a batch job.
+
+    Returns the job id straight away in the ``preparing`` state; discovery,
+    image downloads and submission run in the background. Results are
+    ingested into the vision cache when the job is polled after it finishes,
+    so later /leads calls for the same properties skip Gemini.
+    """
+    settings = get_settings()
+    if settings.vision_batch_backend != "local" and not settings.gemini_api_key:
+        raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured")
+    try:
+        batch_id = create_batch(settings.vision_batch_dir)
+    except ValueError as ve:
+        logger.error("Vision batch could not be created: %s", ve)
+        raise HTTPException(status_code=503, detail=str(ve))
+    background_tasks.add_task(_run_vision_batch, payload, batch_id)
+    return VisionBatchResponse(job_id=batch_id, state=BATCH_PREPARING)
+
+
+@router.get("/vision/batch/{job_id}", response_model=VisionBatchResponse)
+def get_vision_batch(job_id: str) -> VisionBatchResponse:
+    """Poll a batch job once; results are ingested into the vision cache when it has succeeded."""
+    settings = get_settings()
+    try:
+        backend = _get_batch_backend()
+    except ValueError as ve:
+        raise HTTPException(status_code=503, detail=str(ve))
     vision = _get_vision_service()
-    scorer = LeadScorer()
-    leads: List[LeadItem] = []
-    seen_results: dict[str, Dict[str, Any]] = {}
     try:
-        for prop in properties:
-            lat = prop.get("lat")
-            lng = prop.get("lng")
-            if lat is None or lng is None:
-                continue
-            img_url = maps_client.get_satellite_image_url(
-                longitude=float(lng),
-                latitude=float(lat),
-                zoom=zoom,
-                width_px=size_w,
-                height_px=size_h,
-            )
-            if img_url in seen_results:
-                vision_result = seen_results[img_url]
-            else:
-                vision_result = vision.classify(
-                    image_url=img_url,
-                    model=vision_model,
-                    confidence_threshold=confidence_threshold,
-                    longitude=float(lng),
-                    latitude=float(lat),
-                )
-                seen_results[img_url] = vision_result
-            backyard_status = vision_result.get("backyard_status")
-            if backyard_status == "fully_landscaped":
-                continue
-            score = scorer.score(
-                price=prop.get("price"),
-                living_area=prop.get("livingArea"),
-                lot_size=prop.get("lotSize")
-            )
-            leads.append(
-                LeadItem(
-                    address=prop.get("address"),
-                    coordinates=Coordinates(lat=float(lat), lng=float(lng)),
-                    zillow=ZillowMeta(
-                        zpid=str(prop.get("zpid")) if prop.get("zpid") is not None else None,
-                        price=prop.get("price"),
-                        beds=prop.get("beds"),
-                        baths=prop.get("baths"),
-                        livingArea=prop.get("livingArea"),
-                        lotSize=prop.get("lotSize"),
-                    ),
-                    imagery=ImageryMeta(
-                        image_url=img_url,
-                        zoom=zoom,
-                        size={"w": size_w, "h": size_h},
-                    ),
-                    vision=VisionMeta(
-                        backyard_status=vision_result.get("backyard_status"),
-                        backyard_confidence=vision_result.get("backyard_confidence"),
-                        notes=vision_result.get("notes"),
-                        model=vision_result.get("model"),
-                    ),
-                    lead_score=score,
-                )
-            )
+        runner = VisionBatchRunner(vision, backend, work_dir=settings.vision_batch_dir)
+        summary = runner.poll(job_id)
+    except ValueError as ve:
+        raise HTTPException(status_code=404 if "Unknown batch job" in str(ve) else 502, detail=str(ve))
     finally:
-        try:
-            maps_client.close()
-        except Exception:
-            logger.debug("Mapbox client close failed", exc_info=True)
-        try:
-            vision.close()
-        except Exception:
-            logger.debug("Vision service close failed", exc_info=True)
+        backend.close()
+        vision.close()
+    return VisionBatchResponse(**summary)
 
-    leads_sorted = sorted(leads, key=lambda x: x.lead_score, reverse=True)
-    leads_serializable = [l.model_dump() if hasattr(l, "model_dump") else l for l in leads_sorted]
-    data = leads_to_csv_bytes(leads_serializable)
-    filename = f"leads-{payload.location.replace(' ', '_')}.csv"
-    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
-    return Response(
-        content=data,
-        media_type="text/csv",
-        headers=headers,
-    )
\ No newline at end of file
+
+@router.get("/imagery/{digest}")
+def get_imagery(digest: str) -> FileResponse:
+    """Serve a stored property image by content digest so the UI never hits the imagery provider."""
+    store = get_image_store()
+    if store is None or not is_valid_digest(digest):
+        raise HTTPException(status_code=404, detail="Image not found")
+    content_type = store.content_type(digest)
+    path = store.blob_path(digest)
+    if content_type is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Image not found")
+    # Content-addressed: the bytes behind a digest never change
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "ETag": f'"{digest}"'}
+    return FileResponse(path, media_type=content_type, headers=headers)
+
+
+@router.get("/exports/{export_id}")
+def get_export(export_id: str, if_none_match: Optional[str] = Header(default=None)) -> Response:
+    """Serve a stored export referenced from a /leads response.
+
+    The id is the content hash and doubles as a strong ETag: a matching
+    ``If-None-Match`` gets a 304, and ``Range`` requests resume partial downloads.
+    """
+    store = get_export_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Export not found or expired")
+    artifact = store.get(export_id)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Export not found or expired")
+    etag = f'"{artifact.id}"'
+    max_age = max(0, int(artifact.created_at + store.ttl_seconds - time.time()))
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={max_age}, immutable"}
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(artifact.path, media_type=artifact.content_type, filename=artifact.filename, headers=headers)
+
+
+@router.get("/zillow/quota", response_model=ZillowQuotaResponse)
+def zillow_quota() -> ZillowQuotaResponse:
+    """Remaining Zillow (RapidAPI) quota as tracked by the shared rate limiter."""
+    limiter = get_zillow_rate_limiter()
+    if limiter is None:
+        return ZillowQuotaResponse(limited=False)
+    return ZillowQuotaResponse(limited=True, **limiter.remaining())
@@ -1,6 +1,14 @@
 import os
 from functools import lru_cache
-from typing import Optional
+from typing import Any, List, Optional, Tuple
+
+
+def _float_tuple(value: str, size: int) -> Any:
+    """Parse a comma-separated list of ``size`` floats (e.g. scoring weights)."""
+    parts = tuple(float(v) for v in value.split(","))
+    if len(parts) != size:
+        raise ValueError(f"Expected {size} comma-separated numbers, got {value!r}")
+    return parts
 
 
 class Settings:
@@ -19,6 +27,15 @@ class Settings:
         self.zillow_api_key: Optional[str] = os.getenv("ZILLOW_API_KEY", "0fcca2d0d1msh20ec06b3bdf039ep17390cjsn1197d3541dc3")
         self.zillow_api_base: str = os.getenv("ZILLOW_API_BASE", "https://zllw-working-api.p.rapidapi.com")
         self.zillow_rapidapi_host: str = os.getenv("ZILLOW_RAPIDAPI_HOST", "zllw-working-api.p.rapidapi.com")
+        # Discovery fetches up to this many search pages concurrently (1 = one page at a time)
+        self.zillow_page_concurrency: int = int(os.getenv("ZILLOW_PAGE_CONCURRENCY", "3"))
+        self.zillow_max_pages: int = int(os.getenv("ZILLOW_MAX_PAGES", "5"))
+        # Area tiling: requests larger than one search can return are split into polygon cells over the
+        # geocoded viewport; cells that hit the page cap are split again up to the max depth
+        self.zillow_area_tiling: bool = os.getenv("ZILLOW_AREA_TILING", "true").lower() in ("1", "true", "yes")
+        self.zillow_area_grid: int = int(os.getenv("ZILLOW_AREA_GRID", "2"))
+        self.zillow_area_max_depth: int = int(os.getenv("ZILLOW_AREA_MAX_DEPTH", "2"))
+        self.zillow_area_concurrency: int = int(os.getenv("ZILLOW_AREA_CONCURRENCY", "4"))
         # Map image defaults
         self.mapbox_style: str = os.getenv("MAPBOX_STYLE", "mapbox/satellite-v9")
         self.mapbox_zoom: int = int(os.getenv("MAPBOX_ZOOM", "20"))
@@ -26,6 +43,29 @@ class Settings:
         self.mapbox_country_filter: str = os.getenv("MAPBOX_COUNTRY", "US")
         # Optional marker for static images (e.g., "pin-s+ff0000" for small red pin; set to empty string to disable)
         self.mapbox_marker: str = os.getenv("MAPBOX_MARKER", "pin-s+ff0000")
+        # Imagery mode: "static" (one Static Maps request per property) or "tiles" (cached XYZ tiles, cropped locally)
+        self.imagery_mode: str = os.getenv("IMAGERY_MODE", "static")
+        self.tile_cache_max_tiles: int = int(os.getenv("TILE_CACHE_MAX_TILES", "20000"))
+        # Imagery providers in preference order; requests go to the healthiest one and fail over to the rest.
+        # Mapbox is skipped when MAPBOX_ACCESS_TOKEN is not set.
+        self.imagery_providers: List[str] = [
+            p.strip() for p in os.getenv("IMAGERY_PROVIDERS", "google,mapbox").split(",") if p.strip()
+        ]
+        self.imagery_provider_max_failures: int = int(os.getenv("IMAGERY_PROVIDER_MAX_FAILURES", "3"))
+        self.imagery_provider_cooldown_seconds: float = float(os.getenv("IMAGERY_PROVIDER_COOLDOWN_SECONDS", "60"))
+        # Every Nth provider ranking puts the least recently measured provider first so latencies stay comparable (0 disables)
+        self.imagery_provider_probe_every: int = int(os.getenv("IMAGERY_PROVIDER_PROBE_EVERY", "20"))
+        # Properties whose coordinates fall in the same grid cell share one image and one classification.
+        # The cell edge is this fraction of the image size, in pixels at the imagery zoom (0 disables).
+        self.imagery_dedupe_cell_fraction: float = float(os.getenv("IMAGERY_DEDUPE_CELL_FRACTION", "0.05"))
+        # Area sampling for /generate-lead: "spiral" (distinct, non-overlapping windows around the center)
+        # or "center" (the legacy single centered image)
+        self.imagery_sampling: str = os.getenv("IMAGERY_SAMPLING", "spiral")
+        # Imagery prefetch stage: downloads run ahead of classification over a pooled HTTP/2 client
+        self.imagery_prefetch_lookahead: int = int(os.getenv("IMAGERY_PREFETCH_LOOKAHEAD", "8"))
+        self.imagery_prefetch_max_bytes: int = int(os.getenv("IMAGERY_PREFETCH_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.imagery_http2: bool = os.getenv("IMAGERY_HTTP2", "true").lower() in ("1", "true", "yes")
+        self.imagery_max_connections: int = int(os.getenv("IMAGERY_MAX_CONNECTIONS", "16"))
         # Vision API configuration (using Gemini by default)
         # Use gemini-2.5-flash as default (latest stable, fast and cheap)
         # Will auto-fallback to best available model if not found
@@ -35,6 +75,66 @@ class Settings:
         # Vision caching to avoid duplicate OpenAI calls for the same image
         self.vision_cache_enabled: bool = os.getenv("VISION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
         self.vision_cache_ttl_seconds: int = int(os.getenv("VISION_CACHE_TTL_SECONDS", "3600"))
+        # Gemini context caching of the static classification instructions ("gemini" or "local" stand-in)
+        self.vision_prompt_cache_enabled: bool = os.getenv("VISION_PROMPT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.vision_prompt_cache_backend: str = os.getenv("VISION_PROMPT_CACHE_BACKEND", "gemini")
+        self.vision_prompt_cache_ttl_seconds: int = int(os.getenv("VISION_PROMPT_CACHE_TTL_SECONDS", "3600"))
+        # Smallest instruction (tokens) worth uploading; 0 uses the model's documented minimum
+        self.vision_prompt_cache_min_tokens: int = int(os.getenv("VISION_PROMPT_CACHE_MIN_TOKENS", "0"))
+        # Local cache directory shared by the durable caches (vision results, batch files, ...)
+        self.cache_dir: str = os.getenv("CACHE_DIR", os.path.join(".cache", "solar_ai"))
+        self.vision_cache_path: str = os.getenv("VISION_CACHE_PATH", os.path.join(self.cache_dir, "vision.sqlite3"))
+        # Durable Zillow cache: search pages (zpid lists) and the shared zpid -> property records
+        self.zillow_cache_enabled: bool = os.getenv("ZILLOW_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.zillow_cache_path: str = os.getenv("ZILLOW_CACHE_PATH", os.path.join(self.cache_dir, "zillow.sqlite3"))
+        self.zillow_search_cache_ttl_seconds: int = int(os.getenv("ZILLOW_SEARCH_CACHE_TTL_SECONDS", str(24 * 3600)))
+        self.zillow_property_cache_ttl_seconds: int = int(os.getenv("ZILLOW_PROPERTY_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+        # Zillow rate limits shared by all workers (RapidAPI plan); 0 disables a limit
+        self.zillow_rate_limit_per_second: float = float(os.getenv("ZILLOW_RATE_LIMIT_PER_SECOND", "2"))
+        self.zillow_monthly_quota: int = int(os.getenv("ZILLOW_MONTHLY_QUOTA", "0"))
+        self.zillow_rate_limit_max_wait_seconds: float = float(os.getenv("ZILLOW_RATE_LIMIT_MAX_WAIT_SECONDS", "10"))
+        self.zillow_rate_limit_max_backoff_seconds: float = float(os.getenv("ZILLOW_RATE_LIMIT_MAX_BACKOFF_SECONDS", "60"))
+        self.rate_limit_path: str = os.getenv("RATE_LIMIT_PATH", os.path.join(self.cache_dir, "ratelimit.sqlite3"))
+        # Content-addressed image store backing re-runs, exports and the local /imagery endpoint
+        self.image_store_enabled: bool = os.getenv("IMAGE_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.image_store_dir: str = os.getenv("IMAGE_STORE_DIR", os.path.join(self.cache_dir, "images"))
+        self.image_store_max_bytes: int = int(os.getenv("IMAGE_STORE_MAX_BYTES", str(2 * 1024 ** 3)))
+        self.tile_cache_dir: str = os.getenv("TILE_CACHE_DIR", os.path.join(self.cache_dir, "tiles"))
+        # Geocoding cache: customers keep typing the same cities and ZIPs; misses (ZERO_RESULTS) expire sooner
+        self.geocode_cache_enabled: bool = os.getenv("GEOCODE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.geocode_cache_path: str = os.getenv("GEOCODE_CACHE_PATH", os.path.join(self.cache_dir, "geocode.sqlite3"))
+        self.geocode_cache_ttl_seconds: int = int(os.getenv("GEOCODE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+        self.geocode_negative_ttl_seconds: int = int(os.getenv("GEOCODE_NEGATIVE_TTL_SECONDS", "3600"))
+        # Export artifacts referenced from /leads responses and served by /exports/{id}
+        self.export_store_enabled: bool = os.getenv("EXPORT_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.export_store_dir: str = os.getenv("EXPORT_STORE_DIR", os.path.join(self.cache_dir, "exports"))
+        self.export_store_max_bytes: int = int(os.getenv("EXPORT_STORE_MAX_BYTES", str(512 * 1024 ** 2)))
+        self.export_ttl_seconds: int = int(os.getenv("EXPORT_TTL_SECONDS", str(7 * 24 * 3600)))
+        # Also embed the export as base64 in /leads JSON (legacy clients)
+        self.leads_inline_exports: bool = os.getenv("LEADS_INLINE_EXPORTS", "false").lower() in ("1", "true", "yes")
+        # Shared secret (X-Admin-Token header) for admin-only features such as ?profile= on /leads; unset disables them
+        self.admin_token: Optional[str] = os.getenv("ADMIN_TOKEN") or None
+        # Prometheus metrics at /metrics (needs prometheus_client)
+        self.metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+        # Spatial index of every classified property, serving /leads/nearby without upstream calls
+        self.lead_index_enabled: bool = os.getenv("LEAD_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.lead_index_path: str = os.getenv("LEAD_INDEX_PATH", os.path.join(self.cache_dir, "leads.sqlite3"))
+        # Offline bulk classification: "gemini" (Batch API) or "local" (file-based stand-in)
+        self.vision_batch_backend: str = os.getenv("VISION_BATCH_BACKEND", "gemini")
+        self.vision_batch_dir: str = os.getenv("VISION_BATCH_DIR", os.path.join(self.cache_dir, "batches"))
+        self.vision_batch_poll_seconds: float = float(os.getenv("VISION_BATCH_POLL_SECONDS", "30"))
+        self.vision_batch_timeout_seconds: float = float(os.getenv("VISION_BATCH_TIMEOUT_SECONDS", "86400"))
+        # Batch results are meant to be reused by later interactive runs, so they outlive the regular TTL
+        self.vision_batch_cache_ttl_seconds: int = int(os.getenv("VISION_BATCH_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+        # Lead scoring: normalization ranges and weights (price, lot size, living area; fallback without lot size)
+        self.lead_score_price_cap: float = float(os.getenv("LEAD_SCORE_PRICE_CAP", "2000000"))
+        self.lead_score_living_area_cap: float = float(os.getenv("LEAD_SCORE_LIVING_AREA_CAP", "4000"))
+        self.lead_score_lot_min: float = float(os.getenv("LEAD_SCORE_LOT_MIN", "3000"))
+        self.lead_score_lot_max: float = float(os.getenv("LEAD_SCORE_LOT_MAX", "15000"))
+        self.lead_score_weights: Tuple[float, float, float] = _float_tuple(os.getenv("LEAD_SCORE_WEIGHTS", "0.4,0.4,0.2"), 3)
+        self.lead_score_fallback_weights: Tuple[float, float] = _float_tuple(os.getenv("LEAD_SCORE_FALLBACK_WEIGHTS", "0.6,0.4"), 2)
+        # Classify the highest-scoring properties first, so early exit keeps the best candidates
+        self.leads_score_first: bool = os.getenv("LEADS_SCORE_FIRST", "true").lower() in ("1", "true", "yes")
         # Endpoint defaults
         self.leads_max_properties: int = int(os.getenv("LEADS_MAX_PROPERTIES", "50"))  # Increased to ensure enough properties for filtering
 
@@ -1,10 +1,15 @@
 import logging
 import os
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from .api.routes import router as api_router
 from .utils.env_loader import load_env_file
+from .utils.metrics import init_metrics, render_metrics
 
 # Configure logging
 logging.basicConfig(
@@ -12,10 +17,20 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 
-# Load environment variables from .env file
-load_env_file()
+# Load environment variables from .env file (on Vercel they come from the project settings,
+# so skip the directory walk on every cold start)
+if not os.getenv("VERCEL"):
+    load_env_file()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Metric objects exist before any request or worker thread records into them
+    init_metrics()
+    yield
 
-app = FastAPI(title="BackyardLeadAI Backend", version="0.1.0", description="Backend API for generating landscaping leads by detecting undeveloped backyards")
+
+app = FastAPI(lifespan=lifespan, title="BackyardLeadAI Backend", version="0.1.0", description="Backend API for generating landscaping leads by detecting undeveloped backyards")
 
 # Add CORS middleware for frontend integration
 # Note: For production, you may want to use a regex pattern or environment variable for origins
@@ -39,5 +54,15 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    """Prometheus scrape endpoint: per-stage latency, cache, upstream error and lead counters."""
+    try:
+        body, content_type = render_metrics()
+    except ValueError as exc:
+        raise HTTPException(status_code=501, detail=str(exc))
+    return Response(content=body, media_type=content_type)
+
+
 app.include_router(api_router, prefix="/api/v1")
 
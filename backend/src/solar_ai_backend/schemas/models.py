@@ -1,4 +1,4 @@
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, get_args
 
 from pydantic import BaseModel, Field, field_validator
 
@@ -125,12 +125,60 @@ class VisionParams(BaseModel):
     confidence_threshold: float = Field(default=0.6, ge=0.0, le=1.0)
 
 
+# Lead fields kept in compact mode: what a list view shows
+COMPACT_LEAD_FIELDS = ["address", "coordinates", "lead_score", "zillow.zpid", "vision.backyard_status"]
+
+
+def lead_projection(fields: List[str]) -> Dict[str, Any]:
+    """Turn dotted ``LeadItem`` paths into a Pydantic ``include`` tree.
+
+    ``["address", "vision.backyard_status"]`` -> ``{"address": True, "vision": {"backyard_status": True}}``.
+    Raises ValueError for a path that is not a ``LeadItem`` field.
+    """
+    tree: Dict[str, Any] = {}
+    for path in fields:
+        model: Any = LeadItem
+        node = tree
+        parts = path.split(".")
+        for depth, part in enumerate(parts):
+            if model is None or part not in model.model_fields:
+                raise ValueError(f"Unknown lead field: {path}")
+            annotation = model.model_fields[part].annotation
+            candidates = [a for a in (annotation, *get_args(annotation)) if isinstance(a, type) and issubclass(a, BaseModel)]
+            model = candidates[0] if candidates else None
+            if depth == len(parts) - 1 or node.get(part) is True:
+                node[part] = True
+                break
+            node = node.setdefault(part, {})
+    return tree
+
+
 class LeadsEndpointRequest(BaseModel):
     location: str = Field(..., min_length=2)
     max_properties: int = Field(default=20, ge=1, le=200)
     zillow_filters: Optional[ZillowFilters] = None
     imagery: Optional[ImageryParams] = None
     vision: Optional[VisionParams] = None
+    fields: Optional[List[str]] = Field(
+        default=None,
+        description="Lead fields to return, as dotted paths (e.g. address, lead_score, vision.backyard_status); default all",
+    )
+    compact: bool = Field(
+        default=False,
+        description="List-view mode: only address, coordinates, score, zpid and backyard status (unless fields is set), nulls omitted",
+    )
+
+    @field_validator("fields")
+    @classmethod
+    def _fields_must_exist(cls, v: Optional[List[str]]) -> Optional[List[str]]:
+        if v is not None:
+            lead_projection(v)
+        return v
+
+    def lead_include(self) -> Optional[Dict[str, Any]]:
+        """Include tree for the requested lead fields; None returns everything."""
+        fields = self.fields or (COMPACT_LEAD_FIELDS if self.compact else None)
+        return lead_projection(fields) if fields else None
 
 
 class Coordinates(BaseModel):
@@ -151,6 +199,8 @@ class ImageryMeta(BaseModel):
     image_url: str
     zoom: int
     size: ImageSize
+    provider: Optional[str] = Field(default=None, description="Imagery source that rendered the image: google_static | google_tiles | mapbox_static")
+    local_url: Optional[str] = Field(default=None, description="Same image served from the local image store (/api/v1/imagery/{digest})")
 
 
 class VisionMeta(BaseModel):
@@ -169,15 +219,87 @@ class LeadItem(BaseModel):
     lead_score: float = Field(ge=0.0, le=1.0)
 
 
+class ExportRef(BaseModel):
+    id: str = Field(..., description="SHA-256 of the file; also its ETag")
+    url: str = Field(..., description="Download URL (/api/v1/exports/{id})")
+    filename: str
+    content_type: str
+    size: int = Field(..., ge=0, description="Bytes")
+    sha256: str
+
+
 class LeadsEndpointResponse(BaseModel):
     location: str
     count: int = Field(..., ge=0)
     leads: List[LeadItem]
+    exports: Dict[str, ExportRef] = Field(
+        default_factory=dict,
+        description="Stored export files by format (csv, or excel if CSV generation failed)",
+    )
     excel: Optional[Dict[str, str]] = Field(
         default=None,
-        description="Optional Excel attachment with keys: filename, base64",
+        description="Optional Excel attachment with keys: filename, base64 (only with LEADS_INLINE_EXPORTS or without an export store)",
     )
     csv: Optional[Dict[str, str]] = Field(
         default=None,
-        description="Optional CSV attachment with keys: filename, base64",
+        description="Optional CSV attachment with keys: filename, base64 (only with LEADS_INLINE_EXPORTS or without an export store)",
+    )
+    dedupe_saved_calls: int = Field(
+        default=0,
+        ge=0,
+        description="Properties that shared another property's imagery fetch and vision call (same dedupe grid cell)",
+    )
+    profile: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Timing trace of the run (admin-only ?profile=trace|cpu): stage totals, per-property timings, CPU hot spots",
     )
+
+
+# ======================
+# Offline bulk classification (`/api/v1/vision/batch`)
+# ======================
+
+
+class VisionBatchRequest(LeadsEndpointRequest):
+    max_properties: int = Field(default=200, ge=1, le=10000)
+
+
+class VisionBatchResponse(BaseModel):
+    job_id: Optional[str] = Field(default=None, description="Batch job id to poll")
+    state: str = Field(..., description="preparing | pending | running | succeeded | failed")
+    submitted: int = Field(default=0, ge=0)
+    skipped_cached: int = Field(default=0, ge=0)
+    ingested: Optional[int] = Field(default=None, ge=0, description="Results written to the vision cache once the job succeeded")
+    error: Optional[str] = Field(default=None, description="Why the job failed before it was submitted")
+
+
+# ======================
+# Indexed nearby leads (`/api/v1/leads/nearby`)
+# ======================
+
+
+class NearbyLead(LeadItem):
+    classified_at: float = Field(..., description="When the property was classified (Unix epoch seconds)")
+    distance_m: Optional[float] = Field(default=None, description="Distance from the query point (radius queries only)")
+
+
+class LeadsNearbyResponse(BaseModel):
+    count: int = Field(..., ge=0)
+    leads: List[NearbyLead]
+
+
+# ======================
+# Zillow quota (`/api/v1/zillow/quota`)
+# ======================
+
+
+class ZillowQuotaResponse(BaseModel):
+    limited: bool = Field(..., description="False when no Zillow rate limit or quota is configured")
+    name: Optional[str] = None
+    per_second: Optional[float] = None
+    available_now: Optional[int] = Field(default=None, description="Requests that can be made right now without waiting")
+    backoff_seconds: Optional[float] = Field(default=None, description="Time left on the back-off after an upstream 429")
+    month: Optional[str] = Field(default=None, description="Quota month (UTC), YYYY-MM")
+    monthly_quota: Optional[int] = None
+    monthly_used: Optional[int] = None
+    monthly_remaining: Optional[int] = None
@@ -1,18 +1,233 @@
-from typing import Any, Dict, List, Optional
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 
+import hashlib
+import json
 import logging
-import httpx
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from ..config import get_settings
+from ..utils.lazy_import import is_available, lazy_import
+from ..utils.metrics import observe_stage, record_cache, record_error
+from ..utils.rate_limiter import RateLimitExceeded, SqliteRateLimiter, parse_retry_after
+from ..utils.sqlite_cache import SqliteCache
+
+if TYPE_CHECKING:
+    import httpx
+else:
+    # Loaded on first use to keep app import cheap
+    httpx = lazy_import("httpx")
+np = lazy_import("numpy")
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True)
+class PropertyRecord:
+    """Normalized Zillow listing, holding only the fields the lead pipeline reads.
+
+    Supports ``record.get("lat")`` / ``record["lat"]`` so code written against
+    the former property dicts keeps working.
+    """
+
+    address: str
+    lat: Optional[float]
+    lng: Optional[float]
+    zpid: Optional[str] = None
+    price: Optional[float] = None
+    beds: Optional[float] = None
+    baths: Optional[float] = None
+    livingArea: Optional[float] = None
+    lotSize: Optional[float] = None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in _RECORD_FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PropertyRecord":
+        values: Dict[str, Any] = {name: data.get(name) for name in _RECORD_FIELDS}
+        return cls(**values)
+
+
+_RECORD_FIELDS = tuple(f.name for f in fields(PropertyRecord))
+
+
+def decode_json(content: bytes) -> Any:
+    """Decode a JSON body with orjson when available, else the standard library."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _normalize_property(item: Dict[str, Any]) -> Optional[PropertyRecord]:
+    """Build a record from one ``searchResults`` property; None when it has no coordinates."""
+    location = item.get("location")
+    if not location:
+        return None
+    lat = location.get("latitude")
+    lng = location.get("longitude")
+    if lat is None or lng is None:
+        return None
+
+    address = item.get("address")
+    if isinstance(address, dict):
+        parts = [v for v in (address.get("city"), address.get("state"), address.get("zipcode")) if v]
+        street = address.get("streetAddress")
+        if street and parts:
+            address = f"{street} {', '.join(parts)}"
+        else:
+            address = street or ", ".join(parts)
+    elif address is None:
+        address = ""
+
+    listing = item.get("listing")
+    price = (listing.get("price") or {}).get("value") if listing else None
+    lot = item.get("lotSizeWithUnit")
+    zpid = item.get("zpid")
+    return PropertyRecord(
+        address=address,
+        lat=lat,
+        lng=lng,
+        zpid=str(zpid) if zpid else None,
+        price=price or item.get("price"),
+        beds=item.get("bedrooms"),
+        baths=item.get("bathrooms"),
+        livingArea=item.get("livingArea"),
+        lotSize=(lot.get("lotSize") if lot else None) or item.get("lotSize"),
+    )
+
+
+def parse_search_page(content: bytes) -> List[PropertyRecord]:
+    """Decode a ``/search/byaddress`` response body into records with coordinates."""
+    data = decode_json(content) if content else None
+    search_results = (data or {}).get("searchResults") or {}
+    if isinstance(search_results, dict):
+        # searchResults is an object with numeric keys like "0", "1", etc.
+        items = [r["property"] for r in search_results.values() if isinstance(r, dict) and "property" in r]
+    elif isinstance(search_results, list):
+        items = search_results
+    else:
+        items = []
+    records = []
+    for item in items:
+        record = _normalize_property(item)
+        if record is not None:
+            records.append(record)
+    return records
+
+
+class ZillowCache:
+    """Durable two-level cache for Zillow search results.
+
+    Searches are stored as the list of zpids they returned, keyed by the
+    canonical query parameters (page included); the normalized property
+    records live in a separate zpid-keyed store, so overlapping searches share
+    one copy of each record. A search hit whose records have expired counts
+    as a miss.
+    """
+
+    def __init__(self, path: str, *, search_ttl_seconds: float, property_ttl_seconds: float) -> None:
+        self.searches = SqliteCache(path, namespace="zillow_search")
+        self.properties = SqliteCache(path, namespace="zillow_property")
+        self.search_ttl_seconds = search_ttl_seconds
+        self.property_ttl_seconds = property_ttl_seconds
+
+    @staticmethod
+    def search_key(endpoint: str, params: Dict[str, Any]) -> str:
+        canonical = json.dumps({"endpoint": endpoint, "params": {k: str(v) for k, v in params.items()}}, sort_keys=True)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get_search(self, key: str) -> Optional[List["PropertyRecord"]]:
+        entries = self.searches.get(key)
+        if entries is None:
+            return None
+        records: List[PropertyRecord] = []
+        for entry in entries:
+            # Records without a zpid can't be shared and are stored inline
+            record = entry if isinstance(entry, dict) else self.properties.get(entry)
+            if record is None:
+                return None
+            records.append(PropertyRecord.from_dict(record))
+        return records
+
+    def put_search(self, key: str, records: List[Dict[str, Any]]) -> None:
+        entries: List[Any] = []
+        for record in records:
+            zpid = record.get("zpid")
+            if zpid is None:
+                entries.append(record)
+                continue
+            self.properties.set(zpid, record, ttl_seconds=self.property_ttl_seconds)
+            entries.append(zpid)
+        self.searches.set(key, entries, ttl_seconds=self.search_ttl_seconds)
+
+
+@lru_cache(maxsize=1)
+def get_zillow_cache() -> Optional[ZillowCache]:
+    """Process-wide Zillow cache, or None when disabled."""
+    settings = get_settings()
+    if not settings.zillow_cache_enabled:
+        return None
+    return ZillowCache(
+        settings.zillow_cache_path,
+        search_ttl_seconds=settings.zillow_search_cache_ttl_seconds,
+        property_ttl_seconds=settings.zillow_property_cache_ttl_seconds,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_zillow_rate_limiter() -> Optional[SqliteRateLimiter]:
+    """Rate limiter shared by every Zillow client in every worker, or None when no limit is set."""
+    settings = get_settings()
+    if settings.zillow_rate_limit_per_second <= 0 and not settings.zillow_monthly_quota:
+        return None
+    return SqliteRateLimiter(
+        settings.rate_limit_path,
+        name="zillow",
+        per_second=settings.zillow_rate_limit_per_second,
+        monthly_quota=settings.zillow_monthly_quota,
+        max_wait_seconds=settings.zillow_rate_limit_max_wait_seconds,
+        max_backoff_seconds=settings.zillow_rate_limit_max_backoff_seconds,
+    )
+
+
 class ZillowClient:
     """Zillow property discovery client, adapted for RapidAPI."""
 
-    def __init__(self, *, api_key: str, base_url: str, rapidapi_host: str = "zllw-working-api.p.rapidapi.com", timeout_seconds: float = 15.0) -> None:
+    # Area search endpoints, used when filters carry ``polygon`` / ``coordinates``
+    polygon_path = "/search/bypolygon"
+    coordinates_path = "/search/bycoordinates"
+
+    def __init__(
+        self,
+        *,
+        api_key: str,
+        base_url: str,
+        rapidapi_host: str = "zllw-working-api.p.rapidapi.com",
+        timeout_seconds: float = 15.0,
+        cache: Optional[ZillowCache] = None,
+        rate_limiter: Optional[SqliteRateLimiter] = None,
+    ) -> None:
         self.api_key = api_key
         self.base_url = base_url.rstrip("/")
         self.rapidapi_host = rapidapi_host
+        self.cache = cache
+        self.rate_limiter = rate_limiter
         self._http = httpx.Client(timeout=timeout_seconds)
 
     def close(self) -> None:
@@ -21,6 +236,36 @@ class ZillowClient:
         except Exception:
             logger.debug("Failed to close http client", exc_info=True)
 
+    def _rate_limited_get(self, url: str, *, params: Dict[str, Any], headers: Dict[str, str]) -> "httpx.Response":
+        """GET through the shared rate limiter, backing off and retrying once after a 429.
+
+        The retry waits out the upstream's Retry-After (or the limiter's
+        exponential back-off). RateLimitExceeded is raised when that is longer
+        than the limiter's maximum wait.
+        """
+        for attempt in range(2):
+            if self.rate_limiter is not None:
+                try:
+                    self.rate_limiter.acquire()
+                except RateLimitExceeded:
+                    record_error("zillow", "rate_limited")
+                    raise
+            with observe_stage("zillow_page"):
+                resp = self._http.get(url, params=params, headers=headers)
+            if resp.status_code >= 400:
+                record_error("zillow", f"http_{resp.status_code}")
+            if self.rate_limiter is None:
+                return resp
+            # RapidAPI reports the plan's remaining requests; trust it over our own count
+            remaining = resp.headers.get("x-ratelimit-requests-remaining", "")
+            if remaining.isdigit():
+                self.rate_limiter.sync_remaining(int(remaining))
+            if resp.status_code != 429 or attempt:
+                return resp
+            delay = self.rate_limiter.penalize(parse_retry_after(resp.headers.get("retry-after")))
+            logger.warning("RapidAPI returned 429; backing off %.1fs before retrying", delay)
+        return resp
+
     def search_properties(
         self,
         *,
@@ -28,11 +273,12 @@ class ZillowClient:
         max_properties: int,
         filters: Optional[Dict[str, Any]] = None,
         page: int = 1,
-    ) -> List[Dict[str, Any]]:
-        """Return a list of property dicts with at least: address, lat, lng, zpid, price, beds, baths, livingArea."""
+    ) -> List["PropertyRecord"]:
+        """Return property records (address, lat, lng, zpid, price, beds, baths, livingArea, lotSize)."""
         if not self.api_key:
             raise ValueError("ZILLOW_API_KEY not configured")
-        if not location:
+        area = {k: filters[k] for k in ("polygon", "coordinates") if filters and filters.get(k)}
+        if not location and not area:
             return []
 
         # Build query params based on new RapidAPI Zillow API
@@ -134,18 +380,38 @@ class ZillowClient:
                 # Note: This endpoint might not support keywords, but we'll include it for compatibility
                 params["keywords"] = filters["keywords"]
 
+        # A polygon or a 'lon lat,diameter' circle replaces the free-text location
+        path = "/search/byaddress"
+        if "polygon" in area:
+            path = self.polygon_path
+        elif "coordinates" in area:
+            path = self.coordinates_path
+        if area:
+            params.pop("location")
+            params.update(area)
+        url = f"{self.base_url}{path}"
+
+        cache = self.cache
+        cache_key = ZillowCache.search_key(url, params) if cache is not None else ""
+        if cache is not None:
+            cached = cache.get_search(cache_key)
+            record_cache("zillow_search", cached is not None)
+            if cached is not None:
+                logger.info("Zillow search cache hit for %s page %s (%d properties)", location, page, len(cached))
+                return cached[:max_properties] if max_properties and max_properties > 0 else cached
+
         headers = {
             "x-rapidapi-host": self.rapidapi_host,
             "x-rapidapi-key": self.api_key,
         }
 
         # Expanded logging for debugging and comparison with Postman
-        logger.info(f"Making RapidAPI request to: {f'{self.base_url}/search/byaddress'}")
+        logger.info(f"Making RapidAPI request to: {url}")
         logger.info(f"Query params: {params}")
         logger.info(f"Headers: {headers}")
 
         try:
-            resp = self._http.get(f"{self.base_url}/search/byaddress", params=params, headers=headers)
+            resp = self._rate_limited_get(url, params=params, headers=headers)
 
             # Log response details for debugging
             logger.info(f"Response status: {resp.status_code}")
@@ -155,92 +421,305 @@ class ZillowClient:
                 logger.error("RapidAPI authentication failed: %s", resp.text)
                 raise ValueError("RapidAPI access denied: check ZILLOW_API_KEY and host")
             resp.raise_for_status()
-            data = resp.json() or {}
+            content = resp.content
         except httpx.HTTPError as exc:
+            if not isinstance(exc, httpx.HTTPStatusError):
+                record_error("zillow", exc)
             logger.error("RapidAPI HTTP error: %s", exc)
             logger.error(f"Request details: URL={resp.request.url if 'resp' in locals() else 'N/A'}, Headers={headers}")
             raise ValueError(f"RapidAPI request failed: {exc}") from exc
 
-        # Parse RapidAPI response (assumes a structure like {"results": [...]})
-        # Adjust this based on actual RapidAPI response format (e.g., it might be {"props": [...]})
-        # Parse new RapidAPI response structure with searchResults
-        search_results = data.get("searchResults") or {}
-        results = []
-        if isinstance(search_results, dict):
-            # searchResults is an object with numeric keys like "0", "1", etc.
-            for key, result in search_results.items():
-                if isinstance(result, dict) and "property" in result:
-                    results.append(result["property"])
-        elif isinstance(search_results, list):
-            # Fallback in case it's an array
-            results = search_results
-        norm: List[Dict[str, Any]] = []
-        for item in results:
-            # Normalize fields based on new API structure
-            # Extract location data
-            location_data = item.get("location", {})
-            address_data = item.get("address", {})
-
-            # Extract listing data
-            listing_data = item.get("listing", {})
-
-            # Build address string
-            address_parts = []
-            if address_data.get("streetAddress"):
-                address_parts.append(address_data["streetAddress"])
-            city_state_zip = []
-            if address_data.get("city"):
-                city_state_zip.append(address_data["city"])
-            if address_data.get("state"):
-                city_state_zip.append(address_data["state"])
-            if address_data.get("zipcode"):
-                city_state_zip.append(address_data["zipcode"])
-            if city_state_zip:
-                address_parts.append(", ".join(city_state_zip))
-
-            norm.append(
-                {
-                    "address": " ".join(address_parts) if address_parts else item.get("address", ""),
-                    "lat": location_data.get("latitude"),
-                    "lng": location_data.get("longitude"),
-                    "zpid": str(item.get("zpid")) if item.get("zpid") else None,
-                    "price": listing_data.get("price", {}).get("value") or item.get("price"),
-                    "beds": item.get("bedrooms"),
-                    "baths": item.get("bathrooms"),
-                    "livingArea": item.get("livingArea"),
-                    "lotSize": item.get("lotSizeWithUnit", {}).get("lotSize") or item.get("lotSize"),
-                }
-            )
-        filtered = [p for p in norm if p.get("lat") is not None and p.get("lng") is not None]
+        filtered = parse_search_page(content)
+        if cache is not None:
+            cache.put_search(cache_key, [record.to_dict() for record in filtered])
         # Respect max_properties even if the upstream API ignores the "limit" param
         if max_properties and max_properties > 0:
             filtered = filtered[:max_properties]
         return filtered
 
+    def search_pages(
+        self,
+        *,
+        location: str,
+        max_properties: int,
+        filters: Optional[Dict[str, Any]] = None,
+        page_size: int = 50,
+        max_pages: int = 5,
+        concurrency: int = 3,
+    ) -> List["PropertyRecord"]:
+        """Fetch search pages concurrently and return up to ``max_properties`` unique properties.
+
+        Up to ``concurrency`` pages are in flight at once. Pages are merged in
+        page order and deduplicated by zpid. No page after a short (or failed)
+        page is launched or used. A failure on page 1 is raised; later
+        failures keep the pages before them.
+        """
+        return self._search_pages(
+            location=location,
+            max_properties=max_properties,
+            filters=filters,
+            page_size=page_size,
+            max_pages=max_pages,
+            concurrency=concurrency,
+        )[0]
+
+    def _search_pages(
+        self,
+        *,
+        location: str,
+        max_properties: int,
+        filters: Optional[Dict[str, Any]],
+        page_size: int,
+        max_pages: int,
+        concurrency: int,
+    ) -> Tuple[List["PropertyRecord"], bool]:
+        """``search_pages`` plus whether the search hit the page cap (every page up to ``max_pages`` came back full)."""
+        page_size = max(1, min(page_size, max_properties))
+        pages: Dict[int, List[PropertyRecord]] = {}
+        last_page = max_pages
+        next_page = 1
+        pending: Dict["Future[List[PropertyRecord]]", int] = {}
+        pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="zillow-pages")
+        try:
+            while True:
+                while (
+                    len(pending) < max(1, concurrency)
+                    and next_page <= last_page
+                    # In-flight pages count as full, so we don't launch pages we won't need
+                    and len(_merge_pages(pages, last_page)) + len(pending) * page_size < max_properties
+                ):
+                    fut = pool.submit(
+                        self.search_properties,
+                        location=location,
+                        max_properties=page_size,
+                        filters=filters,
+                        page=next_page,
+                    )
+                    pending[fut] = next_page
+                    next_page += 1
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    page = pending.pop(fut)
+                    try:
+                        batch = fut.result()
+                    except ValueError as exc:
+                        if page == 1:
+                            raise
+                        logger.error("Zillow search failed on page %d, keeping earlier pages: %s", page, exc)
+                        last_page = min(last_page, page - 1)
+                        continue
+                    pages[page] = batch
+                    logger.info("Fetched %d properties from page %d", len(batch), page)
+                    if len(batch) < page_size:
+                        # Results ran out here; later pages would be empty or repeats
+                        last_page = min(last_page, page)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        merged = _merge_pages(pages, last_page)
+        fetched = sum(len(pages[p]) for p in pages if p <= last_page)
+        if fetched > len(merged):
+            logger.info("Dropped %d duplicate zpids across %d pages", fetched - len(merged), len(pages))
+        hit_cap = last_page == max_pages and len(pages.get(max_pages, [])) >= page_size
+        return merged[:max_properties], hit_cap
+
+    def search_area(
+        self,
+        *,
+        bounds: Tuple[float, float, float, float],
+        max_properties: int,
+        filters: Optional[Dict[str, Any]] = None,
+        page_size: int = 50,
+        max_pages: int = 5,
+        concurrency: int = 3,
+        cell_concurrency: int = 4,
+        grid: int = 2,
+        max_depth: int = 2,
+    ) -> List["PropertyRecord"]:
+        """Search an area ``(west, south, east, north)`` as a grid of polygon cells queried in parallel.
+
+        One search stops at ``max_pages`` pages, so cells whose search hit
+        that cap are split in four and searched again, up to ``max_depth``
+        times; discovery then grows with the area. Results are merged in cell
+        order and deduplicated by zpid. Failed cells are skipped unless every
+        cell failed.
+        """
+        cells = _split_bounds(bounds, grid)
+        cell_cap = page_size * max_pages
+        merged: List[PropertyRecord] = []
+        seen: set[str] = set()
+        searched = failed = 0
+        last_error: Optional[ValueError] = None
+
+        def search_cell(cell: Tuple[float, float, float, float]) -> Tuple[List[PropertyRecord], bool]:
+            return self._search_pages(
+                location="",
+                max_properties=cell_cap,
+                filters={**(filters or {}), "polygon": _bounds_polygon(cell)},
+                page_size=page_size,
+                max_pages=max_pages,
+                concurrency=concurrency,
+            )
+
+        with ThreadPoolExecutor(max_workers=max(1, cell_concurrency), thread_name_prefix="zillow-cells") as pool:
+            for depth in range(max_depth + 1):
+                if not cells or len(merged) >= max_properties:
+                    break
+                futures = [pool.submit(search_cell, cell) for cell in cells]
+                refine: List[Tuple[float, float, float, float]] = []
+                for cell, fut in zip(cells, futures):
+                    searched += 1
+                    try:
+                        records, hit_cap = fut.result()
+                    except ValueError as exc:
+                        failed += 1
+                        last_error = exc
+                        logger.error("Zillow area search failed for cell %s: %s", cell, exc)
+                        continue
+                    for record in records:
+                        if record.zpid is not None:
+                            if record.zpid in seen:
+                                continue
+                            seen.add(record.zpid)
+                        merged.append(record)
+                    if hit_cap and depth < max_depth:
+                        refine.extend(_split_bounds(cell, 2))
+                cells = refine
+        if failed == searched and last_error is not None:
+            raise last_error
+        logger.info("Area search: %d cells searched (%d failed), %d unique properties", searched, failed, len(merged))
+        return merged[:max_properties]
+
+
+def _split_bounds(bounds: Tuple[float, float, float, float], n: int) -> List[Tuple[float, float, float, float]]:
+    """Split ``(west, south, east, north)`` into an ``n`` x ``n`` grid, row by row from the north-west."""
+    west, south, east, north = bounds
+    dx, dy = (east - west) / n, (north - south) / n
+    return [
+        (west + i * dx, north - (j + 1) * dy, west + (i + 1) * dx, north - j * dy)
+        for j in range(n)
+        for i in range(n)
+    ]
+
+
+def _bounds_polygon(bounds: Tuple[float, float, float, float]) -> str:
+    """Closed 'lon lat,...' polygon string for a bounding box, as ``ZillowFilters.polygon`` expects."""
+    west, south, east, north = bounds
+    corners = [(west, south), (east, south), (east, north), (west, north), (west, south)]
+    return ",".join(f"{lon:.6f} {lat:.6f}" for lon, lat in corners)
+
+
+def _merge_pages(pages: Dict[int, List["PropertyRecord"]], last_page: int) -> List["PropertyRecord"]:
+    """Concatenate the contiguous run of fetched pages starting at 1, dropping repeated zpids."""
+    merged: List[PropertyRecord] = []
+    seen: set[str] = set()
+    page = 1
+    while page <= last_page and page in pages:
+        for prop in pages[page]:
+            zpid = prop.zpid
+            if zpid is not None:
+                if zpid in seen:
+                    continue
+                seen.add(zpid)
+            merged.append(prop)
+        page += 1
+    return merged
+
 
 class LeadScorer:
-    """Heuristic lead scoring for ranking properties based on landscaping potential."""
+    """Heuristic lead scoring for ranking properties based on landscaping potential.
+
+    Each factor is normalized into [0, 1]: price against ``price_cap``, living
+    area against ``living_area_cap`` and lot size linearly between
+    ``lot_min`` and ``lot_max``. Properties with a lot size are weighted by
+    ``weights`` (price, lot, living area), the rest by ``fallback_weights``
+    (price, living area). Defaults come from settings.
+    """
+
+    def __init__(
+        self,
+        *,
+        price_cap: Optional[float] = None,
+        living_area_cap: Optional[float] = None,
+        lot_min: Optional[float] = None,
+        lot_max: Optional[float] = None,
+        weights: Optional[Tuple[float, float, float]] = None,
+        fallback_weights: Optional[Tuple[float, float]] = None,
+    ) -> None:
+        settings = get_settings()
+        self.price_cap = price_cap if price_cap is not None else settings.lead_score_price_cap
+        self.living_area_cap = living_area_cap if living_area_cap is not None else settings.lead_score_living_area_cap
+        self.lot_min = lot_min if lot_min is not None else settings.lead_score_lot_min
+        self.lot_max = lot_max if lot_max is not None else settings.lead_score_lot_max
+        self.weights = weights or settings.lead_score_weights
+        self.fallback_weights = fallback_weights or settings.lead_score_fallback_weights
 
-    def score(self, *, price: Optional[float], living_area: Optional[int], lot_size: Optional[int] = None) -> float:
+    def score(self, *, price: Optional[float], living_area: Optional[float], lot_size: Optional[float] = None) -> float:
         # Normalize heuristics into [0,1] for landscaping leads
         # Prioritize properties with good price, decent living area, and larger lots
         p = 0.0
         if price is not None:
             # Map price to [0,1] with soft cap (higher value homes = better landscaping potential)
-            p = min(max(price / 2_000_000.0, 0.0), 1.0)
+            p = min(max(price / self.price_cap, 0.0), 1.0)
         a = 0.0
         if living_area is not None:
             # Larger homes often have more landscaping potential
-            a = min(max(living_area / 4000.0, 0.0), 1.0)
-        l = 0.0
+            a = min(max(living_area / self.living_area_cap, 0.0), 1.0)
         if lot_size is not None:
             # Larger lots = more backyard space for landscaping
-            # Normalize assuming typical lot sizes range from 5000-15000 sqft
-            l = min(max((lot_size - 3000) / 12000.0, 0.0), 1.0)
-        
-        # Weight: price 40%, lot size 40%, living area 20% (lot size is key for landscaping)
-        if lot_size is not None:
-            return round(0.4 * p + 0.4 * l + 0.2 * a, 4)
-        else:
-            # Fallback if lot_size not available
-            return round(0.6 * p + 0.4 * a, 4)
+            l = min(max((lot_size - self.lot_min) / (self.lot_max - self.lot_min), 0.0), 1.0)
+            w_price, w_lot, w_area = self.weights
+            return round(w_price * p + w_lot * l + w_area * a, 4)
+        # Fallback if lot_size not available
+        w_price, w_area = self.fallback_weights
+        return round(w_price * p + w_area * a, 4)
+
+    def score_batch(
+        self,
+        prices: Sequence[Optional[float]],
+        living_areas: Sequence[Optional[float]],
+        lot_sizes: Sequence[Optional[float]],
+    ) -> Sequence[float]:
+        """Score many properties at once from columnar inputs; ``None``/NaN marks a missing value.
+
+        Returns a NumPy array (a list when NumPy is not installed) with the
+        same values as ``score``, up to the last rounded digit.
+        """
+        if not is_available(np):
+            return [
+                self.score(price=p, living_area=a, lot_size=l)
+                for p, a, l in zip(prices, living_areas, lot_sizes)
+            ]
+        price = np.asarray(prices, dtype=float)
+        area = np.asarray(living_areas, dtype=float)
+        lot = np.asarray(lot_sizes, dtype=float)
+
+        p = np.nan_to_num(np.clip(price / self.price_cap, 0.0, 1.0), nan=0.0)
+        a = np.nan_to_num(np.clip(area / self.living_area_cap, 0.0, 1.0), nan=0.0)
+        has_lot = ~np.isnan(lot)
+        l = np.nan_to_num(np.clip((lot - self.lot_min) / (self.lot_max - self.lot_min), 0.0, 1.0), nan=0.0)
+
+        w_price, w_lot, w_area = self.weights
+        fb_price, fb_area = self.fallback_weights
+        scores = np.where(has_lot, w_price * p + w_lot * l + w_area * a, fb_price * p + fb_area * a)
+        return np.round(scores, 4)
+
+    def score_records(self, records: Sequence["PropertyRecord"]) -> Sequence[float]:
+        """``score_batch`` over property records (or dicts with the same keys)."""
+        return self.score_batch(
+            [_as_float(r.get("price")) for r in records],
+            [_as_float(r.get("livingArea")) for r in records],
+            [_as_float(r.get("lotSize")) for r in records],
+        )
+
+
+def _as_float(value: Any) -> Optional[float]:
+    """Coerce an upstream numeric field to float; anything unparseable counts as missing."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,176 @@
+"""Content-addressed store for generated lead exports.
+
+Exports (CSV, XLSX, ...) are written once and referenced by id (the SHA-256
+of their bytes) instead of being base64-embedded in JSON responses. The id
+doubles as a strong ETag, since the bytes behind it never change. Artifacts
+expire after a TTL and the store is trimmed oldest first past a size limit.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+
+from ..config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+_COPY_CHUNK = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ExportArtifact:
+    """A stored export: ``id`` is the SHA-256 of the content."""
+
+    id: str
+    filename: str
+    content_type: str
+    size: int
+    created_at: float
+    path: str
+
+
+class ExportStore:
+    """Export files under ``<root>/blobs`` plus an SQLite index of their metadata."""
+
+    def __init__(self, root: str, *, max_bytes: int, ttl_seconds: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._index_path = os.path.join(root, "index.sqlite3")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS exports ("
+                " id TEXT PRIMARY KEY,"
+                " filename TEXT NOT NULL,"
+                " content_type TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS exports_created_at ON exports (created_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self._index_path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def blob_path(self, export_id: str) -> str:
+        return os.path.join(self.root, "blobs", export_id[:2], export_id)
+
+    def put_chunks(self, chunks: Iterable[bytes], *, filename: str, content_type: str) -> ExportArtifact:
+        """Store content produced chunk by chunk, hashing it on the way to disk."""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=os.path.join(self.root, "blobs"), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    fh.write(chunk)
+                    size += len(chunk)
+            return self._commit(tmp, digest.hexdigest(), size, filename=filename, content_type=content_type)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def put_file(self, path: str, *, filename: str, content_type: str) -> ExportArtifact:
+        """Store a finished file (e.g. a spooled workbook); the source file is left in place."""
+
+        def read() -> Iterator[bytes]:
+            with open(path, "rb") as fh:
+                while chunk := fh.read(_COPY_CHUNK):
+                    yield chunk
+
+        return self.put_chunks(read(), filename=filename, content_type=content_type)
+
+    def _commit(self, tmp: str, export_id: str, size: int, *, filename: str, content_type: str) -> ExportArtifact:
+        path = self.blob_path(export_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp, path)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO exports (id, filename, content_type, size, created_at) VALUES (?, ?, ?, ?, ?)",
+                (export_id, filename, content_type, size, now),
+            )
+        self._evict()
+        return ExportArtifact(export_id, filename, content_type, size, now, path)
+
+    def get(self, export_id: str) -> Optional[ExportArtifact]:
+        """Return a stored, unexpired artifact; None otherwise."""
+        if not _ID_RE.match(export_id):
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT filename, content_type, size, created_at FROM exports WHERE id = ?", (export_id,)
+                ).fetchone()
+        except sqlite3.Error:
+            logger.debug("Export index lookup failed", exc_info=True)
+            return None
+        path = self.blob_path(export_id)
+        if row is None or row[3] < time.time() - self.ttl_seconds or not os.path.exists(path):
+            return None
+        return ExportArtifact(export_id, row[0], row[1], row[2], row[3], path)
+
+    def _evict(self) -> None:
+        """Drop expired artifacts, then the oldest ones until the store fits in ``max_bytes``."""
+        try:
+            with self._lock, self._connect() as conn:
+                victims = [
+                    r[0] for r in conn.execute(
+                        "SELECT id FROM exports WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+                    )
+                ]
+                total = int(conn.execute("SELECT COALESCE(SUM(size), 0) FROM exports").fetchone()[0])
+                if total > self.max_bytes:
+                    for export_id, size in conn.execute("SELECT id, size FROM exports ORDER BY created_at ASC"):
+                        if total <= self.max_bytes:
+                            break
+                        if export_id not in victims:
+                            victims.append(export_id)
+                        total -= size
+                conn.executemany("DELETE FROM exports WHERE id = ?", [(v,) for v in victims])
+        except sqlite3.Error:
+            logger.debug("Export store eviction failed", exc_info=True)
+            return
+        for export_id in victims:
+            try:
+                os.remove(self.blob_path(export_id))
+            except OSError:
+                pass
+
+
+@lru_cache(maxsize=1)
+def get_export_store() -> Optional[ExportStore]:
+    """Process-wide export store, or None when disabled or the directory is unusable."""
+    settings = get_settings()
+    if not settings.export_store_enabled:
+        return None
+    try:
+        return ExportStore(
+            settings.export_store_dir,
+            max_bytes=settings.export_store_max_bytes,
+            ttl_seconds=settings.export_ttl_seconds,
+        )
+    except (OSError, sqlite3.Error):
+        logger.warning("Export store at %s unavailable", settings.export_store_dir, exc_info=True)
+        return None
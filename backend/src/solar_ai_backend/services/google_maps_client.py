@@ -1,12 +1,89 @@
 import logging
-from typing import List, Optional, Tuple
-
-import httpx
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 from ..config import get_settings
+from ..utils.lazy_import import lazy_import
+from ..utils.metrics import observe_stage, record_cache, record_error
+from ..utils.sqlite_cache import SqliteCache
+from .tile_cache import TileCache, render_window, window_centers
+
+if TYPE_CHECKING:
+    import httpx
+else:
+    # Loaded on first use to keep app import cheap
+    httpx = lazy_import("httpx")
 
 logger = logging.getLogger(__name__)
 
+_US_STATES = {
+    "alabama": "al", "alaska": "ak", "arizona": "az", "arkansas": "ar", "california": "ca",
+    "colorado": "co", "connecticut": "ct", "delaware": "de", "district of columbia": "dc",
+    "florida": "fl", "georgia": "ga", "hawaii": "hi", "idaho": "id", "illinois": "il",
+    "indiana": "in", "iowa": "ia", "kansas": "ks", "kentucky": "ky", "louisiana": "la",
+    "maine": "me", "maryland": "md", "massachusetts": "ma", "michigan": "mi", "minnesota": "mn",
+    "mississippi": "ms", "missouri": "mo", "montana": "mt", "nebraska": "ne", "nevada": "nv",
+    "new hampshire": "nh", "new jersey": "nj", "new mexico": "nm", "new york": "ny",
+    "north carolina": "nc", "north dakota": "nd", "ohio": "oh", "oklahoma": "ok", "oregon": "or",
+    "pennsylvania": "pa", "rhode island": "ri", "south carolina": "sc", "south dakota": "sd",
+    "tennessee": "tn", "texas": "tx", "utah": "ut", "vermont": "vt", "virginia": "va",
+    "washington": "wa", "west virginia": "wv", "wisconsin": "wi", "wyoming": "wy",
+}
+_ZIP_RE = re.compile(r"^\d{5}$")
+
+
+def normalize_location(location: str) -> str:
+    """Canonical form of a free-text location, used as the geocoding cache key.
+
+    Lowercases, drops punctuation, collapses whitespace and abbreviates a
+    trailing US state name, so "San Diego, California" and "san diego ca"
+    share one entry.
+    """
+    tokens = re.sub(r"[^\w\s]", " ", location.lower()).split()
+    # A trailing ZIP stays in place; the state name is matched just before it
+    tail = [tokens.pop()] if len(tokens) > 1 and _ZIP_RE.match(tokens[-1]) else []
+    # Only abbreviate when something precedes the state ("new york" alone stays a city query)
+    for size in (3, 2, 1):
+        abbrev = _US_STATES.get(" ".join(tokens[-size:])) if len(tokens) >= size else None
+        if abbrev is not None:
+            if len(tokens) > size:
+                tokens = tokens[:-size] + [abbrev]
+            break
+    return " ".join(tokens + tail)
+
+
+@lru_cache(maxsize=1)
+def get_geocode_cache() -> Optional[SqliteCache]:
+    """Process-wide durable geocoding cache, or None when disabled."""
+    settings = get_settings()
+    if not settings.geocode_cache_enabled:
+        return None
+    return SqliteCache(settings.geocode_cache_path, namespace="geocode")
+
+
+def _imagery_http_client(timeout_seconds: float) -> "httpx.Client":
+    """Pooled client for imagery traffic; HTTP/2 multiplexes concurrent prefetches over few connections."""
+    settings = get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.imagery_max_connections,
+        max_keepalive_connections=settings.imagery_max_connections,
+    )
+    try:
+        return httpx.Client(timeout=timeout_seconds, limits=limits, http2=settings.imagery_http2)
+    except ImportError:
+        logger.warning("h2 package not installed; imagery client falls back to HTTP/1.1")
+        return httpx.Client(timeout=timeout_seconds, limits=limits)
+
+
+@lru_cache(maxsize=1)
+def get_tile_cache() -> TileCache:
+    """Process-wide satellite tile cache shared by every client instance."""
+    settings = get_settings()
+    return TileCache(settings.tile_cache_dir, max_tiles=settings.tile_cache_max_tiles)
+
 
 class GoogleMapsClient:
     """Client for Google Maps APIs (Static and Geocoding) to fetch satellite imagery and validate locations."""
@@ -15,7 +92,14 @@ class GoogleMapsClient:
         self.api_key = api_key
         self.geocoding_base_url = "https://maps.googleapis.com/maps/api/geocode/json"
         self.static_base_url = "https://maps.googleapis.com/maps/api/staticmap"
-        self._http = httpx.Client(timeout=timeout_seconds)
+        self.tiles_base_url = "https://tile.googleapis.com/v1"
+        # Shared by geocoding and concurrent imagery downloads (httpx.Client is thread-safe)
+        self._http = _imagery_http_client(timeout_seconds)
+        # Map Tiles API session token and its expiry (epoch seconds)
+        self._tile_session: Optional[Tuple[str, float]] = None
+        self._tile_session_lock = threading.Lock()
+        # Upstream imagery requests issued by this client
+        self.imagery_requests = 0
 
     def close(self) -> None:
         """Close the HTTP client."""
@@ -52,20 +136,63 @@ class GoogleMapsClient:
         return url
 
     def validate_location(self, location: str) -> Tuple[float, float]:
-        """Geocode a location string to longitude and latitude."""
+        """Geocode a location string to longitude and latitude.
+
+        Results are cached by normalized location; ``ZERO_RESULTS`` is cached
+        too, for a shorter time, so repeated typos don't hit the API either.
+        """
+        result = self._geocode(location)
+        return result["lng"], result["lat"]
+
+    def geocode_viewport(self, location: str) -> Optional[Tuple[float, float, float, float]]:
+        """Return the recommended viewport ``(west, south, east, north)`` of a location, if Google has one."""
+        viewport = self._geocode(location, need_viewport=True).get("viewport")
+        return tuple(viewport) if viewport else None  # type: ignore[return-value]
+
+    def _geocode(self, location: str, *, need_viewport: bool = False) -> Dict[str, Any]:
+        cache = get_geocode_cache()
+        cache_key = normalize_location(location)
+        if cache is not None and cache_key:
+            cached = cache.get(cache_key)
+            # Entries written before viewports were stored are refreshed when one is needed
+            if cached is not None and not (need_viewport and cached.get("status") == "OK" and "viewport" not in cached):
+                logger.debug("Geocoding cache hit for %r", cache_key)
+                record_cache("geocode", True)
+                if cached.get("status") != "OK":
+                    raise ValueError(f"Geocoding failed: {cached.get('status')}")
+                return cached
+            record_cache("geocode", False)
+
         params = {"address": location, "key": self.api_key}
         try:
-            resp = self._http.get(self.geocoding_base_url, params=params)
-            resp.raise_for_status()
+            with observe_stage("geocode"):
+                resp = self._http.get(self.geocoding_base_url, params=params)
+                resp.raise_for_status()
             data = resp.json()
             if data.get("status") == "OK" and data.get("results"):
                 result = data["results"][0]
                 geometry = result.get("geometry", {})
                 location_data = geometry.get("location", {})
-                return location_data.get("lng"), location_data.get("lat")
+                lng, lat = location_data.get("lng"), location_data.get("lat")
+                viewport = geometry.get("viewport") or {}
+                ne, sw = viewport.get("northeast") or {}, viewport.get("southwest") or {}
+                entry: Dict[str, Any] = {"status": "OK", "lng": lng, "lat": lat, "viewport": None}
+                if ne and sw:
+                    entry["viewport"] = [sw.get("lng"), sw.get("lat"), ne.get("lng"), ne.get("lat")]
+                if cache is not None and cache_key and lng is not None and lat is not None:
+                    settings = get_settings()
+                    cache.set(cache_key, entry, ttl_seconds=settings.geocode_cache_ttl_seconds)
+                return entry
             else:
+                # Only a definitive "no such place" is cached; quota and request errors are retried
+                if data.get("status") != "ZERO_RESULTS":
+                    record_error("google_geocoding", str(data.get("status")))
+                if data.get("status") == "ZERO_RESULTS" and cache is not None and cache_key:
+                    settings = get_settings()
+                    cache.set(cache_key, {"status": "ZERO_RESULTS"}, ttl_seconds=settings.geocode_negative_ttl_seconds)
                 raise ValueError(f"Geocoding failed: {data.get('status')}")
         except httpx.HTTPError as e:
+            record_error("google_geocoding", e)
             logger.error(f"Geocoding HTTP error: {e}")
             raise ValueError(f"Geocoding failed: {e}")
 
@@ -92,17 +219,36 @@ class GoogleMapsClient:
     def get_satellite_images(
         self,
         coordinates: Tuple[float, float],
-        count: int = 20,
+        count: int = 3,
         *,
-        zoom: Optional[int] = None,
         width_px: Optional[int] = None,
         height_px: Optional[int] = None,
         with_marker: bool = True,
+        sampling: Optional[str] = None,
     ) -> List[str]:
-        """Return a list of static satellite image URLs for the given center.
+        """Return a list of static satellite image URLs around the given center.
 
-        Mirrors the Mapbox client's interface used by routes for easy swap.
+        With ``sampling="spiral"`` (the ``IMAGERY_SAMPLING`` default) the URLs
+        cover ``count`` distinct, non-overlapping windows spiralling out from
+        the center; ``"center"`` repeats the centered image. Mirrors the Mapbox
+        client's interface used by routes for easy swap.
         """
+        windows = self.get_satellite_windows(
+            coordinates, count, width_px=width_px, height_px=height_px, with_marker=with_marker, sampling=sampling
+        )
+        return [url for url, _, _ in windows]
+
+    def get_satellite_windows(
+        self,
+        coordinates: Tuple[float, float],
+        count: int = 3,
+        *,
+        width_px: Optional[int] = None,
+        height_px: Optional[int] = None,
+        with_marker: bool = True,
+        sampling: Optional[str] = None,
+    ) -> List[Tuple[str, float, float]]:
+        """Like ``get_satellite_images``, but each entry is ``(url, center_lon, center_lat)`` of its own window."""
         if count <= 0:
             return []
 
@@ -113,15 +259,112 @@ class GoogleMapsClient:
         w = width_px if width_px is not None else settings.mapbox_image_size
         h = height_px if height_px is not None else settings.mapbox_image_size
 
-        url = self.get_satellite_image_url(
-            longitude=lon,
-            latitude=lat,
-            zoom=z,
-            width_px=w,
-            height_px=h,
-            with_marker=with_marker,
-        )
+        mode = sampling or settings.imagery_sampling
+        if mode != "spiral":
+            centers = [(lon, lat)] * count
+        else:
+            centers = window_centers(lon, lat, zoom=z, width_px=w, height_px=h, count=count)
+        return [
+            (
+                self.get_satellite_image_url(
+                    longitude=c_lon,
+                    latitude=c_lat,
+                    zoom=z,
+                    width_px=w,
+                    height_px=h,
+                    with_marker=with_marker,
+                ),
+                c_lon,
+                c_lat,
+            )
+            for c_lon, c_lat in centers
+        ]
+
+    def _get_tile_session(self) -> str:
+        """Create (or reuse) a Map Tiles API session for satellite 2D tiles."""
+        with self._tile_session_lock:
+            if self._tile_session and self._tile_session[1] > time.time() + 60:
+                return self._tile_session[0]
+            return self._create_tile_session()
 
-        # For now, return the same centered image URL repeated 'count' times.
-        # This matches previous Mapbox behavior and keeps route logic unchanged.
-        return [url for _ in range(count)]
+    def _create_tile_session(self) -> str:
+        try:
+            resp = self._http.post(
+                f"{self.tiles_base_url}/createSession",
+                params={"key": self.api_key},
+                json={"mapType": "satellite", "language": "en-US", "region": "US"},
+            )
+            resp.raise_for_status()
+            data = resp.json()
+        except httpx.HTTPError as e:
+            logger.error(f"Map Tiles session HTTP error: {e}")
+            raise ValueError(f"Failed to create tile session: {e}")
+        session = data.get("session")
+        if not session:
+            raise ValueError("Map Tiles API returned no session token")
+        expiry = float(data.get("expiry") or time.time() + 3600)
+        self._tile_session = (session, expiry)
+        return session
+
+    def fetch_image_bytes(self, image_url: str) -> Tuple[bytes, str]:
+        """Download a Static Maps image and return its bytes and MIME type."""
+        self.imagery_requests += 1
+        try:
+            with observe_stage("image_download"):
+                resp = self._http.get(image_url)
+                resp.raise_for_status()
+        except httpx.HTTPError as e:
+            record_error("google_static_maps", e)
+            logger.error(f"Static image HTTP error: {e}")
+            raise ValueError(f"Failed to fetch satellite image: {e}")
+        return resp.content, resp.headers.get("content-type", "image/png").split(";")[0]
+
+    def fetch_tile(self, zoom: int, x: int, y: int) -> bytes:
+        """Download one satellite XYZ tile from the Map Tiles API (uncached)."""
+        session = self._get_tile_session()
+        self.imagery_requests += 1
+        try:
+            with observe_stage("tile_download"):
+                resp = self._http.get(
+                    f"{self.tiles_base_url}/2dtiles/{zoom}/{x}/{y}",
+                    params={"session": session, "key": self.api_key},
+                )
+                resp.raise_for_status()
+        except httpx.HTTPError as e:
+            record_error("google_map_tiles", e)
+            logger.error(f"Map Tiles HTTP error for {zoom}/{x}/{y}: {e}")
+            raise ValueError(f"Failed to fetch tile {zoom}/{x}/{y}: {e}")
+        return resp.content
+
+    def _cached_tile(self, zoom: int, x: int, y: int) -> bytes:
+        cache = get_tile_cache()
+        data = cache.get(zoom, x, y)
+        record_cache("tile", data is not None)
+        if data is None:
+            data = self.fetch_tile(zoom, x, y)
+            cache.put(zoom, x, y, data)
+        return data
+
+    def get_satellite_image_bytes(
+        self,
+        *,
+        longitude: float,
+        latitude: float,
+        zoom: int = 20,
+        width_px: int = 512,
+        height_px: int = 512,
+    ) -> bytes:
+        """Return a PNG centered on the coordinates, stitched from cached XYZ tiles.
+
+        Covers the same ground footprint as the Static Maps image with the same
+        zoom and size, without the center marker.
+        """
+        with observe_stage("image_download"):
+            return render_window(
+                self._cached_tile,
+                longitude=longitude,
+                latitude=latitude,
+                zoom=zoom,
+                width_px=width_px,
+                height_px=height_px,
+            )
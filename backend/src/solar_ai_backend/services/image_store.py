@@ -0,0 +1,248 @@
+"""Content-addressed local image store with memory-mapped reads.
+
+Image bytes are stored once per SHA-256 digest under ``<root>/blobs`` and
+indexed in SQLite by (lat, lng, zoom, width, height, provider), so re-runs,
+export routes and the local image endpoint reuse a tile instead of
+downloading it again. Reads return read-only ``mmap`` objects that can be
+handed to PIL (or sliced) without copying the file into Python memory.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import mmap
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterator, Optional, Tuple, Union
+
+from ..config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+# Coordinates are indexed at ~1 cm precision so float noise doesn't split entries
+_COORD_DECIMALS = 7
+# Eviction frees space down to this fraction of max_bytes, so it runs once per batch of puts
+_EVICT_TO = 0.9
+
+
+@dataclass(frozen=True)
+class ImageKey:
+    """Index key for a rendered imagery window."""
+
+    lat: float
+    lng: float
+    zoom: int
+    width: int
+    height: int
+    provider: str
+
+    def as_row(self) -> Tuple[float, float, int, int, int, str]:
+        return (
+            round(self.lat, _COORD_DECIMALS),
+            round(self.lng, _COORD_DECIMALS),
+            self.zoom,
+            self.width,
+            self.height,
+            self.provider,
+        )
+
+
+def is_valid_digest(digest: str) -> bool:
+    return bool(_DIGEST_RE.match(digest))
+
+
+class ImageStore:
+    """On-disk content-addressed image store with size-based LRU eviction.
+
+    Store failures (full disk, locked index) are logged and never raised from
+    :meth:`put` or :meth:`get_or_fetch`; callers then work from the fetched bytes.
+    """
+
+    def __init__(self, root: str, *, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._index_path = os.path.join(root, "index.sqlite3")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                " digest TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " content_type TEXT NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS refs ("
+                " lat REAL NOT NULL, lng REAL NOT NULL, zoom INTEGER NOT NULL,"
+                " width INTEGER NOT NULL, height INTEGER NOT NULL, provider TEXT NOT NULL,"
+                " digest TEXT NOT NULL,"
+                " PRIMARY KEY (lat, lng, zoom, width, height, provider))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS refs_digest ON refs (digest)")
+            conn.execute("CREATE INDEX IF NOT EXISTS blobs_last_access ON blobs (last_access)")
+            # Running total of stored bytes; re-read from the index whenever eviction runs
+            self._total = int(conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0])
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self._index_path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "blobs", digest[:2], digest)
+
+    def lookup(self, key: ImageKey) -> Optional[str]:
+        """Return the digest stored for ``key``, if any."""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT digest FROM refs WHERE lat = ? AND lng = ? AND zoom = ? AND width = ? AND height = ? AND provider = ?",
+                    key.as_row(),
+                ).fetchone()
+        except sqlite3.Error:
+            logger.debug("Image index lookup failed", exc_info=True)
+            return None
+        if row is None or not os.path.exists(self.blob_path(row[0])):
+            return None
+        return row[0]
+
+    def content_type(self, digest: str) -> Optional[str]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT content_type FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def put(self, data: bytes, *, content_type: str, key: Optional[ImageKey] = None) -> Optional[str]:
+        """Store ``data`` (idempotent per content) and index it under ``key``.
+
+        Returns its digest, or None when the image could not be stored.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        try:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as fh:
+                    fh.write(data)
+                os.replace(tmp, path)
+            with self._lock, self._connect() as conn:
+                now = time.time()
+                added = conn.execute(
+                    "INSERT OR IGNORE INTO blobs (digest, size, content_type, last_access) VALUES (?, ?, ?, ?)",
+                    (digest, len(data), content_type, now),
+                ).rowcount
+                if added:
+                    self._total += len(data)
+                else:
+                    conn.execute("UPDATE blobs SET last_access = ? WHERE digest = ?", (now, digest))
+                if key is not None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO refs (lat, lng, zoom, width, height, provider, digest) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        key.as_row() + (digest,),
+                    )
+                over = self._total > self.max_bytes
+        except (OSError, sqlite3.Error):
+            logger.warning("Failed to store image %s in the local image store", digest, exc_info=True)
+            return None
+        if over:
+            self._evict()
+        return digest
+
+    def open(self, digest: str) -> Optional[mmap.mmap]:
+        """Memory-map a stored image read-only; None when it is not in the store."""
+        if not is_valid_digest(digest):
+            return None
+        try:
+            with open(self.blob_path(digest), "rb") as fh:
+                mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute("UPDATE blobs SET last_access = ? WHERE digest = ?", (time.time(), digest))
+        except sqlite3.Error:
+            logger.debug("Failed to touch image %s", digest, exc_info=True)
+        return mapped
+
+    def get_or_fetch(
+        self, key: ImageKey, fetch: Callable[[], Tuple[bytes, str]]
+    ) -> Tuple[Optional[str], Union[mmap.mmap, bytes]]:
+        """Return (digest, image) for ``key``, calling ``fetch() -> (bytes, content_type)`` on a miss.
+
+        The image is memory-mapped from the store. When it cannot be stored,
+        the digest is None and the fetched bytes are returned instead; errors
+        from ``fetch`` itself propagate.
+        """
+        digest = self.lookup(key)
+        if digest is not None:
+            mapped = self.open(digest)
+            if mapped is not None:
+                return digest, mapped
+        data, content_type = fetch()
+        stored = self.put(data, content_type=content_type, key=key)
+        mapped = self.open(stored) if stored is not None else None
+        if mapped is None:  # not stored, or evicted straight away (store smaller than one image)
+            return None, data
+        return stored, mapped
+
+    def total_bytes(self) -> int:
+        with self._connect() as conn:
+            return int(conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0])
+
+    def _evict(self) -> None:
+        """Drop least recently used blobs until the store is back under ``max_bytes``."""
+        victims = []
+        try:
+            with self._lock, self._connect() as conn:
+                # Exact total, which also picks up blobs added by other processes
+                total = int(conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0])
+                if total > self.max_bytes:
+                    target = self.max_bytes * _EVICT_TO
+                    for digest, size in conn.execute("SELECT digest, size FROM blobs ORDER BY last_access ASC"):
+                        if total <= target:
+                            break
+                        victims.append(digest)
+                        total -= size
+                    conn.executemany("DELETE FROM blobs WHERE digest = ?", [(d,) for d in victims])
+                    conn.executemany("DELETE FROM refs WHERE digest = ?", [(d,) for d in victims])
+                self._total = total
+        except sqlite3.Error:
+            logger.debug("Image store eviction failed", exc_info=True)
+            return
+        for digest in victims:
+            try:
+                os.remove(self.blob_path(digest))
+            except OSError:
+                pass
+        if victims:
+            logger.info("Evicted %d images from the local image store", len(victims))
+
+
+@lru_cache(maxsize=1)
+def get_image_store() -> Optional[ImageStore]:
+    """Process-wide image store, or None when disabled or the directory is unusable."""
+    settings = get_settings()
+    if not settings.image_store_enabled:
+        return None
+    try:
+        return ImageStore(settings.image_store_dir, max_bytes=settings.image_store_max_bytes)
+    except (OSError, sqlite3.Error):
+        logger.warning("Local image store at %s unavailable", settings.image_store_dir, exc_info=True)
+        return None
@@ -0,0 +1,102 @@
+"""Concurrent imagery prefetch stage.
+
+Downloads images for upcoming properties on a thread pool while the caller
+classifies the current one, so Gemini calls don't wait on the network.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Generator, Iterable, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def buffered_size(result: Any) -> int:
+    """Bytes held by a fetched image (bytes, bytearray or mmap); 0 when unknown."""
+    try:
+        return len(result) if result is not None else 0
+    except TypeError:
+        return 0
+
+
+class ImageryPrefetcher:
+    """Run ``fetch(item)`` up to ``lookahead`` items ahead of the consumer, in order.
+
+    ``max_buffered_bytes`` caps how much downloaded-but-unconsumed imagery is
+    held in memory: once the finished results waiting in the window exceed
+    it, no new downloads start until the consumer catches up (at least one
+    download is always allowed so the pipeline keeps moving). ``sizeof``
+    measures one ``fetch`` result; pass it when results wrap the image.
+    """
+
+    def __init__(
+        self,
+        *,
+        lookahead: int = 8,
+        max_buffered_bytes: int = 64 * 1024 * 1024,
+        max_workers: Optional[int] = None,
+        sizeof: Callable[[Any], int] = buffered_size,
+    ) -> None:
+        self.lookahead = max(1, lookahead)
+        self.max_buffered_bytes = max_buffered_bytes
+        self.sizeof = sizeof
+        self.max_workers = max_workers or self.lookahead
+        # Time the consumer spent blocked on a download that wasn't ready yet
+        self.wait_seconds = 0.0
+        # Wait for the item most recently yielded
+        self.last_wait_seconds = 0.0
+        self.fetched = 0
+
+    def _buffered_bytes(self, window: Deque[Tuple[T, "Future[Any]"]]) -> int:
+        total = 0
+        for _, fut in window:
+            if fut.done() and fut.exception() is None:
+                total += self.sizeof(fut.result())
+        return total
+
+    def map(
+        self, fetch: Callable[[T], Any], items: Iterable[T]
+    ) -> Generator[Tuple[T, Any, Optional[BaseException]], None, None]:
+        """Yield ``(item, result, error)`` in input order; ``error`` is set when ``fetch`` raised.
+
+        Closing the generator early (e.g. ``break`` in the consumer) cancels
+        downloads that have not started yet.
+        """
+        source = iter(items)
+        window: Deque[Tuple[T, "Future[Any]"]] = deque()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="imagery-prefetch")
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(window) < self.lookahead:
+                    if window and self._buffered_bytes(window) >= self.max_buffered_bytes:
+                        break
+                    try:
+                        item = next(source)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    window.append((item, executor.submit(fetch, item)))
+                if not window:
+                    return
+                item, fut = window.popleft()
+                self.last_wait_seconds = 0.0
+                if not fut.done():
+                    started = time.perf_counter()
+                    try:
+                        fut.result()
+                    except BaseException:
+                        pass
+                    self.last_wait_seconds = time.perf_counter() - started
+                    self.wait_seconds += self.last_wait_seconds
+                error = fut.exception()
+                self.fetched += 1
+                yield item, (None if error is not None else fut.result()), error
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            logger.debug("Imagery prefetch: %d items, consumer waited %.3fs", self.fetched, self.wait_seconds)
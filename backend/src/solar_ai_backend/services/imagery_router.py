@@ -0,0 +1,208 @@
+"""Latency- and error-aware routing of imagery requests across providers.
+
+Google (Static Maps or tiles) and Mapbox Static Images render the same
+parcel-centered window. Each request goes to the provider that currently
+looks healthiest, and falls over to the next one when it fails, so a slow or
+rate-limited provider no longer stalls a whole run.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..config import get_settings
+from .google_maps_client import GoogleMapsClient
+from .mapbox_client import MapboxClient
+
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the moving averages
+_EWMA_ALPHA = 0.2
+
+
+class ProviderHealth:
+    """Process-wide latency and error-rate tracking per imagery provider.
+
+    A provider that fails ``max_consecutive_failures`` times in a row is
+    benched for ``cooldown_seconds``; it is still tried as a last resort.
+    Every ``probe_every``-th ranking puts the least recently measured healthy
+    provider first, so secondaries keep a current latency and a slow (but
+    working) primary loses its place once a faster one is measured.
+    """
+
+    def __init__(self, *, max_consecutive_failures: int = 3, cooldown_seconds: float = 60.0, probe_every: int = 20) -> None:
+        self.max_consecutive_failures = max_consecutive_failures
+        self.cooldown_seconds = cooldown_seconds
+        self.probe_every = probe_every
+        self._lock = threading.Lock()
+        # provider -> latency EWMA (s), error-rate EWMA, consecutive failures, benched until, last measured
+        self._stats: Dict[str, List[float]] = {}
+        self._rankings = 0
+
+    def _entry(self, provider: str) -> List[float]:
+        return self._stats.setdefault(provider, [0.0, 0.0, 0, 0.0, 0.0])
+
+    def record_success(self, provider: str, latency_seconds: float) -> None:
+        with self._lock:
+            entry = self._entry(provider)
+            entry[0] = latency_seconds if entry[0] == 0.0 else (1 - _EWMA_ALPHA) * entry[0] + _EWMA_ALPHA * latency_seconds
+            entry[1] = (1 - _EWMA_ALPHA) * entry[1]
+            entry[2] = 0
+            entry[3] = 0.0
+            entry[4] = time.time()
+
+    def record_failure(self, provider: str) -> None:
+        with self._lock:
+            entry = self._entry(provider)
+            entry[1] = (1 - _EWMA_ALPHA) * entry[1] + _EWMA_ALPHA
+            entry[2] += 1
+            entry[4] = time.time()
+            if entry[2] >= self.max_consecutive_failures:
+                entry[3] = time.time() + self.cooldown_seconds
+                logger.warning("Imagery provider %s benched for %.0fs after %d failures", provider, self.cooldown_seconds, entry[2])
+
+    def rank(self, providers: Sequence[str]) -> List[str]:
+        """Order ``providers`` best first: error-penalized latency, ties broken by the given preference order.
+
+        Providers without a successful request yet rank after measured ones,
+        except on probe turns (every ``probe_every``-th call), when the least
+        recently measured healthy provider other than the best goes first.
+        """
+        now = time.time()
+        with self._lock:
+            def key(item: Tuple[int, str]) -> Tuple[bool, float, float, int]:
+                idx, name = item
+                latency, error_rate, _, benched_until, _ = self._entry(name)
+                score = latency * (1 + 4 * error_rate) if latency > 0 else float("inf")
+                return (benched_until > now, score, error_rate, idx)
+
+            ranked = [name for _, name in sorted(enumerate(providers), key=key)]
+            self._rankings += 1
+            if self.probe_every > 0 and len(ranked) > 1 and self._rankings % self.probe_every == 0:
+                healthy = [name for name in ranked[1:] if self._entry(name)[3] <= now]
+                if healthy:
+                    probe = min(healthy, key=lambda name: self._entry(name)[4])
+                    ranked.remove(probe)
+                    ranked.insert(0, probe)
+            return ranked
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {"latency_seconds": s[0], "error_rate": s[1], "consecutive_failures": s[2], "benched_until": s[3], "last_measured": s[4]}
+                for name, s in self._stats.items()
+            }
+
+
+@lru_cache(maxsize=1)
+def get_provider_health() -> ProviderHealth:
+    settings = get_settings()
+    return ProviderHealth(
+        max_consecutive_failures=settings.imagery_provider_max_failures,
+        cooldown_seconds=settings.imagery_provider_cooldown_seconds,
+        probe_every=settings.imagery_provider_probe_every,
+    )
+
+
+@dataclass(frozen=True)
+class ImagerySource:
+    """One provider's way of rendering a window: its name, display URL and download."""
+
+    name: str
+    image_url: Callable[[float, float, int, int, int], str]
+    fetch: Callable[[str, float, float, int, int, int], Tuple[bytes, str]]
+
+
+def google_source(client: GoogleMapsClient, *, use_tiles: bool) -> ImagerySource:
+    def image_url(lon: float, lat: float, zoom: int, w: int, h: int) -> str:
+        return client.get_satellite_image_url(longitude=lon, latitude=lat, zoom=zoom, width_px=w, height_px=h)
+
+    def fetch(url: str, lon: float, lat: float, zoom: int, w: int, h: int) -> Tuple[bytes, str]:
+        if use_tiles:
+            data = client.get_satellite_image_bytes(longitude=lon, latitude=lat, zoom=zoom, width_px=w, height_px=h)
+            return data, "image/png"
+        return client.fetch_image_bytes(url)
+
+    return ImagerySource("google_tiles" if use_tiles else "google_static", image_url, fetch)
+
+
+def mapbox_source(client: MapboxClient) -> ImagerySource:
+    def image_url(lon: float, lat: float, zoom: int, w: int, h: int) -> str:
+        # Mapbox zoom levels use 512 px tiles: zoom - 1 covers the same ground as Google at ``zoom``
+        return client.build_static_image_url(longitude=lon, latitude=lat, zoom=zoom - 1, width_px=w, height_px=h)
+
+    def fetch(url: str, lon: float, lat: float, zoom: int, w: int, h: int) -> Tuple[bytes, str]:
+        return client.fetch_image_bytes(url)
+
+    return ImagerySource("mapbox_static", image_url, fetch)
+
+
+class ImageryRouter:
+    """Send each imagery request to the healthiest source, failing over in rank order."""
+
+    def __init__(self, sources: Sequence[ImagerySource], *, health: Optional[ProviderHealth] = None) -> None:
+        if not sources:
+            raise ValueError("No imagery providers configured")
+        self.sources = {source.name: source for source in sources}
+        self.preference = [source.name for source in sources]
+        self.health = health or get_provider_health()
+        self.failovers = 0
+
+    @property
+    def primary(self) -> str:
+        return self.preference[0]
+
+    def ranked(self) -> List[str]:
+        return self.health.rank(self.preference)
+
+    def image_url(self, provider: str, longitude: float, latitude: float, zoom: int, width_px: int, height_px: int) -> str:
+        return self.sources[provider].image_url(longitude, latitude, zoom, width_px, height_px)
+
+    def fetch(
+        self,
+        longitude: float,
+        latitude: float,
+        zoom: int,
+        width_px: int,
+        height_px: int,
+        *,
+        load: Optional[Callable[[str, Callable[[], Tuple[bytes, str]]], Any]] = None,
+        providers: Optional[Sequence[str]] = None,
+    ) -> Tuple[str, str, Any]:
+        """Return ``(provider, image_url, image)`` from the first provider in rank order that succeeds.
+
+        ``load(provider, fetch)`` wraps each attempt (e.g. to go through the
+        local image store); by default the downloaded bytes are returned.
+        ``providers`` pins the attempt order (e.g. to re-read one provider's
+        image). Raises ValueError when every provider failed.
+        """
+        errors: List[str] = []
+        for attempt, name in enumerate(providers if providers is not None else self.ranked()):
+            source = self.sources[name]
+            url = source.image_url(longitude, latitude, zoom, width_px, height_px)
+
+            def fetch(source: ImagerySource = source, url: str = url) -> Tuple[bytes, str]:
+                started = time.perf_counter()
+                try:
+                    result = source.fetch(url, longitude, latitude, zoom, width_px, height_px)
+                except Exception:
+                    self.health.record_failure(source.name)
+                    raise
+                self.health.record_success(source.name, time.perf_counter() - started)
+                return result
+
+            try:
+                image = load(name, fetch) if load is not None else fetch()[0]
+            except Exception as exc:
+                errors.append(f"{name}: {exc}")
+                logger.warning("Imagery provider %s failed, trying next: %s", name, exc)
+                continue
+            if attempt:
+                self.failovers += 1
+            return name, url, image
+        raise ValueError("All imagery providers failed (" + "; ".join(errors) + ")")
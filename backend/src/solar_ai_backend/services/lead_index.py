@@ -0,0 +1,224 @@
+"""Persistent spatial index of classified properties.
+
+Every property that went through classification is kept with its lead
+payload (Zillow fields, imagery, vision result, score) and the time it was
+classified. Bounding-box and radius queries use an SQLite R*Tree, so nearby
+leads can be served without calling Zillow, the imagery providers or Gemini.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+_EARTH_RADIUS_M = 6_371_000.0
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in meters."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    h = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * _EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(h)))
+
+
+def radius_bounds(lat: float, lng: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """Bounding box ``(west, south, east, north)`` enclosing a circle."""
+    dlat = math.degrees(radius_m / _EARTH_RADIUS_M)
+    dlng = math.degrees(radius_m / (_EARTH_RADIUS_M * max(math.cos(math.radians(lat)), 1e-6)))
+    return lng - dlng, lat - dlat, lng + dlng, lat + dlat
+
+
+def lead_key(zpid: Optional[str], lat: float, lng: float) -> str:
+    """Index key of a property: its zpid, or its rounded coordinates when it has none."""
+    return f"zpid:{zpid}" if zpid else f"pt:{lat:.6f},{lng:.6f}"
+
+
+class LeadIndex:
+    """SQLite table of classified leads plus an R*Tree over their coordinates.
+
+    When the SQLite build lacks the R*Tree module, a plain (lat, lng) index is
+    used instead, which is slower but returns the same results.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leads ("
+                " id INTEGER PRIMARY KEY,"
+                " key TEXT NOT NULL UNIQUE,"
+                " lat REAL NOT NULL, lng REAL NOT NULL,"
+                " backyard_status TEXT,"
+                " lead_score REAL,"
+                " classified_at REAL NOT NULL,"
+                " payload TEXT NOT NULL)"
+            )
+            try:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS leads_rtree USING rtree(id, min_lat, max_lat, min_lng, max_lng)"
+                )
+                self.rtree = True
+            except sqlite3.OperationalError:
+                logger.warning("SQLite R*Tree module unavailable; lead index falls back to a B-tree on (lat, lng)")
+                conn.execute("CREATE INDEX IF NOT EXISTS leads_lat_lng ON leads (lat, lng)")
+                self.rtree = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def upsert_many(self, rows: Sequence[Dict[str, Any]]) -> int:
+        """Store leads (``LeadItem.model_dump()`` dicts), replacing earlier classifications of the same property."""
+        if not rows:
+            return 0
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            for row in rows:
+                lat, lng = row["coordinates"]["lat"], row["coordinates"]["lng"]
+                zillow = row.get("zillow") or {}
+                vision = row.get("vision") or {}
+                key = lead_key(zillow.get("zpid"), lat, lng)
+                cur = conn.execute(
+                    "INSERT INTO leads (key, lat, lng, backyard_status, lead_score, classified_at, payload)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (key) DO UPDATE SET lat = excluded.lat, lng = excluded.lng,"
+                    " backyard_status = excluded.backyard_status, lead_score = excluded.lead_score,"
+                    " classified_at = excluded.classified_at, payload = excluded.payload"
+                    " RETURNING id",
+                    (key, lat, lng, vision.get("backyard_status"), row.get("lead_score"), now, json.dumps(row)),
+                )
+                lead_id = cur.fetchone()[0]
+                if self.rtree:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO leads_rtree (id, min_lat, max_lat, min_lng, max_lng) VALUES (?, ?, ?, ?, ?)",
+                        (lead_id, lat, lat, lng, lng),
+                    )
+        return len(rows)
+
+    def _select(
+        self,
+        bounds: Tuple[float, float, float, float],
+        *,
+        statuses: Optional[Sequence[str]],
+        max_age_seconds: Optional[float],
+        limit: Optional[int],
+        center: Optional[Tuple[float, float, float]] = None,
+    ) -> List[Tuple[str, float, Optional[float]]]:
+        """(payload, classified_at, distance_m) rows inside ``bounds``.
+
+        With ``center`` = (lat, lng, radius_m), rows are also limited to the
+        circle and ordered nearest first; otherwise best score first.
+        """
+        west, south, east, north = bounds
+        params: List[Any] = []
+        distance = "NULL"
+        if center is not None:
+            distance = "haversine_m(?, ?, l.lat, l.lng)"
+            params.extend(center[:2])
+        sql = f"SELECT l.payload, l.classified_at, {distance} AS distance"
+        if self.rtree:
+            # Overlap rather than containment: the R*Tree keeps float32 boxes rounded outward, so a
+            # point on the query edge could fail a containment test. The exact test is on l.lat/l.lng.
+            sql += (
+                " FROM leads_rtree r JOIN leads l ON l.id = r.id"
+                " WHERE r.max_lat >= ? AND r.min_lat <= ? AND r.max_lng >= ? AND r.min_lng <= ? AND"
+            )
+            params.extend([south, north, west, east])
+        else:
+            sql += " FROM leads l WHERE"
+        sql += " l.lat BETWEEN ? AND ? AND l.lng BETWEEN ? AND ?"
+        params.extend([south, north, west, east])
+        if statuses:
+            sql += f" AND l.backyard_status IN ({','.join('?' * len(statuses))})"
+            params.extend(statuses)
+        if max_age_seconds is not None:
+            sql += " AND l.classified_at >= ?"
+            params.append(time.time() - max_age_seconds)
+        if center is not None:
+            sql += " AND distance <= ? ORDER BY distance"
+            params.append(center[2])
+        else:
+            sql += " ORDER BY l.lead_score DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._connect() as conn:
+            if center is not None:
+                conn.create_function("haversine_m", 4, haversine_m, deterministic=True)
+            return conn.execute(sql, params).fetchall()
+
+    def query_bbox(
+        self,
+        bounds: Tuple[float, float, float, float],
+        *,
+        statuses: Optional[Sequence[str]] = None,
+        max_age_seconds: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Leads inside ``(west, south, east, north)``, best score first.
+
+        Each result is the stored lead payload plus ``classified_at`` (epoch seconds).
+        """
+        rows = self._select(bounds, statuses=statuses, max_age_seconds=max_age_seconds, limit=limit)
+        return [dict(json.loads(payload), classified_at=classified_at) for payload, classified_at, _ in rows]
+
+    def query_radius(
+        self,
+        lat: float,
+        lng: float,
+        radius_m: float,
+        *,
+        statuses: Optional[Sequence[str]] = None,
+        max_age_seconds: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Leads within ``radius_m`` of a point, nearest first, each with ``distance_m``.
+
+        Distance filtering, ordering and ``limit`` run in SQL, so only the
+        returned rows are decoded.
+        """
+        rows = self._select(
+            radius_bounds(lat, lng, radius_m),
+            statuses=statuses,
+            max_age_seconds=max_age_seconds,
+            limit=limit,
+            center=(lat, lng, radius_m),
+        )
+        return [
+            dict(json.loads(payload), classified_at=classified_at, distance_m=round(distance, 1) if distance is not None else None)
+            for payload, classified_at, distance in rows
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_lead_index() -> Optional[LeadIndex]:
+    """Process-wide lead index, or None when disabled or the file is unusable."""
+    settings = get_settings()
+    if not settings.lead_index_enabled:
+        return None
+    try:
+        return LeadIndex(settings.lead_index_path)
+    except (OSError, sqlite3.Error):
+        logger.warning("Lead index at %s unavailable", settings.lead_index_path, exc_info=True)
+        return None
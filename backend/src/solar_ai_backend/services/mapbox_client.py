@@ -1,9 +1,14 @@
 from typing import Any, Dict, List, Optional, Tuple
 
 import logging
-import httpx
 import urllib.parse
 from ..config import get_settings
+from ..utils.lazy_import import lazy_import
+from ..utils.metrics import observe_stage, record_error
+from .tile_cache import window_centers
+
+# Loaded on first use to keep app import cheap
+httpx = lazy_import("httpx")
 
 
 logger = logging.getLogger(__name__)
@@ -99,22 +104,49 @@ class MapboxClient:
 
         return lon, lat
 
-    def get_satellite_images(self, coordinates: Tuple[float, float], count: int = 20) -> List[str]:
-        """Return a list of static satellite image URLs for the given center."""
+    def get_satellite_images(
+        self,
+        coordinates: Tuple[float, float],
+        count: int = 20,
+        *,
+        sampling: Optional[str] = None,
+    ) -> List[str]:
+        """Return a list of static satellite image URLs around the given center.
+
+        ``sampling`` works as in ``GoogleMapsClient.get_satellite_images``.
+        """
+        return [url for url, _, _ in self.get_satellite_windows(coordinates, count, sampling=sampling)]
+
+    def get_satellite_windows(
+        self,
+        coordinates: Tuple[float, float],
+        count: int = 20,
+        *,
+        sampling: Optional[str] = None,
+    ) -> List[Tuple[str, float, float]]:
+        """Like ``get_satellite_images``, but each entry is ``(url, center_lon, center_lat)`` of its own window."""
         if count <= 0:
             return []
             
         lon, lat = coordinates
-        urls: List[str] = []
-        
-        for _ in range(count):
+        settings = get_settings()
+        zoom = settings.mapbox_zoom
+        size = self.image_size_px
+        if (sampling or settings.imagery_sampling) == "spiral":
+            # Mapbox zoom levels use 512 px tiles, i.e. one level above the 256 px tile math
+            centers = window_centers(lon, lat, zoom=zoom + 1, width_px=size, height_px=size, count=count)
+        else:
+            centers = [(lon, lat)] * count
+
+        windows: List[Tuple[str, float, float]] = []
+        for c_lon, c_lat in centers:
             url = (
-                f"{self.base_url}/styles/v1/{self.style}/static/{lon},{lat},{get_settings().mapbox_zoom},0,0/{self.image_size_px}x{self.image_size_px}"
+                f"{self.base_url}/styles/v1/{self.style}/static/{c_lon},{c_lat},{zoom},0,0/{size}x{size}"
                 f"?access_token={self.access_token}"
             )
-            urls.append(url)
+            windows.append((url, c_lon, c_lat))
             
-        return urls
+        return windows
     
     def build_static_image_url(
         self,
@@ -154,6 +186,18 @@ class MapboxClient:
 
         return url
         
+    def fetch_image_bytes(self, image_url: str) -> Tuple[bytes, str]:
+        """Download a Static Images API image and return its bytes and MIME type."""
+        try:
+            with observe_stage("image_download"):
+                response = self._http.get(image_url)
+                response.raise_for_status()
+        except httpx.HTTPError as exc:
+            record_error("mapbox_static", exc)
+            logger.error(f"Mapbox static image HTTP error: {exc}")
+            raise ValueError(f"Failed to fetch satellite image: {exc}") from exc
+        return response.content, response.headers.get("content-type", "image/png").split(";")[0]
+
     def close(self) -> None:
         """Close the HTTP client."""
         try:
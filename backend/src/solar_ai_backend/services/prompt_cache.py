@@ -0,0 +1,179 @@
+"""Cached-content handles for the static vision system instruction.
+
+The backyard analysis instructions are uploaded once per (model, prompt
+version) and referenced by name afterwards, so each classify call only sends
+the image and a short per-property suffix.
+
+Gemini only caches content above a per-model minimum size, so the
+instruction is measured first; when it is too small, caching stays off for
+that model and the instruction is always sent inline.
+"""
+from __future__ import annotations
+
+import datetime
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from ..utils.lazy_import import is_available, lazy_import
+
+# Loaded on first use
+genai = lazy_import("google.generativeai")
+
+
+logger = logging.getLogger(__name__)
+
+# Smallest cacheable content per model family (Gemini 2.5: Flash 1024 tokens, Pro 4096)
+_MIN_CACHE_TOKENS = {"flash": 1024, "pro": 4096}
+_DEFAULT_MIN_CACHE_TOKENS = 1024
+
+
+def min_cache_tokens(model: str) -> int:
+    """Return the minimum token count ``model`` accepts for cached content."""
+    name = model.rsplit("/", 1)[-1]
+    for family, minimum in _MIN_CACHE_TOKENS.items():
+        if family in name.split("-"):
+            return minimum
+    return _DEFAULT_MIN_CACHE_TOKENS
+
+
+class PromptCacheBackend:
+    """Interface for creating cached-content resources."""
+
+    def min_tokens(self, model: str) -> int:
+        """Return the smallest instruction, in tokens, that ``model`` can cache."""
+        return 0
+
+    def count_tokens(self, *, model: str, text: str) -> int:
+        """Return the token count of ``text`` for ``model`` (estimated at ~4 characters per token)."""
+        return len(text) // 4
+
+    def create(self, *, model: str, system_instruction: str, display_name: str, ttl_seconds: int) -> str:
+        """Upload ``system_instruction`` for ``model`` and return the cached-content name."""
+        raise NotImplementedError
+
+
+class GeminiPromptCacheBackend(PromptCacheBackend):
+    """Gemini context caching through ``genai.caching.CachedContent``."""
+
+    def __init__(self, min_tokens: int = 0) -> None:
+        # 0 uses the built-in per-model minimum
+        self._min_tokens = min_tokens
+
+    def min_tokens(self, model: str) -> int:
+        return self._min_tokens or min_cache_tokens(model)
+
+    def count_tokens(self, *, model: str, text: str) -> int:
+        try:
+            return int(genai.GenerativeModel(model).count_tokens(text).total_tokens)
+        except Exception as exc:
+            logger.debug("Token count failed for model %s, estimating: %s", model, exc)
+            return super().count_tokens(model=model, text=text)
+
+    def create(self, *, model: str, system_instruction: str, display_name: str, ttl_seconds: int) -> str:
+        if not is_available(genai):
+            raise ValueError("google-generativeai package not installed")
+        model_name = model if model.startswith("models/") else f"models/{model}"
+        cached = genai.caching.CachedContent.create(
+            model=model_name,
+            display_name=display_name,
+            system_instruction=system_instruction,
+            ttl=datetime.timedelta(seconds=ttl_seconds),
+        )
+        return cached.name
+
+
+class LocalPromptCacheBackend(PromptCacheBackend):
+    """In-process stand-in that records uploads instead of calling Gemini."""
+
+    def __init__(self) -> None:
+        self.uploads: Dict[str, Tuple[str, str]] = {}
+
+    def create(self, *, model: str, system_instruction: str, display_name: str, ttl_seconds: int) -> str:
+        digest = hashlib.sha256(f"{model}\n{system_instruction}".encode("utf-8")).hexdigest()[:16]
+        name = f"cachedContents/local-{digest}"
+        self.uploads[name] = (model, system_instruction)
+        return name
+
+
+class PromptCache:
+    """Per-process registry of cached-content handles keyed by model.
+
+    Handles are refreshed shortly before their TTL runs out. An instruction
+    below the model's minimum cacheable size is detected before any upload
+    and disables caching for that model for the life of the process. When
+    creation fails otherwise (e.g. the model does not support caching) the
+    failure is remembered for ``retry_after_seconds``. Either way callers
+    fall back to sending the system instruction inline.
+    """
+
+    def __init__(
+        self,
+        backend: PromptCacheBackend,
+        *,
+        system_instruction: str,
+        version: str,
+        ttl_seconds: int = 3600,
+        retry_after_seconds: int = 600,
+    ) -> None:
+        self.backend = backend
+        self.system_instruction = system_instruction
+        self.version = version
+        self.ttl_seconds = ttl_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self._lock = threading.Lock()
+        # model -> (cached-content name or None on failure, valid-until timestamp)
+        self._handles: Dict[str, Tuple[Optional[str], float]] = {}
+        # One creation per model at a time; the network call never holds self._lock
+        self._create_locks: Dict[str, threading.Lock] = {}
+
+    def handle(self, model: str) -> Optional[str]:
+        """Return a live cached-content name for ``model``, or None to send the instruction inline."""
+        with self._lock:
+            entry = self._handles.get(model)
+            if entry is not None and entry[1] > time.time():
+                return entry[0]
+            create_lock = self._create_locks.setdefault(model, threading.Lock())
+        with create_lock:
+            # Another thread may have created it while we waited
+            with self._lock:
+                entry = self._handles.get(model)
+            now = time.time()
+            if entry is not None and entry[1] > now:
+                return entry[0]
+            if not self._cacheable(model):
+                with self._lock:
+                    self._handles[model] = (None, float("inf"))
+                return None
+            try:
+                name: Optional[str] = self.backend.create(
+                    model=model,
+                    system_instruction=self.system_instruction,
+                    display_name=f"backyard-{self.version}",
+                    ttl_seconds=self.ttl_seconds,
+                )
+                # Refresh a minute early so an in-flight call never references an expired handle
+                valid_until = now + max(self.ttl_seconds - 60, 1)
+                logger.info("Created cached prompt %s for model %s (version %s)", name, model, self.version)
+            except Exception as exc:
+                name = None
+                valid_until = now + self.retry_after_seconds
+                logger.warning("Prompt caching unavailable for model %s, sending instruction inline: %s", model, exc)
+            with self._lock:
+                self._handles[model] = (name, valid_until)
+            return name
+
+    def _cacheable(self, model: str) -> bool:
+        minimum = self.backend.min_tokens(model)
+        if minimum <= 0:
+            return True
+        tokens = self.backend.count_tokens(model=model, text=self.system_instruction)
+        if tokens >= minimum:
+            return True
+        logger.info(
+            "Prompt caching disabled for model %s: instruction is %d tokens, below the %d-token minimum",
+            model, tokens, minimum,
+        )
+        return False
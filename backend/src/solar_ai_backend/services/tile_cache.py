@@ -0,0 +1,260 @@
+"""Slippy-map (XYZ) tile math and a local LRU tile cache.
+
+Used by the tile imagery mode: standard Web Mercator tiles are fetched once,
+kept on disk and stitched/cropped locally into the parcel-centered window
+for each property.
+"""
+from __future__ import annotations
+
+import io
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Protocol, Sequence, Tuple, TypeVar
+
+from ..utils.lazy_import import lazy_import
+
+# Only tiles mode stitches images; load PIL on first use
+Image = lazy_import("PIL.Image")
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+# Web Mercator is undefined at the poles; clamp like every slippy-map implementation does
+_MAX_LATITUDE = 85.05112878
+
+class _Located(Protocol):
+    """Anything with dict-style ``get("lat")`` / ``p["lat"]`` access (property dicts or records)."""
+
+    def get(self, key: str) -> Any: ...
+
+    def __getitem__(self, key: str) -> Any: ...
+
+
+P = TypeVar("P", bound=_Located)
+
+
+def lonlat_to_pixel(longitude: float, latitude: float, zoom: int) -> Tuple[float, float]:
+    """Project lon/lat to global Web Mercator pixel coordinates at ``zoom``."""
+    lat = max(min(latitude, _MAX_LATITUDE), -_MAX_LATITUDE)
+    scale = TILE_SIZE * (1 << zoom)
+    x = (longitude + 180.0) / 360.0 * scale
+    sin_lat = math.sin(math.radians(lat))
+    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+    return x, y
+
+
+def pixel_to_lonlat(x: float, y: float, zoom: int) -> Tuple[float, float]:
+    """Inverse of :func:`lonlat_to_pixel`."""
+    scale = TILE_SIZE * (1 << zoom)
+    longitude = x / scale * 360.0 - 180.0
+    n = math.pi - 2 * math.pi * y / scale
+    latitude = math.degrees(math.atan(math.sinh(n)))
+    return longitude, latitude
+
+
+def tile_for(longitude: float, latitude: float, zoom: int) -> Tuple[int, int]:
+    """Return the (x, y) tile containing a coordinate."""
+    x, y = lonlat_to_pixel(longitude, latitude, zoom)
+    return int(x // TILE_SIZE), int(y // TILE_SIZE)
+
+
+def snap_to_grid(longitude: float, latitude: float, zoom: int, cell_px: int) -> Tuple[float, float]:
+    """Snap a coordinate to the center of its ``cell_px``-pixel Web Mercator grid cell at ``zoom``.
+
+    A pixel at ``zoom`` is the ground resolution of imagery rendered at that
+    zoom, so the cell is a fixed fraction of an image footprint. Points in the
+    same cell map to the same center. ``cell_px <= 1`` returns the input unchanged.
+    """
+    if cell_px <= 1:
+        return longitude, latitude
+    x, y = lonlat_to_pixel(longitude, latitude, zoom)
+    cx = (math.floor(x / cell_px) + 0.5) * cell_px
+    cy = (math.floor(y / cell_px) + 0.5) * cell_px
+    return pixel_to_lonlat(cx, cy, zoom)
+
+
+def spiral_offsets(count: int) -> List[Tuple[int, int]]:
+    """First ``count`` cells of a square spiral on an integer grid, starting at (0, 0)."""
+    offsets: List[Tuple[int, int]] = []
+    x = y = 0
+    dx, dy = 1, 0
+    leg, steps, turns = 1, 0, 0
+    while len(offsets) < count:
+        offsets.append((x, y))
+        x, y = x + dx, y + dy
+        steps += 1
+        if steps == leg:
+            steps = 0
+            dx, dy = -dy, dx
+            turns += 1
+            if turns % 2 == 0:
+                leg += 1
+    return offsets
+
+
+def window_centers(
+    longitude: float,
+    latitude: float,
+    *,
+    zoom: int,
+    width_px: int,
+    height_px: int,
+    count: int,
+) -> List[Tuple[float, float]]:
+    """Centers of ``count`` adjacent, non-overlapping imagery windows spiralling out from a coordinate.
+
+    Each window is ``width_px`` x ``height_px`` at ``zoom``; the first one is
+    centered on the input.
+    """
+    cx, cy = lonlat_to_pixel(longitude, latitude, zoom)
+    return [pixel_to_lonlat(cx + i * width_px, cy + j * height_px, zoom) for i, j in spiral_offsets(count)]
+
+
+def _morton(x: int, y: int) -> int:
+    """Interleave the bits of x and y (Z-order curve)."""
+    key = 0
+    for bit in range(32):
+        key |= ((x >> bit) & 1) << (2 * bit) | ((y >> bit) & 1) << (2 * bit + 1)
+    return key
+
+
+def spatial_order(properties: Sequence[P], zoom: int) -> List[P]:
+    """Sort properties along a Z-order curve of their tiles so neighbors are processed together.
+
+    Properties without coordinates keep their relative order at the end.
+    """
+    located = [p for p in properties if p.get("lat") is not None and p.get("lng") is not None]
+    missing = [p for p in properties if p.get("lat") is None or p.get("lng") is None]
+    located.sort(key=lambda p: _morton(*tile_for(float(p["lng"]), float(p["lat"]), zoom)))
+    return located + missing
+
+
+def render_window(
+    fetch_tile: Callable[[int, int, int], bytes],
+    *,
+    longitude: float,
+    latitude: float,
+    zoom: int,
+    width_px: int,
+    height_px: int,
+    image_format: str = "PNG",
+) -> bytes:
+    """Stitch the tiles covering a ``width_px`` x ``height_px`` window centered on a coordinate.
+
+    ``fetch_tile(z, x, y)`` returns the encoded tile image. The result is the
+    encoded crop, pixel-aligned with a Static Maps image at the same zoom.
+    """
+    cx, cy = lonlat_to_pixel(longitude, latitude, zoom)
+    left = int(round(cx - width_px / 2))
+    top = int(round(cy - height_px / 2))
+    x0, y0 = left // TILE_SIZE, top // TILE_SIZE
+    x1, y1 = (left + width_px - 1) // TILE_SIZE, (top + height_px - 1) // TILE_SIZE
+    n_tiles = 1 << zoom
+
+    canvas = Image.new("RGB", ((x1 - x0 + 1) * TILE_SIZE, (y1 - y0 + 1) * TILE_SIZE))
+    for ty in range(y0, y1 + 1):
+        if ty < 0 or ty >= n_tiles:
+            continue
+        for tx in range(x0, x1 + 1):
+            data = fetch_tile(zoom, tx % n_tiles, ty)
+            with Image.open(io.BytesIO(data)) as tile:
+                canvas.paste(tile.convert("RGB"), ((tx - x0) * TILE_SIZE, (ty - y0) * TILE_SIZE))
+
+    offset_x, offset_y = left - x0 * TILE_SIZE, top - y0 * TILE_SIZE
+    crop = canvas.crop((offset_x, offset_y, offset_x + width_px, offset_y + height_px))
+    out = io.BytesIO()
+    crop.save(out, format=image_format)
+    return out.getvalue()
+
+
+class TileCache:
+    """On-disk tile cache with LRU eviction by tile count.
+
+    Tiles are stored as ``<root>/<z>/<x>/<y>.tile``. The recency order is kept in
+    memory and rebuilt from file modification times on startup.
+    """
+
+    def __init__(self, root: str, *, max_tiles: int = 20000) -> None:
+        self.root = root
+        self.max_tiles = max_tiles
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[Tuple[int, int, int], None]" = OrderedDict()
+        self._load_index()
+
+    def _path(self, z: int, x: int, y: int) -> str:
+        return os.path.join(self.root, str(z), str(x), f"{y}.tile")
+
+    def _load_index(self) -> None:
+        entries: List[Tuple[float, Tuple[int, int, int]]] = []
+        if not os.path.isdir(self.root):
+            return
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith(".tile"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    rel = os.path.relpath(path, self.root).split(os.sep)
+                    key = (int(rel[0]), int(rel[1]), int(rel[2][: -len(".tile")]))
+                    entries.append((os.path.getmtime(path), key))
+                except (ValueError, IndexError, OSError):
+                    continue
+        for _, key in sorted(entries):
+            self._lru[key] = None
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def get(self, z: int, x: int, y: int) -> Optional[bytes]:
+        key = (z, x, y)
+        with self._lock:
+            if key not in self._lru:
+                self.misses += 1
+                return None
+            self._lru.move_to_end(key)
+        try:
+            with open(self._path(z, x, y), "rb") as fh:
+                data = fh.read()
+        except OSError:
+            with self._lock:
+                self._lru.pop(key, None)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, z: int, x: int, y: int, data: bytes) -> None:
+        path = self._path(z, x, y)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            logger.debug("Failed to write tile %s/%s/%s", z, x, y, exc_info=True)
+            return
+        with self._lock:
+            self._lru[(z, x, y)] = None
+            self._lru.move_to_end((z, x, y))
+            evicted = []
+            while len(self._lru) > self.max_tiles:
+                evicted.append(self._lru.popitem(last=False)[0])
+        for key in evicted:
+            try:
+                os.remove(self._path(*key))
+            except OSError:
+                pass
+
+    def get_or_fetch(self, z: int, x: int, y: int, fetch: Callable[[int, int, int], bytes]) -> bytes:
+        data = self.get(z, x, y)
+        if data is None:
+            data = fetch(z, x, y)
+            self.put(z, x, y, data)
+        return data
@@ -1,27 +1,103 @@
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
+from functools import lru_cache
+import hashlib
 import logging
 import json
+import urllib.parse
 
-import httpx
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
-from PIL import Image
 import io
 
 from ..config import get_settings
+from ..utils.lazy_import import is_available, lazy_import
+from ..utils.metrics import observe_stage, record_cache, record_error
+from ..utils.sqlite_cache import SqliteCache
+from .prompt_cache import GeminiPromptCacheBackend, LocalPromptCacheBackend, PromptCache, PromptCacheBackend
+
+# Loaded on first use to keep app import (serverless cold start) cheap
+httpx = lazy_import("httpx")
+genai = lazy_import("google.generativeai")
+Image = lazy_import("PIL.Image")
 
 
 logger = logging.getLogger(__name__)
 
+VALID_BACKYARD_STATUSES = ("undeveloped", "partially_developed", "fully_landscaped", "uncertain")
+
+# Bump whenever SYSTEM_INSTRUCTION or the per-property suffix changes; it is part of every vision cache key.
+PROMPT_VERSION = "backyard-v3"
+
+SYSTEM_INSTRUCTION = """You are a backyard development analyst. Analyze the top-down satellite image (~512×512 px, zoom≈20) centered on a residential property and determine the development status of the backyard area.
+
+Ignore any pins, map markers, overlays, or cartographic artifacts. Focus on the outdoor space behind the main building structure.
+
+Visual cues for backyard classification:
+- "undeveloped": Large areas of bare dirt, sparse grass, minimal or no landscaping, no pools, patios, decks, or hardscape features.
+- "partially_developed": Some landscaping (trees, shrubs, grass) but significant undeveloped space, or basic features like a simple deck without full landscaping.
+- "fully_landscaped": Mature landscaping, pools, patios, decks, extensive hardscape, well-maintained gardens, or clearly developed outdoor living spaces.
+- "uncertain": Image quality too poor, backyard not visible, or ambiguous development status.
+
+Do NOT confuse:
+- Front yards with backyards (focus on the area behind the main structure).
+- Temporary features (construction, vehicles) with permanent development.
+- Small decorative elements with significant development.
+
+The image comes from a satellite imagery provider and may be a static render or stitched map tiles. Each request gives the property location and a decision threshold (THRESHOLD).
+
+Return ONLY a valid JSON object with this exact structure (no markdown, no code blocks, just the JSON):
+{
+  "backyard_status": "undeveloped" | "partially_developed" | "fully_landscaped" | "uncertain",
+  "confidence": 0.0-1.0,
+  "notes": "Brief explanation"
+}
+
+If your confidence is below THRESHOLD, return "backyard_status": "uncertain".
+"""
+
+# Query parameters that carry credentials; they are dropped from cache keys so a key rotation keeps the cache warm
+_CREDENTIAL_PARAMS = ("key", "access_token", "signature")
+
+
+# Provider whose image is exactly what its URL renders; its results are keyed by URL alone
+_URL_KEYED_PROVIDER = "google_static"
+
+
+def vision_cache_key(image_url: str, prompt_version: str = PROMPT_VERSION, provider: Optional[str] = None) -> str:
+    """Return a stable cache key for an image URL and prompt version, ignoring credential parameters.
+
+    Other providers are part of the key: tile renders, for one, reuse the
+    Static Maps URL but are a different image.
+    """
+    parts = urllib.parse.urlsplit(image_url)
+    query = [(k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True) if k not in _CREDENTIAL_PARAMS]
+    normalized = urllib.parse.urlunsplit((parts.scheme, parts.netloc, parts.path, urllib.parse.urlencode(query), ""))
+    if provider is not None and provider != _URL_KEYED_PROVIDER:
+        normalized = f"{provider}\n{normalized}"
+    return hashlib.sha256(f"{prompt_version}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def get_prompt_cache() -> PromptCache:
+    """Process-wide cached-content registry for SYSTEM_INSTRUCTION."""
+    settings = get_settings()
+    backend: PromptCacheBackend
+    if settings.vision_prompt_cache_backend == "local":
+        backend = LocalPromptCacheBackend()
+    else:
+        backend = GeminiPromptCacheBackend(min_tokens=settings.vision_prompt_cache_min_tokens)
+    return PromptCache(
+        backend,
+        system_instruction=SYSTEM_INSTRUCTION,
+        version=PROMPT_VERSION,
+        ttl_seconds=settings.vision_prompt_cache_ttl_seconds,
+    )
+
 
 class GeminiVisionService:
     """Google Gemini Vision client wrapper for backyard analysis using image URLs."""
 
     def __init__(self) -> None:
         self.settings = get_settings()
-        self._genai_available = genai is not None
+        self._genai_available = is_available(genai)
 
         if not self._genai_available:
             logger.error("google-generativeai package not installed. Vision service will not work.")
@@ -43,18 +119,58 @@ class GeminiVisionService:
                 # Fallback to known working models
                 self._available_models = ["gemini-pro", "gemini-pro-vision"]
         self._http = httpx.Client(timeout=self.settings.vision_timeout_seconds)
-        # Simple in-memory cache to avoid duplicate Gemini calls per image URL.
-        # Cache format: { image_url: (timestamp_seconds, parsed_response_dict) }
-        self._cache: dict[str, tuple[float, Dict[str, Any]]] = {}
+        # Durable cache shared across requests and workers to avoid duplicate Gemini calls per image.
+        # Values are the parsed Gemini JSON; the confidence threshold is applied on read.
+        self._cache = SqliteCache(self.settings.vision_cache_path, namespace="vision")
         self._cache_ttl = getattr(self.settings, "vision_cache_ttl_seconds", 3600)
 
+    @property
+    def available(self) -> bool:
+        """True when Gemini calls can actually be made (package installed and API key set)."""
+        return self._genai_available and bool(self.settings.gemini_api_key)
+
     def close(self) -> None:
         try:
             self._http.close()
         except Exception:
             logger.debug("Failed to close http client", exc_info=True)
 
-    def classify(self, *, image_url: str, model: Optional[str] = None, confidence_threshold: Optional[float] = None, longitude: Optional[float] = None, latitude: Optional[float] = None) -> Dict[str, Any]:
+    def get_cached(self, image_url: str, *, provider: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Return the cached parsed Gemini response for an image URL (rendered by ``provider``), if any."""
+        if not getattr(self.settings, "vision_cache_enabled", True) or not image_url:
+            return None
+        cache = getattr(self, "_cache", None)
+        if cache is None:
+            return None
+        parsed = cache.get(vision_cache_key(image_url, provider=provider))
+        return parsed if isinstance(parsed, dict) else None
+
+    def put_cached(
+        self,
+        image_url: str,
+        parsed: Dict[str, Any],
+        *,
+        ttl_seconds: Optional[float] = None,
+        prompt_version: str = PROMPT_VERSION,
+        provider: Optional[str] = None,
+    ) -> None:
+        """Store a parsed Gemini response for an image URL, keyed by the prompt version that produced it."""
+        if not getattr(self.settings, "vision_cache_enabled", True) or not image_url:
+            return
+        cache = getattr(self, "_cache", None)
+        if cache is None:
+            return
+        cache.set(vision_cache_key(image_url, prompt_version, provider), parsed, ttl_seconds if ttl_seconds is not None else self._cache_ttl)
+
+    def download_image(self, image_url: str) -> Tuple[bytes, str]:
+        """Download an image and return its bytes and MIME type."""
+        with observe_stage("image_download"):
+            resp = self._http.get(image_url)
+            resp.raise_for_status()
+        return resp.content, resp.headers.get("content-type", "image/png").split(";")[0]
+
+    def resolve_model(self, model: Optional[str] = None) -> str:
+        """Map the requested model name onto an available Gemini model."""
         # Get model from parameter or settings, but ensure it's a Gemini model
         requested_model = model or self.settings.vision_model
         
@@ -91,7 +207,96 @@ class GeminiVisionService:
                     logger.warning(f"Using available model '{use_model}' (may be preview/experimental)")
         else:
             use_model = requested_model
-            
+        return use_model
+
+    def build_prompt(self, *, longitude: Optional[float], latitude: Optional[float], threshold: float) -> str:
+        """Return the per-property suffix sent alongside SYSTEM_INSTRUCTION."""
+        return f"Location: (lon, lat) = {longitude}, {latitude}\nTHRESHOLD: {threshold}"
+
+    def prompt_handle(self, model: str) -> Optional[str]:
+        """Return the cached-content name holding SYSTEM_INSTRUCTION for ``model``, if available."""
+        if not self.settings.vision_prompt_cache_enabled:
+            return None
+        return get_prompt_cache().handle(model)
+
+    def _generative_model(self, model: str) -> Any:
+        generation_config = genai.types.GenerationConfig(
+            temperature=0,
+            response_mime_type="application/json",
+        )
+        handle = self.prompt_handle(model)
+        if handle:
+            return genai.GenerativeModel.from_cached_content(handle, generation_config=generation_config)
+        return genai.GenerativeModel(model, generation_config=generation_config, system_instruction=SYSTEM_INSTRUCTION)
+
+    def parse_content(self, content: str) -> Dict[str, Any]:
+        """Parse Gemini's text output into a dict, tolerating markdown code fences."""
+        try:
+            parsed = json.loads(content) if content else {}
+        except json.JSONDecodeError as e:
+            logger.warning("Failed to parse Gemini JSON content: %s. Content: %s", e, content)
+            # Try to extract JSON from markdown code blocks if present
+            try:
+                if "```json" in content:
+                    json_start = content.find("```json") + 7
+                    json_end = content.find("```", json_start)
+                    content = content[json_start:json_end].strip()
+                    parsed = json.loads(content)
+                elif "```" in content:
+                    json_start = content.find("```") + 3
+                    json_end = content.find("```", json_start)
+                    content = content[json_start:json_end].strip()
+                    parsed = json.loads(content)
+                else:
+                    parsed = {}
+            except Exception:
+                parsed = {}
+        except Exception as e:
+            logger.warning("Unexpected error parsing JSON: %s. Content: %s", e, content)
+            parsed = {}
+        return parsed if isinstance(parsed, dict) else {}
+
+    def to_result(self, parsed: Dict[str, Any], *, threshold: float, model: str) -> Dict[str, Any]:
+        """Map a parsed Gemini response onto our internal result shape."""
+        backyard_status = parsed.get("backyard_status")
+        confidence = parsed.get("confidence")
+        notes = parsed.get("notes")
+
+        # Validate backyard_status is one of the expected values
+        if backyard_status not in VALID_BACKYARD_STATUSES:
+            backyard_status = "uncertain"
+
+        # If confidence is below threshold, mark as uncertain
+        if confidence is not None and isinstance(confidence, (float, int)) and confidence < threshold:
+            backyard_status = "uncertain"
+
+        return {
+            "backyard_status": backyard_status,
+            "backyard_confidence": confidence,
+            "notes": notes,
+            "model": model,
+        }
+
+    def classify(
+        self,
+        *,
+        image_url: str,
+        model: Optional[str] = None,
+        confidence_threshold: Optional[float] = None,
+        longitude: Optional[float] = None,
+        latitude: Optional[float] = None,
+        image_loader: Optional[Callable[[], Any]] = None,
+        provider: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Classify the backyard in an image.
+
+        ``image_url`` and ``provider`` identify the image (and form the cache key). When
+        ``image_loader`` is given it supplies the image on a cache miss instead
+        of downloading ``image_url``; it may return bytes or a readable
+        file-like object such as a memory-mapped store entry, which is decoded
+        in place without copying.
+        """
+        use_model = self.resolve_model(model)
         threshold = confidence_threshold if confidence_threshold is not None else self.settings.vision_confidence_threshold
         
         logger.info(f"Using vision model: {use_model}, Gemini API key configured: {bool(self.settings.gemini_api_key)}")
@@ -106,81 +311,34 @@ class GeminiVisionService:
 
         # Check cache first
         try:
-            if getattr(self.settings, "vision_cache_enabled", True) and image_url:
-                entry = self._cache.get(image_url)
-                if entry:
-                    ts, parsed = entry
-                    import time
-
-                    if (time.time() - ts) < self._cache_ttl:
-                        logger.debug("Vision cache hit for %s", image_url)
-                        # Return cached shape, fill model field
-                        parsed_copy = dict(parsed)
-                        parsed_copy.setdefault("model", use_model)
-                        return parsed_copy
-                    else:
-                        # expired
-                        try:
-                            del self._cache[image_url]
-                        except Exception:
-                            pass
+            cached = self.get_cached(image_url, provider=provider)
+            record_cache("vision", cached is not None)
+            if cached is not None:
+                logger.debug("Vision cache hit for %s", image_url)
+                return self.to_result(cached, threshold=threshold, model=cached.get("model") or use_model)
         except Exception:
             logger.debug("Error checking vision cache", exc_info=True)
 
-        # Download image from URL
+        # Download image from URL (or load it through the caller-provided loader)
         try:
-            img_resp = self._http.get(image_url)
-            img_resp.raise_for_status()
-            img_data = img_resp.content
-            img = Image.open(io.BytesIO(img_data))
+            img_data = image_loader() if image_loader is not None else self.download_image(image_url)[0]
+            img = Image.open(img_data if hasattr(img_data, "read") else io.BytesIO(img_data))
         except Exception as e:
             logger.error("Failed to download image from %s: %s", image_url, e)
             return {"backyard_status": "uncertain", "backyard_confidence": 0.0, "notes": f"Failed to load image: {str(e)}", "model": use_model}
 
         # Prepare prompt for Gemini
-        prompt = f"""You are a backyard development analyst. Analyze this top-down satellite image (~512×512 px, zoom≈20) centered on a residential property and determine the development status of the backyard area.
-
-Ignore any pins, map markers, overlays, or cartographic artifacts. Focus on the outdoor space behind the main building structure.
-
-Visual cues for backyard classification:
-- "undeveloped": Large areas of bare dirt, sparse grass, minimal or no landscaping, no pools, patios, decks, or hardscape features.
-- "partially_developed": Some landscaping (trees, shrubs, grass) but significant undeveloped space, or basic features like a simple deck without full landscaping.
-- "fully_landscaped": Mature landscaping, pools, patios, decks, extensive hardscape, well-maintained gardens, or clearly developed outdoor living spaces.
-- "uncertain": Image quality too poor, backyard not visible, or ambiguous development status.
-
-Do NOT confuse:
-- Front yards with backyards (focus on the area behind the main structure).
-- Temporary features (construction, vehicles) with permanent development.
-- Small decorative elements with significant development.
-
-Context:
-- Source: Google Maps Static Satellite Image
-- Location: (lon, lat) = {longitude}, {latitude}
-- Decision threshold (THRESHOLD): {threshold}
-
-Return ONLY a valid JSON object with this exact structure (no markdown, no code blocks, just the JSON):
-{{
-  "backyard_status": "undeveloped" | "partially_developed" | "fully_landscaped" | "uncertain",
-  "confidence": 0.0-1.0,
-  "notes": "Brief explanation"
-}}
-
-If your confidence is below {threshold}, return "backyard_status": "uncertain".
-"""
+        prompt = self.build_prompt(longitude=longitude, latitude=latitude, threshold=threshold)
 
         try:
             # Use Gemini model for vision analysis
-            gemini_model = genai.GenerativeModel(use_model)
-            response = gemini_model.generate_content(
-                [prompt, img],
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0,
-                    response_mime_type="application/json",
-                )
-            )
+            gemini_model = self._generative_model(use_model)
+            with observe_stage("gemini"):
+                response = gemini_model.generate_content([prompt, img])
             content = response.text.strip()
             logger.debug("Gemini response: %s", content)
         except Exception as e:
+            record_error("gemini", e)
             error_msg = str(e)
             logger.error(f"Gemini API error with model '{use_model}': {error_msg}")
             
@@ -191,14 +349,9 @@ If your confidence is below {threshold}, return "backyard_status": "uncertain".
                     if fallback != use_model:
                         try:
                             logger.info(f"Trying fallback model: {fallback}")
-                            gemini_model = genai.GenerativeModel(fallback)
-                            response = gemini_model.generate_content(
-                                [prompt, img],
-                                generation_config=genai.types.GenerationConfig(
-                                    temperature=0,
-                                    response_mime_type="application/json",
-                                )
-                            )
+                            gemini_model = self._generative_model(fallback)
+                            with observe_stage("gemini"):
+                                response = gemini_model.generate_content([prompt, img])
                             content = response.text.strip()
                             use_model = fallback  # Update model name in response
                             logger.info(f"Successfully used fallback model: {fallback}")
@@ -213,58 +366,15 @@ If your confidence is below {threshold}, return "backyard_status": "uncertain".
                 return {"backyard_status": "uncertain", "backyard_confidence": 0.0, "notes": f"API error: {error_msg}", "model": use_model}
 
         # Parse JSON response from Gemini
-        try:
-            parsed = json.loads(content) if content else {}
-        except json.JSONDecodeError as e:
-            logger.warning("Failed to parse Gemini JSON content: %s. Content: %s", e, content)
-            # Try to extract JSON from markdown code blocks if present
-            try:
-                if "```json" in content:
-                    json_start = content.find("```json") + 7
-                    json_end = content.find("```", json_start)
-                    content = content[json_start:json_end].strip()
-                    parsed = json.loads(content)
-                elif "```" in content:
-                    json_start = content.find("```") + 3
-                    json_end = content.find("```", json_start)
-                    content = content[json_start:json_end].strip()
-                    parsed = json.loads(content)
-                else:
-                    parsed = {}
-            except Exception:
-                parsed = {}
-        except Exception as e:
-            logger.warning("Unexpected error parsing JSON: %s. Content: %s", e, content)
-            parsed = {}
+        with observe_stage("vision_parse"):
+            parsed = self.parse_content(content)
 
         # Cache the parsed result if enabled
         try:
-            if getattr(self.settings, "vision_cache_enabled", True) and image_url:
-                import time
-
-                self._cache[image_url] = (time.time(), parsed)
+            self.put_cached(image_url, dict(parsed, model=use_model), provider=provider)
         except Exception:
             logger.debug("Failed to write to vision cache", exc_info=True)
 
-        # Map schema to our internal shape
-        backyard_status = parsed.get("backyard_status") if isinstance(parsed, dict) else None
-        confidence = parsed.get("confidence") if isinstance(parsed, dict) else None
-        notes = parsed.get("notes") if isinstance(parsed, dict) else None
-
-        # Validate backyard_status is one of the expected values
-        valid_statuses = ("undeveloped", "partially_developed", "fully_landscaped", "uncertain")
-        if backyard_status not in valid_statuses:
-            backyard_status = "uncertain"
-        
-        # If confidence is below threshold, mark as uncertain
-        if confidence is not None and isinstance(confidence, (float, int)) and confidence < threshold:
-            backyard_status = "uncertain"
-
-        result = {
-            "backyard_status": backyard_status,
-            "backyard_confidence": confidence,
-            "notes": notes,
-            "model": use_model,
-        }
-        logger.info(f"Vision classification result: backyard_status={backyard_status}, confidence={confidence}, model={use_model}")
+        result = self.to_result(parsed, threshold=threshold, model=use_model)
+        logger.info(f"Vision classification result: backyard_status={result['backyard_status']}, confidence={result['backyard_confidence']}, model={use_model}")
         return result
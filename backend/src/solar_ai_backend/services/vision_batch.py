@@ -0,0 +1,400 @@
+"""Offline bulk classification through Gemini batch prediction.
+
+Classify requests are written to a JSONL file, submitted through a
+:class:`BatchBackend`, polled until the job finishes and the responses are
+ingested into the vision cache. Interactive ``/leads`` calls for the same
+properties are then answered from cache without touching Gemini.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from ..utils.lazy_import import is_available, lazy_import
+
+# Loaded on first use
+httpx = lazy_import("httpx")
+genai = lazy_import("google.generativeai")
+
+from .vision_agent import PROMPT_VERSION, SYSTEM_INSTRUCTION, GeminiVisionService
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_PREPARING = "preparing"
+BATCH_PENDING = "pending"
+BATCH_RUNNING = "running"
+BATCH_SUCCEEDED = "succeeded"
+BATCH_FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    """One property to classify offline."""
+
+    image_url: str
+    longitude: Optional[float] = None
+    latitude: Optional[float] = None
+
+
+class BatchBackend:
+    """Interface for batch-prediction providers."""
+
+    # False for stand-ins whose answers must not be written to the vision cache
+    cacheable = True
+
+    def submit(self, requests_path: Path, *, model: str) -> str:
+        """Submit a JSONL request file and return the provider job id."""
+        raise NotImplementedError
+
+    def status(self, job_id: str) -> str:
+        """Return one of the ``BATCH_*`` states for a job."""
+        raise NotImplementedError
+
+    def download_results(self, job_id: str, dest: Path) -> Path:
+        """Write the JSONL responses of a finished job to ``dest``."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+def _work_dir(path: str) -> Path:
+    work_dir = Path(path)
+    try:
+        work_dir.mkdir(parents=True, exist_ok=True)
+    except OSError as exc:
+        raise ValueError(f"Batch directory {path} is not usable: {exc}") from exc
+    return work_dir
+
+
+def _manifest_path(work_dir: Path, batch_id: str) -> Path:
+    return work_dir / f"{batch_id}.manifest.json"
+
+
+def _save_manifest(work_dir: Path, batch_id: str, manifest: Dict[str, Any]) -> None:
+    # Written whole and swapped in, since polls read it while the batch is being prepared
+    path = _manifest_path(work_dir, batch_id)
+    tmp = path.with_suffix(".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh)
+        os.replace(tmp, path)
+    except OSError as exc:
+        raise ValueError(f"Failed to write batch manifest {path}: {exc}") from exc
+
+
+def create_batch(work_dir: str) -> str:
+    """Register a new batch in the ``preparing`` state and return its id."""
+    batch_id = f"vision-{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    _save_manifest(_work_dir(work_dir), batch_id, {"batch_id": batch_id, "state": BATCH_PREPARING, "created_at": time.time()})
+    return batch_id
+
+
+def fail_batch(work_dir: str, batch_id: str, error: str) -> None:
+    """Record that a batch could not be prepared or submitted."""
+    _save_manifest(
+        _work_dir(work_dir), batch_id, {"batch_id": batch_id, "state": BATCH_FAILED, "error": error, "failed_at": time.time()}
+    )
+
+
+def _default_local_responder(request: Dict[str, Any]) -> str:
+    return json.dumps({"backyard_status": "uncertain", "confidence": 0.0, "notes": "Local batch stand-in response"})
+
+
+class LocalBatchBackend(BatchBackend):
+    """File-based stand-in for the Gemini Batch API.
+
+    Jobs complete on submission: every request line is answered by ``responder``
+    (which receives the request body and returns Gemini's text output) and the
+    results are written next to the request file in the Batch API output format.
+    Without a responder every answer is an ``uncertain`` placeholder, so those
+    results are never ingested into the vision cache.
+    """
+
+    def __init__(self, work_dir: str, *, responder: Optional[Callable[[Dict[str, Any]], str]] = None) -> None:
+        self.work_dir = _work_dir(work_dir)
+        self.responder = responder or _default_local_responder
+        self.cacheable = responder is not None
+
+    def _results_path(self, job_id: str) -> Path:
+        return self.work_dir / f"{job_id}.output.jsonl"
+
+    def submit(self, requests_path: Path, *, model: str) -> str:
+        job_id = f"local-{uuid.uuid4().hex[:12]}"
+        with open(requests_path, "r", encoding="utf-8") as src, open(self._results_path(job_id), "w", encoding="utf-8") as dst:
+            for line in src:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                try:
+                    text = self.responder(entry.get("request") or {})
+                    out = {"key": entry.get("key"), "response": {"candidates": [{"content": {"parts": [{"text": text}]}}]}}
+                except Exception as exc:
+                    out = {"key": entry.get("key"), "error": {"message": str(exc)}}
+                dst.write(json.dumps(out) + "\n")
+        return job_id
+
+    def status(self, job_id: str) -> str:
+        return BATCH_SUCCEEDED if self._results_path(job_id).exists() else BATCH_FAILED
+
+    def download_results(self, job_id: str, dest: Path) -> Path:
+        shutil.copyfile(self._results_path(job_id), dest)
+        return dest
+
+
+class GeminiBatchBackend(BatchBackend):
+    """Gemini Batch API (``batchGenerateContent``) over REST, with file input."""
+
+    def __init__(self, *, api_key: str, base_url: str = "https://generativelanguage.googleapis.com", timeout_seconds: float = 60.0) -> None:
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self._http = httpx.Client(timeout=timeout_seconds, headers={"x-goog-api-key": api_key})
+
+    def close(self) -> None:
+        try:
+            self._http.close()
+        except Exception:
+            logger.debug("Failed to close http client", exc_info=True)
+
+    def submit(self, requests_path: Path, *, model: str) -> str:
+        if not is_available(genai):
+            raise ValueError("google-generativeai package not installed")
+        genai.configure(api_key=self.api_key)
+        uploaded = genai.upload_file(str(requests_path), mime_type="application/jsonl", display_name=requests_path.name)
+        body = {"batch": {"display_name": requests_path.stem, "input_config": {"file_name": uploaded.name}}}
+        try:
+            resp = self._http.post(f"{self.base_url}/v1beta/models/{model}:batchGenerateContent", json=body)
+            resp.raise_for_status()
+        except httpx.HTTPError as exc:
+            raise ValueError(f"Batch submission failed: {exc}") from exc
+        job_id = (resp.json() or {}).get("name")
+        if not job_id:
+            raise ValueError("Batch submission returned no job name")
+        logger.info("Submitted Gemini batch %s (%s)", job_id, requests_path)
+        return job_id
+
+    def _get_job(self, job_id: str) -> Dict[str, Any]:
+        try:
+            resp = self._http.get(f"{self.base_url}/v1beta/{job_id}")
+            resp.raise_for_status()
+        except httpx.HTTPError as exc:
+            raise ValueError(f"Batch status request failed: {exc}") from exc
+        return resp.json() or {}
+
+    def status(self, job_id: str) -> str:
+        data = self._get_job(job_id)
+        state = str((data.get("metadata") or {}).get("state") or data.get("state") or "")
+        if state.endswith("SUCCEEDED"):
+            return BATCH_SUCCEEDED
+        if state.endswith(("FAILED", "CANCELLED", "EXPIRED")):
+            return BATCH_FAILED
+        if state.endswith("PENDING"):
+            return BATCH_PENDING
+        return BATCH_RUNNING
+
+    def download_results(self, job_id: str, dest: Path) -> Path:
+        data = self._get_job(job_id)
+        output = data.get("response") or (data.get("metadata") or {}).get("output") or {}
+        responses_file = output.get("responsesFile")
+        if not responses_file:
+            raise ValueError(f"Batch {job_id} has no responses file")
+        try:
+            with self._http.stream("GET", f"{self.base_url}/download/v1beta/{responses_file}:download", params={"alt": "media"}) as resp:
+                resp.raise_for_status()
+                with open(dest, "wb") as fh:
+                    for chunk in resp.iter_bytes():
+                        fh.write(chunk)
+        except httpx.HTTPError as exc:
+            raise ValueError(f"Batch results download failed: {exc}") from exc
+        return dest
+
+
+class VisionBatchRunner:
+    """Prepare, submit, poll and ingest offline classification batches."""
+
+    def __init__(self, vision: GeminiVisionService, backend: BatchBackend, *, work_dir: str) -> None:
+        self.vision = vision
+        self.backend = backend
+        self.work_dir = _work_dir(work_dir)
+
+    def _load_manifest(self, batch_id: str) -> Dict[str, Any]:
+        path = _manifest_path(self.work_dir, batch_id)
+        if "/" in batch_id or not path.exists():
+            raise ValueError(f"Unknown batch job: {batch_id}")
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def _build_request(self, item: BatchItem, *, threshold: float) -> Optional[Dict[str, Any]]:
+        try:
+            data, mime_type = self.vision.download_image(item.image_url)
+        except Exception as exc:
+            logger.warning("Skipping batch item; failed to download %s: %s", item.image_url, exc)
+            return None
+        prompt = self.vision.build_prompt(longitude=item.longitude, latitude=item.latitude, threshold=threshold)
+        request: Dict[str, Any] = {
+            "contents": [
+                {
+                    "role": "user",
+                    "parts": [
+                        {"text": prompt},
+                        {"inline_data": {"mime_type": mime_type, "data": base64.b64encode(data).decode("ascii")}},
+                    ],
+                }
+            ],
+            "generation_config": {"temperature": 0, "response_mime_type": "application/json"},
+            # Inline, not a cached-content handle: a batch can run for up to a day, well past the
+            # prompt cache TTL, and an expired handle would fail every request in it
+            "system_instruction": {"parts": [{"text": SYSTEM_INSTRUCTION}]},
+        }
+        return request
+
+    def submit(
+        self,
+        batch_id: str,
+        items: Iterable[BatchItem],
+        *,
+        model: Optional[str] = None,
+        confidence_threshold: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Write uncached items of a batch from :func:`create_batch` to a JSONL file and submit it.
+
+        Returns the batch summary; its state is ``succeeded`` straight away when
+        nothing needed classifying.
+        """
+        use_model = self.vision.resolve_model(model)
+        threshold = confidence_threshold if confidence_threshold is not None else self.vision.settings.vision_confidence_threshold
+        requests_path = self.work_dir / f"{batch_id}.requests.jsonl"
+
+        keys: Dict[str, str] = {}
+        seen: set[str] = set()
+        skipped_cached = 0
+        with open(requests_path, "w", encoding="utf-8") as fh:
+            for item in items:
+                if item.image_url in seen:
+                    continue
+                seen.add(item.image_url)
+                if self.vision.get_cached(item.image_url) is not None:
+                    skipped_cached += 1
+                    continue
+                request = self._build_request(item, threshold=threshold)
+                if request is None:
+                    continue
+                key = f"req-{len(keys)}"
+                keys[key] = item.image_url
+                fh.write(json.dumps({"key": key, "request": request}) + "\n")
+
+        manifest: Dict[str, Any] = {
+            "batch_id": batch_id,
+            "state": BATCH_SUCCEEDED,
+            "provider_job_id": None,
+            "model": use_model,
+            "prompt_version": PROMPT_VERSION,
+            "items": keys,
+            "skipped_cached": skipped_cached,
+            "ingested": 0,
+        }
+        if keys:
+            manifest.update(
+                state=BATCH_PENDING,
+                provider_job_id=self.backend.submit(requests_path, model=use_model),
+                requests_path=str(requests_path),
+                submitted_at=time.time(),
+                ingested=None,
+            )
+            logger.info(
+                "Batch %s submitted as %s with %d requests (%d already cached)",
+                batch_id, manifest["provider_job_id"], len(keys), skipped_cached,
+            )
+        else:
+            os.remove(requests_path)
+        _save_manifest(self.work_dir, batch_id, manifest)
+        return self._summary(manifest, manifest["state"])
+
+    @staticmethod
+    def _summary(manifest: Dict[str, Any], state: str) -> Dict[str, Any]:
+        return {
+            "job_id": manifest["batch_id"],
+            "state": state,
+            "submitted": len(manifest.get("items") or {}),
+            "skipped_cached": manifest.get("skipped_cached", 0),
+            "ingested": manifest.get("ingested"),
+            "error": manifest.get("error"),
+        }
+
+    def poll(self, batch_id: str) -> Dict[str, Any]:
+        """Check a batch once and ingest its results as soon as the provider job has succeeded."""
+        manifest = self._load_manifest(batch_id)
+        if manifest["state"] != BATCH_PENDING:
+            return self._summary(manifest, manifest["state"])
+        state = self.backend.status(manifest["provider_job_id"])
+        if state == BATCH_SUCCEEDED:
+            self.ingest(batch_id)
+            manifest = self._load_manifest(batch_id)
+        return self._summary(manifest, state)
+
+    def wait(self, batch_id: str, *, poll_seconds: float, timeout_seconds: float) -> Dict[str, Any]:
+        """Block until the batch finishes (ingesting its results) or the timeout elapses."""
+        deadline = time.monotonic() + timeout_seconds
+        while True:
+            summary = self.poll(batch_id)
+            if summary["state"] in (BATCH_SUCCEEDED, BATCH_FAILED):
+                return summary
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Batch {batch_id} did not finish within {timeout_seconds}s")
+            time.sleep(poll_seconds)
+
+    def ingest(self, batch_id: str) -> int:
+        """Download a finished batch's responses and store them in the vision cache."""
+        manifest = self._load_manifest(batch_id)
+        items: Dict[str, str] = manifest["items"]
+        ingested = 0
+        if not self.backend.cacheable:
+            logger.warning("Batch %s ran on a stand-in backend; its results are not written to the vision cache", batch_id)
+        else:
+            ingested = self._ingest_results(manifest)
+        manifest.update(state=BATCH_SUCCEEDED, ingested=ingested)
+        _save_manifest(self.work_dir, batch_id, manifest)
+        logger.info("Batch %s ingested %d of %d results into the vision cache", batch_id, ingested, len(items))
+        return ingested
+
+    def _ingest_results(self, manifest: Dict[str, Any]) -> int:
+        batch_id, job_id = manifest["batch_id"], manifest["provider_job_id"]
+        items: Dict[str, str] = manifest["items"]
+        results_path = self.work_dir / f"{batch_id}.results.jsonl"
+        self.backend.download_results(job_id, results_path)
+
+        ttl = self.vision.settings.vision_batch_cache_ttl_seconds
+        # Results belong to the prompt the batch was built with, even if the prompt changed since
+        prompt_version = manifest.get("prompt_version") or PROMPT_VERSION
+        ingested = 0
+        with open(results_path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                image_url = items.get(entry.get("key"))
+                if image_url is None:
+                    continue
+                if entry.get("error"):
+                    logger.warning("Batch %s request %s failed: %s", batch_id, entry.get("key"), entry["error"])
+                    continue
+                candidates = (entry.get("response") or {}).get("candidates") or []
+                parts = ((candidates[0].get("content") or {}).get("parts") or []) if candidates else []
+                text = "".join(p.get("text", "") for p in parts).strip()
+                parsed = self.vision.parse_content(text)
+                if not parsed:
+                    continue
+                self.vision.put_cached(
+                    image_url, dict(parsed, model=manifest["model"]), ttl_seconds=ttl, prompt_version=prompt_version
+                )
+                ingested += 1
+        return ingested
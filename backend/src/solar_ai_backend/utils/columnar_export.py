@@ -0,0 +1,136 @@
+"""Parquet and Arrow IPC exports of leads with a fixed, typed schema.
+
+Columns are the same as the CSV/Excel exports (``LEAD_COLUMNS``). Each one
+has a stable Arrow type, so ``zpid`` is always a string and a missing price
+is a null float rather than an empty cell. pyarrow is optional; without it
+the writers raise ValueError.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, IO, Iterable, Iterator, List, Optional
+
+from .excel_export import LEAD_COLUMNS, lead_row
+from .lazy_import import is_available, lazy_import
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+else:
+    # Loaded on first use (pyarrow is heavy and only these routes need it)
+    pa = lazy_import("pyarrow")
+
+
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Leads per record batch / Parquet row group
+BATCH_ROWS = 10_000
+
+# Arrow type per export column
+_COLUMN_TYPES: Dict[str, str] = {
+    "address": "string",
+    "lat": "float64",
+    "lng": "float64",
+    "zpid": "string",
+    "price": "float64",
+    # Listings carry fractional values (e.g. lotSize in acres, 3.5 beds); keep them as in CSV/XLSX
+    "beds": "float64",
+    "baths": "float64",
+    "livingArea": "int64",
+    "lotSize": "float64",
+    "image_url": "string",
+    "backyard_status": "status",
+    "backyard_confidence": "float64",
+    "notes": "string",
+    "lead_score": "float64",
+}
+
+
+def _coerce_str(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _coerce_float(value: Any) -> Optional[float]:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _coerce_int(value: Any) -> Optional[int]:
+    number = _coerce_float(value)
+    return None if number is None or number != number else int(number)
+
+
+_COERCE: Dict[str, Callable[[Any], Any]] = {
+    "string": _coerce_str,
+    "status": _coerce_str,
+    "float64": _coerce_float,
+    "int64": _coerce_int,
+}
+
+
+def pyarrow_available() -> bool:
+    return is_available(pa)
+
+
+def _require_pyarrow() -> None:
+    if not pyarrow_available():
+        raise ValueError("pyarrow is not installed; Parquet and Arrow exports are unavailable")
+
+
+def lead_schema() -> pa.Schema:
+    """Arrow schema of the lead exports."""
+    _require_pyarrow()
+    types = {
+        "string": pa.string(),
+        # Few distinct values: dictionary-encoded
+        "status": pa.dictionary(pa.int8(), pa.string()),
+        "float64": pa.float64(),
+        "int64": pa.int64(),
+    }
+    return pa.schema(
+        [pa.field(header, types[_COLUMN_TYPES[header]]) for header, _ in LEAD_COLUMNS],
+        metadata={"source": "solar_ai_backend leads export", "schema_version": "2"},
+    )
+
+
+def iter_lead_batches(leads: Iterable[Dict[str, Any]], *, batch_rows: int = BATCH_ROWS) -> Iterator[pa.RecordBatch]:
+    """Convert leads into record batches of ``batch_rows`` rows, coercing each value to its column type."""
+    schema = lead_schema()
+    coerce = [_COERCE[_COLUMN_TYPES[header]] for header, _ in LEAD_COLUMNS]
+    columns: List[List[Any]] = [[] for _ in LEAD_COLUMNS]
+
+    def flush() -> pa.RecordBatch:
+        arrays = [pa.array(values, type=field.type) for values, field in zip(columns, schema)]
+        for values in columns:
+            values.clear()
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    for lead in leads:
+        for values, convert, value in zip(columns, coerce, lead_row(lead)):
+            values.append(convert(value))
+        if len(columns[0]) >= batch_rows:
+            yield flush()
+    if columns[0]:
+        yield flush()
+
+
+def write_leads_parquet(leads: Iterable[Dict[str, Any]], fh: IO[bytes], *, compression: str = "zstd") -> None:
+    """Write leads as a compressed Parquet file, one row group per batch."""
+    _require_pyarrow()
+    import pyarrow.parquet as pq
+
+    with pq.ParquetWriter(fh, lead_schema(), compression=compression) as writer:
+        for batch in iter_lead_batches(leads):
+            writer.write_batch(batch)
+
+
+def write_leads_arrow(leads: Iterable[Dict[str, Any]], fh: IO[bytes], *, compression: Optional[str] = "zstd") -> None:
+    """Write leads as an Arrow IPC stream with compressed record batches."""
+    _require_pyarrow()
+    import pyarrow.ipc as pa_ipc
+
+    options = pa_ipc.IpcWriteOptions(compression=compression)
+    with pa_ipc.new_stream(fh, lead_schema(), options=options) as writer:
+        for batch in iter_lead_batches(leads):
+            writer.write_batch(batch)
@@ -1,178 +1,126 @@
 from __future__ import annotations
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Sequence, Tuple, IO
 import base64
 import csv
-from io import BytesIO, StringIO
-from openpyxl import Workbook
+import os
+import tempfile
+from io import StringIO
+from .lazy_import import lazy_import
+
+# Loaded on first use: only the Excel exports need it
+openpyxl = lazy_import("openpyxl")
+
+
+# Export columns shared by the CSV and Excel writers: (header, path into the lead dict).
+# Columns are chosen for readability and Lovable ingestion (flat, simple types).
+LEAD_COLUMNS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("address", ("address",)),
+    ("lat", ("coordinates", "lat")),
+    ("lng", ("coordinates", "lng")),
+    ("zpid", ("zillow", "zpid")),
+    ("price", ("zillow", "price")),
+    ("beds", ("zillow", "beds")),
+    ("baths", ("zillow", "baths")),
+    ("livingArea", ("zillow", "livingArea")),
+    ("lotSize", ("zillow", "lotSize")),
+    ("image_url", ("imagery", "image_url")),
+    ("backyard_status", ("vision", "backyard_status")),
+    ("backyard_confidence", ("vision", "backyard_confidence")),
+    ("notes", ("vision", "notes")),
+    ("lead_score", ("lead_score",)),
+]
+LEAD_HEADERS = [header for header, _ in LEAD_COLUMNS]
+
+EXCEL_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def lead_row(lead: Dict[str, Any], columns: Sequence[Tuple[str, Tuple[str, ...]]] = LEAD_COLUMNS) -> List[Any]:
+    """Flatten one lead into the values of ``columns``."""
+    row = []
+    for _, path in columns:
+        value: Any = lead
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        row.append(value)
+    return row
+
+
+def write_leads_excel(leads: Iterable[Dict[str, Any]], fh: IO[bytes]) -> None:
+    """Write leads as an XLSX workbook to a binary file object.
+
+    Uses a write-only worksheet: rows are serialized as they are appended
+    instead of being kept as cell objects, so memory stays flat with the
+    number of leads.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Leads")
+    ws.append(LEAD_HEADERS)
+    for lead in leads:
+        ws.append(lead_row(lead))
+    wb.save(fh)
 
 
-def leads_to_excel_b64(leads: List[Dict[str, Any]], *, filename: str = "leads.xlsx") -> Dict[str, str]:
-    """Create an XLSX workbook from leads and return base64 + suggested filename.
+def spool_export(
+    write: Callable[[Iterable[Dict[str, Any]], IO[bytes]], None],
+    leads: Iterable[Dict[str, Any]],
+    *,
+    suffix: str,
+) -> str:
+    """Run an export writer into a temp file and return its path.
 
-    Columns are chosen for readability and Lovable ingestion (flat, simple types).
+    The caller owns the file and must delete it.
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Leads"
-
-    headers = [
-        "address",
-        "lat",
-        "lng",
-        "zpid",
-        "price",
-        "beds",
-        "baths",
-        "livingArea",
-        "lotSize",
-        "image_url",
-        "backyard_status",
-        "backyard_confidence",
-        "notes",
-        "lead_score",
-    ]
-    ws.append(headers)
+    fd, path = tempfile.mkstemp(prefix="leads-", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            write(leads, fh)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
 
-    for lead in leads:
-        address = lead.get("address")
-        coords = lead.get("coordinates") or {}
-        z = lead.get("zillow") or {}
-        img = lead.get("imagery") or {}
-        v = lead.get("vision") or {}
-
-        ws.append([
-            address,
-            (coords.get("lat")),
-            (coords.get("lng")),
-            (z.get("zpid")),
-            (z.get("price")),
-            (z.get("beds")),
-            (z.get("baths")),
-            (z.get("livingArea")),
-            (z.get("lotSize")),
-            (img.get("image_url")),
-            (v.get("backyard_status")),
-            (v.get("backyard_confidence")),
-            (v.get("notes")),
-            (lead.get("lead_score")),
-        ])
-
-    bio = BytesIO()
-    wb.save(bio)
-    bio.seek(0)
-    payload_b64 = base64.b64encode(bio.read()).decode("utf-8")
+
+def _excel_bytes(leads: Iterable[Dict[str, Any]]) -> bytes:
+    with tempfile.TemporaryFile() as fh:
+        write_leads_excel(leads, fh)
+        fh.seek(0)
+        return fh.read()
+
+
+def leads_to_excel_b64(leads: List[Dict[str, Any]], *, filename: str = "leads.xlsx") -> Dict[str, str]:
+    """Create an XLSX workbook from leads and return base64 + suggested filename."""
+    payload_b64 = base64.b64encode(_excel_bytes(leads)).decode("utf-8")
     return {"filename": filename, "base64": payload_b64}
 
 
 def leads_to_excel_bytes(leads: List[Dict[str, Any]]) -> bytes:
     """Create an XLSX workbook from leads and return raw bytes."""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Leads"
-
-    headers = [
-        "address",
-        "lat",
-        "lng",
-        "zpid",
-        "price",
-        "beds",
-        "baths",
-        "livingArea",
-        "lotSize",
-        "image_url",
-        "backyard_status",
-        "backyard_confidence",
-        "notes",
-        "lead_score",
-    ]
-    ws.append(headers)
+    return _excel_bytes(leads)
+
 
+def iter_leads_csv(leads: Iterable[Dict[str, Any]], *, chunk_size: int = 16 * 1024) -> Iterator[bytes]:
+    """Yield the CSV for ``leads`` as UTF-8 chunks of roughly ``chunk_size`` bytes.
+
+    Rows are encoded as ``leads`` is consumed, so a generator of leads is
+    never held in memory as a whole; only the current chunk is buffered.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(LEAD_HEADERS)
     for lead in leads:
-        address = lead.get("address")
-        coords = lead.get("coordinates") or {}
-        z = lead.get("zillow") or {}
-        img = lead.get("imagery") or {}
-        v = lead.get("vision") or {}
-
-        ws.append([
-            address,
-            (coords.get("lat")),
-            (coords.get("lng")),
-            (z.get("zpid")),
-            (z.get("price")),
-            (z.get("beds")),
-            (z.get("baths")),
-            (z.get("livingArea")),
-            (z.get("lotSize")),
-            (img.get("image_url")),
-            (v.get("backyard_status")),
-            (v.get("backyard_confidence")),
-            (v.get("notes")),
-            (lead.get("lead_score")),
-        ])
-
-    bio = BytesIO()
-    wb.save(bio)
-    bio.seek(0)
-    return bio.read()
+        writer.writerow(lead_row(lead))
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
 
 
 def leads_to_csv_bytes(leads: List[Dict[str, Any]]) -> bytes:
     """Create a CSV file from leads and return raw bytes."""
-    output = StringIO()
-    
-    # Define CSV headers
-    headers = [
-        "address",
-        "lat",
-        "lng",
-        "zpid",
-        "price",
-        "beds",
-        "baths",
-        "livingArea",
-        "lotSize",
-        "image_url",
-        "backyard_status",
-        "backyard_confidence",
-        "notes",
-        "lead_score",
-    ]
-    
-    writer = csv.DictWriter(output, fieldnames=headers)
-    writer.writeheader()
-    
-    for lead in leads:
-        # Extract nested data
-        coords = lead.get("coordinates") or {}
-        zillow = lead.get("zillow") or {}
-        imagery = lead.get("imagery") or {}
-        vision = lead.get("vision") or {}
-        
-        # Create flattened row
-        row = {
-            "address": lead.get("address"),
-            "lat": coords.get("lat"),
-            "lng": coords.get("lng"),
-            "zpid": zillow.get("zpid"),
-            "price": zillow.get("price"),
-            "beds": zillow.get("beds"),
-            "baths": zillow.get("baths"),
-            "livingArea": zillow.get("livingArea"),
-            "lotSize": zillow.get("lotSize"),
-            "image_url": imagery.get("image_url"),
-            "backyard_status": vision.get("backyard_status"),
-            "backyard_confidence": vision.get("backyard_confidence"),
-            "notes": vision.get("notes"),
-            "lead_score": lead.get("lead_score"),
-        }
-        writer.writerow(row)
-    
-    # Convert to bytes
-    csv_string = output.getvalue()
-    return csv_string.encode('utf-8')
+    return b"".join(iter_leads_csv(leads))
 
 
 def leads_to_csv_b64(leads: List[Dict[str, Any]], *, filename: str = "leads.csv") -> Dict[str, str]:
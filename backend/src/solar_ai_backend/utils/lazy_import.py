@@ -0,0 +1,80 @@
+"""Deferred imports for heavy dependencies.
+
+Importing the app should stay cheap (serverless cold starts, ``/health``),
+so modules like ``google.generativeai``, PIL, httpx, numpy, openpyxl and
+pyarrow are bound at import time as proxies and only imported on first
+attribute access.
+
+The import itself is a plain ``importlib.import_module`` under a module-level
+lock, so threads that touch a module for the first time at once (worker
+pools, concurrent cold-start requests) all see the fully initialised module.
+``importlib.util.LazyLoader`` is not used: before CPython 3.12.3 its proxies
+let those threads see a half-loaded module (gh-114763).
+
+Modules that are not installed come back as a placeholder whose attributes
+raise ImportError; check optional ones with :func:`is_available`. Code that
+needs a module's types in annotations imports it under ``TYPE_CHECKING``.
+"""
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import sys
+import threading
+from types import ModuleType
+from typing import Any, Optional
+
+# Re-entrant: importing one deferred module may touch another on the same thread
+_import_lock = threading.RLock()
+
+
+class _MissingModule(ModuleType):
+    """Stand-in for a module that is not installed."""
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        raise ImportError(f"{self.__name__} is not installed")
+
+
+class _DeferredModule(ModuleType):
+    """Proxy that imports the real module on first attribute access."""
+
+    _module: Optional[ModuleType] = None
+
+    def _load(self) -> ModuleType:
+        module = self._module
+        if module is None:
+            with _import_lock:
+                module = self._module
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self._module = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return ``name`` as a module that is imported on first use.
+
+    Finding the module only imports its parent packages. A module that is
+    already imported is returned as-is. When it is not installed, a
+    placeholder is returned (see :func:`is_available`).
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return _MissingModule(name)
+    if spec is None:
+        return _MissingModule(name)
+    return _DeferredModule(name)
+
+
+def is_available(module: ModuleType) -> bool:
+    """False when ``module`` is the placeholder for a package that is not installed."""
+    return not isinstance(module, _MissingModule)
@@ -0,0 +1,196 @@
+"""Prometheus metrics for the lead pipeline.
+
+Per-stage latency histograms and in-flight gauges, cache hit/miss and
+upstream error counters, and lead outcomes, exposed by ``GET /metrics``.
+prometheus_client is optional: without it (or with ``METRICS_ENABLED=false``)
+every helper is a no-op. Metric objects are created by :func:`init_metrics`
+at app startup (not import, so the cold import stays cheap), or on first
+use when the server skips startup. The helpers never raise into the code
+they observe; a failing metric is logged and skipped.
+
+With several worker processes, set ``PROMETHEUS_MULTIPROC_DIR`` so
+``/metrics`` aggregates all of them.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from ..config import get_settings
+from .lazy_import import is_available, lazy_import
+from .profiling import current_profile
+
+prometheus_client = lazy_import("prometheus_client")
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans cache hits (ms) to slow Gemini calls and large exports
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Metrics:
+    def __init__(self) -> None:
+        pc = prometheus_client
+        self.stage_seconds = pc.Histogram(
+            "solar_ai_stage_duration_seconds",
+            "Latency of a pipeline stage",
+            ["stage"],
+            buckets=_LATENCY_BUCKETS,
+        )
+        self.in_flight = pc.Gauge(
+            "solar_ai_stage_in_flight",
+            "Stage executions currently running",
+            ["stage"],
+            multiprocess_mode="livesum",
+        )
+        self.cache_events = pc.Counter(
+            "solar_ai_cache_requests_total",
+            "Cache lookups by cache and result",
+            ["cache", "result"],
+        )
+        self.upstream_errors = pc.Counter(
+            "solar_ai_upstream_errors_total",
+            "Failed upstream calls by upstream and error kind",
+            ["upstream", "error"],
+        )
+        self.leads = pc.Counter(
+            "solar_ai_leads_total",
+            "Classified properties by outcome (yielded as a lead or filtered out)",
+            ["outcome"],
+        )
+
+
+_init_lock = threading.Lock()
+_initialized = False
+_instance: Optional[_Metrics] = None
+
+
+def _metrics() -> Optional[_Metrics]:
+    if _initialized:
+        return _instance
+    return init_metrics()
+
+
+def init_metrics() -> Optional[_Metrics]:
+    """Create the metric objects once per process; None when metrics are off or unavailable.
+
+    Called at app startup, before worker threads exist. The lock covers
+    servers that skip startup: two threads must not register the same metric.
+    """
+    global _initialized, _instance
+    with _init_lock:
+        if not _initialized:
+            try:
+                if is_available(prometheus_client) and get_settings().metrics_enabled:
+                    _instance = _Metrics()
+            except Exception:
+                logger.warning("Prometheus metrics unavailable; instrumentation is disabled", exc_info=True)
+                _instance = None
+            _initialized = True
+    return _instance
+
+
+def metrics_available() -> bool:
+    return _metrics() is not None
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    """Time a stage into its histogram and count it as in flight while it runs.
+
+    The duration also goes to the request's profile when it is being profiled.
+    """
+    m = _metrics()
+    profile = current_profile()
+    if m is None and profile is None:
+        yield
+        return
+    gauge = None
+    if m is not None:
+        try:
+            gauge = m.in_flight.labels(stage)
+            gauge.inc()
+        except Exception:
+            logger.debug("Metric update failed for stage %s", stage, exc_info=True)
+            gauge = None
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if m is not None:
+            try:
+                m.stage_seconds.labels(stage).observe(elapsed)
+                if gauge is not None:
+                    gauge.dec()
+            except Exception:
+                logger.debug("Metric update failed for stage %s", stage, exc_info=True)
+        if profile is not None:
+            profile.add_stage(stage, elapsed)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    m = _metrics()
+    if m is not None:
+        try:
+            m.cache_events.labels(cache, "hit" if hit else "miss").inc()
+        except Exception:
+            logger.debug("Cache metric update failed", exc_info=True)
+
+
+def error_kind(exc: BaseException) -> str:
+    """Short label for an upstream failure: ``http_<status>``, ``timeout``, ``transport`` or the exception name."""
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    if isinstance(status, int):
+        return f"http_{status}"
+    name = type(exc).__name__
+    if "Timeout" in name:
+        return "timeout"
+    if name in ("ConnectError", "ReadError", "WriteError", "RemoteProtocolError", "NetworkError"):
+        return "transport"
+    return name
+
+
+def record_error(upstream: str, error: "BaseException | str") -> None:
+    m = _metrics()
+    if m is not None:
+        try:
+            m.upstream_errors.labels(upstream, error if isinstance(error, str) else error_kind(error)).inc()
+        except Exception:
+            logger.debug("Error metric update failed", exc_info=True)
+
+
+def record_leads(yielded: int, filtered: int) -> None:
+    m = _metrics()
+    if m is None:
+        return
+    try:
+        if yielded:
+            m.leads.labels("yielded").inc(yielded)
+        if filtered:
+            m.leads.labels("filtered_fully_landscaped").inc(filtered)
+    except Exception:
+        logger.debug("Lead metric update failed", exc_info=True)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with their content type.
+
+    Raises ValueError when metrics are unavailable.
+    """
+    if _metrics() is None:
+        raise ValueError("Metrics are disabled or prometheus_client is not installed")
+    pc = prometheus_client
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = pc.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = pc.REGISTRY
+    return pc.generate_latest(registry), pc.CONTENT_TYPE_LATEST
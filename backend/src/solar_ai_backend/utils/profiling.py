@@ -0,0 +1,212 @@
+"""Request-scoped profiling for admin-gated lead runs.
+
+``profile_run(level)`` opens a profile for the current request. While it is
+active, every ``observe_stage`` span on the request thread is added to it,
+together with per-property timings (queue wait, download, Gemini, parse).
+The result is rendered as a ``Server-Timing`` header and, from level
+``trace`` up, as a JSON trace. Level ``cpu`` also samples the request
+thread's stack and adds a summary of its hot spots.
+
+Levels: ``timing`` (header only) < ``trace`` (+ JSON trace) < ``cpu`` (+ sampling profile).
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+PROFILE_LEVELS = ("timing", "trace", "cpu")
+
+# Stage name -> per-property trace field
+_PROPERTY_FIELDS = {
+    "queue_wait": "queue_wait_ms",
+    # Covers tile renders too (tile_download spans nest inside it)
+    "image_download": "download_ms",
+    "gemini": "gemini_ms",
+    "vision_parse": "parse_ms",
+}
+
+_active: ContextVar[Optional["RunProfile"]] = ContextVar("solar_ai_profile", default=None)
+
+
+class RunProfile:
+    """Stage totals and per-property timings of one profiled request."""
+
+    def __init__(self, level: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.level = level
+        self.started = time.perf_counter()
+        self.total_seconds: Optional[float] = None
+        # stage -> [seconds, count]
+        self.stages: Dict[str, List[float]] = {}
+        self.properties: Dict[int, Dict[str, Any]] = {}
+        self.cpu: Optional[Dict[str, Any]] = None
+        self._current: Optional[Dict[str, Any]] = None
+        # Downloads are recorded from prefetch threads
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage: str, seconds: float, *, index: Optional[int] = None) -> None:
+        """Add ``seconds`` to ``stage``; also to property ``index``, or to the current property."""
+        with self._lock:
+            entry = self.stages.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+            record = self.properties.setdefault(index, {"index": index}) if index is not None else self._current
+            field = _PROPERTY_FIELDS.get(stage)
+            if record is not None and field is not None:
+                record[field] = round(record.get(field, 0.0) + seconds * 1000, 3)
+
+    @contextmanager
+    def timed(self, stage: str, *, index: Optional[int] = None) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(stage, time.perf_counter() - started, index=index)
+
+    def begin_property(self, index: int, **fields: Any) -> None:
+        """Attribute request-thread stages to property ``index`` until the next one begins."""
+        with self._lock:
+            record = self.properties.setdefault(index, {"index": index})
+            record.update(fields)
+            self._current = record
+
+    def note_property(self, **fields: Any) -> None:
+        with self._lock:
+            if self._current is not None:
+                self._current.update(fields)
+
+    def end_property(self) -> None:
+        with self._lock:
+            self._current = None
+
+    def finish(self) -> None:
+        self.end_property()
+        self.total_seconds = time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value: one metric per stage plus ``total``.
+
+        Downloads run on prefetch threads, so their total can exceed the wall time.
+        """
+        parts = [f'{stage};desc="{int(count)}x";dur={seconds * 1000:.1f}' for stage, (seconds, count) in self.stages.items()]
+        total = self.total_seconds if self.total_seconds is not None else time.perf_counter() - self.started
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON trace of the run."""
+        total = self.total_seconds if self.total_seconds is not None else time.perf_counter() - self.started
+        return {
+            "id": self.id,
+            "level": self.level,
+            "total_ms": round(total * 1000, 3),
+            "stages": {
+                stage: {"ms": round(seconds * 1000, 3), "count": int(count)}
+                for stage, (seconds, count) in self.stages.items()
+            },
+            "properties": [self.properties[index] for index in sorted(self.properties)],
+            "cpu": self.cpu,
+        }
+
+
+def current_profile() -> Optional[RunProfile]:
+    """Profile of the request running in this context, if it is being profiled."""
+    return _active.get()
+
+
+# Leaf frames in these stdlib modules are blocked on a lock, socket or timer rather than running
+_IDLE_MODULES = ("threading.py", "selectors.py", "socket.py", "ssl.py", "queue.py", os.path.join("concurrent", "futures", "_base.py"))
+
+
+def _frame_label(code: Any) -> str:
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}:{code.co_firstlineno}"
+
+
+class StackSampler:
+    """Sample one thread's Python stack every ``interval`` seconds from a background thread.
+
+    Standard library only (``sys._current_frames``). Samples whose leaf frame
+    is waiting in the stdlib (locks, sockets, queues) are counted as idle and
+    left out of the hot spots, so the summary approximates CPU time.
+    """
+
+    def __init__(self, thread_id: int, *, interval: float = 0.005, top: int = 15) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.top = top
+        self.samples = 0
+        self.idle = 0
+        self.self_counts: Counter = Counter()
+        self.cumulative_counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            if frame.f_code.co_filename.endswith(_IDLE_MODULES):
+                self.idle += 1
+                continue
+            self.self_counts[_frame_label(frame.f_code)] += 1
+            seen = set()
+            while frame is not None:
+                label = _frame_label(frame.f_code)
+                if label not in seen:
+                    seen.add(label)
+                    self.cumulative_counts[label] += 1
+                frame = frame.f_back
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop sampling and summarize: top functions by own and by cumulative samples."""
+        self._stop.set()
+        self._thread.join()
+        busy = max(self.samples - self.idle, 1)
+
+        def top(counts: Counter) -> List[Dict[str, Any]]:
+            return [
+                {"function": label, "samples": n, "percent": round(100.0 * n / busy, 1)}
+                for label, n in counts.most_common(self.top)
+            ]
+
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "idle_samples": self.idle,
+            "top_self": top(self.self_counts),
+            "top_cumulative": top(self.cumulative_counts),
+        }
+
+
+@contextmanager
+def profile_run(level: Optional[str]) -> Iterator[Optional[RunProfile]]:
+    """Profile the enclosed work at ``level``; yields None (and costs nothing) when ``level`` is None."""
+    if level is None:
+        yield None
+        return
+    if level not in PROFILE_LEVELS:
+        raise ValueError(f"Unknown profile level: {level}")
+    profile = RunProfile(level)
+    token = _active.set(profile)
+    sampler = StackSampler(threading.get_ident()) if level == "cpu" else None
+    if sampler is not None:
+        sampler.start()
+    try:
+        yield profile
+    finally:
+        if sampler is not None:
+            profile.cpu = sampler.stop()
+        profile.finish()
+        _active.reset(token)
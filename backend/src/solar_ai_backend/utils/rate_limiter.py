@@ -0,0 +1,283 @@
+"""Cross-process rate limiter backed by a local SQLite file.
+
+Every uvicorn worker (and every thread within one) draws from the same token
+bucket and the same monthly counter, so bursts from several workers no longer
+add up past the upstream per-second limit.
+"""
+from __future__ import annotations
+
+import datetime
+import email.utils
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call can't be admitted within the allowed wait or the monthly quota is used up.
+
+    Not a ValueError, so callers that treat ValueError as "no results" don't
+    swallow it. ``retry_after`` is the estimated seconds until a call would
+    be admitted; ``quota_exhausted`` tells the monthly quota apart from the
+    per-second rate.
+    """
+
+    def __init__(self, message: str, *, retry_after: Optional[float] = None, quota_exhausted: bool = False) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.quota_exhausted = quota_exhausted
+
+
+def _current_month() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m")
+
+
+def _seconds_to_next_month() -> float:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    start = datetime.datetime(now.year + now.month // 12, now.month % 12 + 1, 1, tzinfo=datetime.timezone.utc)
+    return (start - now).total_seconds()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a ``Retry-After`` header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+class SqliteRateLimiter:
+    """Token bucket refilled at ``per_second`` plus a calendar-month quota.
+
+    The bucket holds a single token, so calls are spaced evenly rather than
+    sent in bursts that a strict per-second limit upstream would reject.
+
+    ``acquire()`` blocks for up to ``max_wait_seconds`` waiting for a token
+    instead of failing straight away. ``per_second=0`` disables the rate and
+    ``monthly_quota=0`` the monthly limit. If the SQLite file is unusable,
+    calls are admitted without limiting.
+
+    After an upstream 429, :meth:`penalize` blocks every worker for the
+    upstream's ``Retry-After`` or, without one, for an exponential back-off
+    capped at ``max_backoff_seconds``.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        name: str,
+        per_second: float,
+        monthly_quota: int = 0,
+        max_wait_seconds: float = 10.0,
+        max_backoff_seconds: float = 60.0,
+    ) -> None:
+        self.path = path
+        self.name = name
+        self.per_second = per_second
+        self.capacity = 1.0
+        self.monthly_quota = monthly_quota
+        self.max_wait_seconds = max_wait_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._enabled = True
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS buckets ("
+                    " name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS monthly_usage ("
+                    " name TEXT NOT NULL, month TEXT NOT NULL, used INTEGER NOT NULL,"
+                    " PRIMARY KEY (name, month))"
+                )
+                # Upstream 429s: calls are held until ``until``; ``strikes`` counts 429s in a row
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS backoff ("
+                    " name TEXT PRIMARY KEY, until REAL NOT NULL, strikes INTEGER NOT NULL)"
+                )
+        except (OSError, sqlite3.Error):
+            logger.warning("Rate limiter store at %s unavailable; %s calls are not limited", path, name, exc_info=True)
+            self._enabled = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=max(self.max_wait_seconds, 1.0), isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Exclusive write transaction, so the read-modify-write is atomic across processes."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _used(self, conn: sqlite3.Connection, month: str) -> int:
+        row = conn.execute("SELECT used FROM monthly_usage WHERE name = ? AND month = ?", (self.name, month)).fetchone()
+        return int(row[0]) if row else 0
+
+    def _try_take(self) -> float:
+        """Take a token if one is available; otherwise return the seconds until one is."""
+        now = time.time()
+        month = _current_month()
+        with self._transaction() as conn:
+            if self.monthly_quota and self._used(conn, month) >= self.monthly_quota:
+                raise RateLimitExceeded(
+                    f"Monthly {self.name} quota of {self.monthly_quota} requests used up",
+                    retry_after=_seconds_to_next_month(),
+                    quota_exhausted=True,
+                )
+            backoff = conn.execute("SELECT until FROM backoff WHERE name = ?", (self.name,)).fetchone()
+            if backoff is not None and backoff[0] > now:
+                return backoff[0] - now
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            if self.per_second <= 0:
+                tokens = self.capacity
+            else:
+                tokens = self.capacity if row is None else min(self.capacity, row[0] + (now - row[1]) * self.per_second)
+            if tokens < 1.0:
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (self.name, tokens, now),
+                )
+                return (1.0 - tokens) / self.per_second
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (self.name, tokens - 1.0, now),
+            )
+            conn.execute(
+                "INSERT INTO monthly_usage (name, month, used) VALUES (?, ?, 1)"
+                " ON CONFLICT (name, month) DO UPDATE SET used = used + 1",
+                (self.name, month),
+            )
+            return 0.0
+
+    def acquire(self) -> float:
+        """Wait for permission to make one call; return the seconds spent waiting.
+
+        Raises RateLimitExceeded when the monthly quota is exhausted or no
+        token frees up within ``max_wait_seconds``.
+        """
+        if not self._enabled:
+            return 0.0
+        started = time.monotonic()
+        while True:
+            try:
+                wait_seconds = self._try_take()
+            except sqlite3.Error:
+                logger.debug("Rate limiter store failed; admitting %s call", self.name, exc_info=True)
+                return time.monotonic() - started
+            waited = time.monotonic() - started
+            if wait_seconds <= 0:
+                if waited > 0.05:
+                    logger.info("Waited %.2fs for a %s rate-limit slot", waited, self.name)
+                return waited
+            if waited + wait_seconds > self.max_wait_seconds:
+                raise RateLimitExceeded(
+                    f"{self.name} rate limit: no slot within {self.max_wait_seconds:.0f}s", retry_after=wait_seconds
+                )
+            time.sleep(wait_seconds)
+
+    def penalize(self, retry_after: Optional[float] = None) -> float:
+        """Hold every worker's calls after the upstream answered 429; return the back-off in seconds.
+
+        Uses ``retry_after`` (the upstream's Retry-After) when given. Otherwise
+        the back-off starts at one request interval and doubles with each 429
+        in a row, up to ``max_backoff_seconds``. A 429 that comes more than
+        ``max_backoff_seconds`` after the previous back-off ended starts over.
+        """
+        base = 1.0 / self.per_second if self.per_second > 0 else 1.0
+        if not self._enabled:
+            return retry_after if retry_after is not None else base
+        now = time.time()
+        try:
+            with self._transaction() as conn:
+                row = conn.execute("SELECT until, strikes FROM backoff WHERE name = ?", (self.name,)).fetchone()
+                strikes = row[1] if row is not None and now - row[0] <= self.max_backoff_seconds else 0
+                if retry_after is not None:
+                    delay = retry_after
+                else:
+                    delay = min(self.max_backoff_seconds, base * 2 ** min(strikes, 30))
+                conn.execute(
+                    "INSERT OR REPLACE INTO backoff (name, until, strikes) VALUES (?, ?, ?)",
+                    (self.name, now + delay, strikes + 1),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, 0, ?)",
+                    (self.name, now),
+                )
+        except sqlite3.Error:
+            logger.debug("Rate limiter penalize failed", exc_info=True)
+            return base
+        return delay
+
+    def sync_remaining(self, remaining: int) -> None:
+        """Align the monthly counter with the upstream's own count of remaining requests."""
+        if not self._enabled or not self.monthly_quota:
+            return
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO monthly_usage (name, month, used) VALUES (?, ?, ?)",
+                    (self.name, _current_month(), max(0, self.monthly_quota - remaining)),
+                )
+        except sqlite3.Error:
+            logger.debug("Rate limiter sync failed", exc_info=True)
+
+    def remaining(self) -> Dict[str, Any]:
+        """Current quota state: monthly usage/remaining and tokens available right now."""
+        month = _current_month()
+        state: Dict[str, Any] = {
+            "name": self.name,
+            "per_second": self.per_second,
+            "monthly_quota": self.monthly_quota or None,
+            "month": month,
+            "monthly_used": 0,
+            "monthly_remaining": None,
+            "available_now": int(self.capacity),
+            "backoff_seconds": 0.0,
+        }
+        if not self._enabled:
+            return state
+        try:
+            with self._connect() as conn:
+                used = self._used(conn, month)
+                row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?", (self.name,)).fetchone()
+                backoff = conn.execute("SELECT until FROM backoff WHERE name = ?", (self.name,)).fetchone()
+        except sqlite3.Error:
+            return state
+        state["monthly_used"] = used
+        if self.monthly_quota:
+            state["monthly_remaining"] = max(0, self.monthly_quota - used)
+        if row is not None and self.per_second > 0:
+            state["available_now"] = int(min(self.capacity, row[0] + (time.time() - row[1]) * self.per_second))
+        if backoff is not None and backoff[0] > time.time():
+            state["available_now"] = 0
+            state["backoff_seconds"] = round(backoff[0] - time.time(), 1)
+        return state
+
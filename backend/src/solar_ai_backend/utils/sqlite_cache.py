@@ -0,0 +1,124 @@
+"""Durable key/value cache with per-entry TTL, backed by a local SQLite file."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteCache:
+    """Small JSON key/value store shared across requests and worker processes.
+
+    Entries live in a single table partitioned by ``namespace``. Every operation
+    opens a short-lived connection so the cache is safe to use from threads and
+    from several uvicorn workers at once. Any SQLite failure degrades to a cache
+    miss instead of failing the request.
+    """
+
+    def __init__(self, path: str, *, namespace: str = "default", timeout_seconds: float = 5.0) -> None:
+        self.path = path
+        self.namespace = namespace
+        self.timeout_seconds = timeout_seconds
+        self._lock = threading.Lock()
+        self._enabled = True
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    " namespace TEXT NOT NULL,"
+                    " key TEXT NOT NULL,"
+                    " value TEXT NOT NULL,"
+                    " expires_at REAL,"
+                    " PRIMARY KEY (namespace, key))"
+                )
+        except (OSError, sqlite3.Error):
+            logger.warning("SQLite cache at %s unavailable; caching disabled", path, exc_info=True)
+            self._enabled = False
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=self.timeout_seconds)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for ``key`` or None when missing or expired."""
+        if not self._enabled:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+        except sqlite3.Error:
+            logger.debug("SQLite cache read failed for %s", key, exc_info=True)
+            return None
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return None
+        try:
+            return json.loads(value)
+        except ValueError:
+            logger.debug("Dropping undecodable cache entry %s", key)
+            self.delete(key)
+            return None
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store ``value`` (JSON-serializable) under ``key``; ``ttl_seconds=None`` never expires."""
+        if not self._enabled:
+            return
+        expires_at = time.time() + ttl_seconds if ttl_seconds is not None else None
+        try:
+            payload = json.dumps(value)
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (self.namespace, key, payload, expires_at),
+                )
+        except (TypeError, ValueError, sqlite3.Error):
+            logger.debug("SQLite cache write failed for %s", key, exc_info=True)
+
+    def delete(self, key: str) -> None:
+        if not self._enabled:
+            return
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+        except sqlite3.Error:
+            logger.debug("SQLite cache delete failed for %s", key, exc_info=True)
+
+    def purge_expired(self) -> int:
+        """Remove expired entries in this namespace and return how many were dropped."""
+        if not self._enabled:
+            return 0
+        try:
+            with self._lock, self._connect() as conn:
+                cur = conn.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                    (self.namespace, time.time()),
+                )
+                return cur.rowcount
+        except sqlite3.Error:
+            logger.debug("SQLite cache purge failed", exc_info=True)
+            return 0
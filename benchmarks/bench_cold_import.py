@@ -0,0 +1,107 @@
+"""Cold-import profile and budget check for the serverless entry point.
+
+Imports ``solar_ai_backend.main`` (what ``api/index.py`` loads on a Vercel
+cold start) in fresh interpreters, prints the slowest modules from
+``python -X importtime`` and fails (exit status 1) when:
+
+- the best import time exceeds ``--budget-ms``, or
+- a heavy dependency that should load lazily was executed at import time.
+
+    python benchmarks/bench_cold_import.py [--budget-ms 800] [--runs 5] [--top 15]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "backend", "src")
+
+# Only routes that need them may load these; app import must leave them deferred
+LAZY_MODULES = ["google.generativeai", "PIL.Image", "httpx", "numpy", "openpyxl", "pyarrow", "prometheus_client"]
+
+_PROBE = """
+import sys, time
+started = time.perf_counter()
+import solar_ai_backend.main
+elapsed = time.perf_counter() - started
+print(f"elapsed {elapsed}")
+for name in sys.argv[1:]:
+    # Deferred modules stay proxies outside sys.modules until first use
+    print(f"module {name} {int(name in sys.modules)}")
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.path.abspath(SRC) + os.pathsep + env.get("PYTHONPATH", "")
+    # Same code path as the deployed function (no .env lookup)
+    env["VERCEL"] = "1"
+    env.setdefault("PYTHONDONTWRITEBYTECODE", "1")
+    return env
+
+
+def probe() -> Tuple[float, List[str]]:
+    """Import the app in a fresh interpreter; return (seconds, eagerly executed heavy modules)."""
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE, *LAZY_MODULES], env=_env(), capture_output=True, text=True, check=True
+    ).stdout
+    elapsed, eager = 0.0, []
+    for line in out.splitlines():
+        kind, _, rest = line.partition(" ")
+        if kind == "elapsed":
+            elapsed = float(rest)
+        elif kind == "module":
+            name, flag = rest.split()
+            if flag == "1":
+                eager.append(name)
+    return elapsed, eager
+
+
+def import_profile(top: int) -> List[Tuple[int, int, str]]:
+    """Slowest modules by cumulative import time (microseconds), from ``-X importtime``."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import solar_ai_backend.main"],
+        env=_env(), capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative_us), int(self_us), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("COLD_IMPORT_BUDGET_MS", "800")))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    print(f"{'cumulative ms':>13} {'self ms':>8}  module")
+    for cumulative_us, self_us, name in import_profile(args.top):
+        print(f"{cumulative_us / 1000:13.1f} {self_us / 1000:8.1f}  {name}")
+
+    results = [probe() for _ in range(args.runs)]
+    best = min(elapsed for elapsed, _ in results)
+    eager = sorted({name for _, names in results for name in names})
+    print(f"\nimport solar_ai_backend.main: best {best * 1000:.0f} ms of {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if best * 1000 > args.budget_ms:
+        print("FAIL: cold import over budget")
+        failed = True
+    if eager:
+        print(f"FAIL: loaded eagerly at import time: {', '.join(eager)}")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Microbenchmark: encoding a 200-lead ``/leads`` response.
+
+Compares FastAPI's default handling of a returned ``LeadsEndpointResponse``
+(validate the envelope, re-validate against ``response_model``,
+``jsonable_encoder``, ``json.dumps``) with ``ModelJSONResponse`` (construct
+the envelope around already-validated leads, encode once with pydantic-core),
+and the same with ``compact`` field projection.
+
+    python benchmarks/bench_leads_response.py [--leads 200] [--rounds 200]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import timeit
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "src"))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+from solar_ai_backend.api.responses import ModelJSONResponse  # noqa: E402
+from solar_ai_backend.schemas.models import (  # noqa: E402
+    Coordinates,
+    ImageryMeta,
+    LeadItem,
+    LeadsEndpointRequest,
+    LeadsEndpointResponse,
+    VisionMeta,
+    ZillowMeta,
+)
+
+
+def make_leads(count: int) -> List[LeadItem]:
+    return [
+        LeadItem(
+            address=f"{i} Main St, San Diego, CA 92101",
+            coordinates=Coordinates(lat=32.7 + i * 1e-4, lng=-117.1),
+            zillow=ZillowMeta(zpid=str(10_000 + i), price=950_000.0 + i, beds=3, baths=2.5, livingArea=1800, lotSize=6500),
+            imagery=ImageryMeta(
+                image_url=f"https://maps.googleapis.com/maps/api/staticmap?center={32.7 + i * 1e-4},-117.1&zoom=20&size=640x640&maptype=satellite",
+                zoom=20,
+                size={"w": 640, "h": 640},
+                provider="google_static",
+                local_url="/api/v1/imagery/" + f"{i:064x}",
+            ),
+            vision=VisionMeta(
+                backyard_status="undeveloped",
+                backyard_confidence=0.87,
+                notes="Mostly bare soil with patchy grass, no hardscape or structures",
+                model="gemini-2.5-flash",
+            ),
+            lead_score=0.61,
+        )
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--leads", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    leads = make_leads(args.leads)
+    field = create_model_field(name="response", type_=LeadsEndpointResponse, mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def default() -> bytes:
+        response = LeadsEndpointResponse(location="San Diego, CA", count=len(leads), leads=leads)
+        content = loop.run_until_complete(serialize_response(field=field, response_content=response))
+        return JSONResponse(content).body
+
+    def fast() -> bytes:
+        response = LeadsEndpointResponse.model_construct(location="San Diego, CA", count=len(leads), leads=leads)
+        return ModelJSONResponse(response).body
+
+    include = {name: True for name in LeadsEndpointResponse.model_fields}
+    include["leads"] = {"__all__": LeadsEndpointRequest(location="San Diego, CA", compact=True).lead_include()}
+
+    def compact() -> bytes:
+        response = LeadsEndpointResponse.model_construct(location="San Diego, CA", count=len(leads), leads=leads)
+        return ModelJSONResponse(response, include=include, exclude_none=True).body
+
+    assert json.loads(default()) == json.loads(fast()), "both paths must produce the same JSON"
+
+    print(f"{args.leads} leads")
+    timings = []
+    for name, encode in (("FastAPI default", default), ("ModelJSONResponse", fast), ("compact", compact)):
+        per_call = min(timeit.repeat(encode, number=args.rounds, repeat=5)) / args.rounds
+        timings.append(per_call)
+        print(f"{name:>17}: {per_call * 1e3:7.2f} ms/response  {len(encode()) / 1024:6.1f} KiB")
+    print(f"speedup: {timings[0] / timings[1]:.1f}x full, {timings[0] / timings[2]:.1f}x compact")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Microbenchmark: Zillow search page normalization.
+
+Compares the former ``resp.json()`` + per-property dict normalization with
+``parse_search_page`` (orjson decode, slotted ``PropertyRecord``) on a
+50-property ``/search/byaddress`` page.
+
+    python benchmarks/bench_zillow_parse.py [--rounds 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "src"))
+
+from solar_ai_backend.services.enrichment import orjson, parse_search_page  # noqa: E402
+
+
+PAGE_PATH = os.path.join(os.path.dirname(__file__), "data", "zillow_search_page_50.json")
+
+
+def legacy_parse(content: bytes) -> List[Dict[str, Any]]:
+    """The normalization ``search_properties`` used before ``parse_search_page``."""
+    data = json.loads(content) or {}
+    search_results = data.get("searchResults") or {}
+    results = []
+    if isinstance(search_results, dict):
+        for key, result in search_results.items():
+            if isinstance(result, dict) and "property" in result:
+                results.append(result["property"])
+    elif isinstance(search_results, list):
+        results = search_results
+    norm: List[Dict[str, Any]] = []
+    for item in results:
+        location_data = item.get("location", {})
+        address_data = item.get("address", {})
+        listing_data = item.get("listing", {})
+        address_parts = []
+        if address_data.get("streetAddress"):
+            address_parts.append(address_data["streetAddress"])
+        city_state_zip = []
+        if address_data.get("city"):
+            city_state_zip.append(address_data["city"])
+        if address_data.get("state"):
+            city_state_zip.append(address_data["state"])
+        if address_data.get("zipcode"):
+            city_state_zip.append(address_data["zipcode"])
+        if city_state_zip:
+            address_parts.append(", ".join(city_state_zip))
+        norm.append(
+            {
+                "address": " ".join(address_parts) if address_parts else item.get("address", ""),
+                "lat": location_data.get("latitude"),
+                "lng": location_data.get("longitude"),
+                "zpid": str(item.get("zpid")) if item.get("zpid") else None,
+                "price": listing_data.get("price", {}).get("value") or item.get("price"),
+                "beds": item.get("bedrooms"),
+                "baths": item.get("bathrooms"),
+                "livingArea": item.get("livingArea"),
+                "lotSize": item.get("lotSizeWithUnit", {}).get("lotSize") or item.get("lotSize"),
+            }
+        )
+    return [p for p in norm if p.get("lat") is not None and p.get("lng") is not None]
+
+
+def retained_bytes(parse: Callable[[bytes], List[Any]], content: bytes, copies: int = 200) -> int:
+    """Memory held by ``copies`` parsed pages (the decoded JSON tree is released after parsing)."""
+    tracemalloc.start()
+    held = [parse(content) for _ in range(copies)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return size // copies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(PAGE_PATH, "rb") as fh:
+        content = fh.read()
+
+    legacy, fast = legacy_parse(content), parse_search_page(content)
+    assert [r.to_dict() for r in fast] == legacy, "parse_search_page must match the legacy normalization"
+
+    print(f"page: {len(content) / 1024:.0f} KiB, {len(fast)} properties, orjson={'yes' if orjson else 'no'}")
+    rows = []
+    for name, parse in (("legacy dicts", legacy_parse), ("PropertyRecord", parse_search_page)):
+        per_page = min(timeit.repeat(lambda: parse(content), number=args.rounds, repeat=5)) / args.rounds
+        rows.append((name, per_page, retained_bytes(parse, content)))
+    for name, per_page, held in rows:
+        print(f"{name:>15}: {per_page * 1e6:8.1f} us/page   {held / 1024:6.1f} KiB retained/page")
+    print(f"speedup: {rows[0][1] / rows[1][1]:.2f}x, retained memory: {rows[1][2] / rows[0][2]:.0%} of legacy")
+
+
+if __name__ == "__main__":
+    main()
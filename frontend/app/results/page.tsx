@@ -17,6 +17,7 @@ interface Lead {
   }
   imagery: {
     image_url: string
+    local_url?: string | null
   }
   vision: {
     backyard_status: string
@@ -26,6 +27,8 @@ interface Lead {
   lead_score: number
 }
 
+const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
+
 function ResultsContent() {
   const searchParams = useSearchParams()
   const router = useRouter()
@@ -40,7 +43,6 @@ function ResultsContent() {
     setError('')
 
     try {
-      const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
       const response = await axios.post(`${apiUrl}/api/v1/leads`, {
         location,
         max_properties: leadCount,
@@ -114,7 +116,7 @@ function ResultsContent() {
                   {leads.slice(0, 6).map((lead, idx) => (
                     <div key={idx} className="border border-gray-200 rounded-lg p-4">
                       <Image
-                        src={lead.imagery.image_url}
+                        src={lead.imagery.local_url ? `${apiUrl}${lead.imagery.local_url}` : lead.imagery.image_url}
                         alt={lead.address}
                         width={400}
                         height={128}
@@ -1,3 +1,20 @@
+// In production (Vercel), use relative URLs since backend is on same domain
+// In development, use localhost:8000
+const apiUrl = process.env.NEXT_PUBLIC_API_URL ||
+  (process.env.NODE_ENV === 'production' ? '' : 'http://localhost:8000')
+
+// Local image store served by the backend; same-origin (relative) URLs need no pattern
+function imageryPattern(url) {
+  if (!url) return []
+  const { protocol, hostname, port, pathname } = new URL(url)
+  return [{
+    protocol: protocol.replace(':', ''),
+    hostname,
+    port,
+    pathname: `${pathname.replace(/\/$/, '')}/api/v1/imagery/**`,
+  }]
+}
+
 /** @type {import('next').NextConfig} */
 const nextConfig = {
   reactStrictMode: true,
@@ -11,13 +28,11 @@ const nextConfig = {
         protocol: 'https',
         hostname: '**.googleapis.com',
       },
+      ...imageryPattern(apiUrl),
     ],
   },
   env: {
-    // In production (Vercel), use relative URLs since backend is on same domain
-    // In development, use localhost:8000
-    NEXT_PUBLIC_API_URL: process.env.NEXT_PUBLIC_API_URL || 
-      (process.env.NODE_ENV === 'production' ? '' : 'http://localhost:8000'),
+    NEXT_PUBLIC_API_URL: apiUrl,
     NEXT_PUBLIC_STRIPE_PUBLISHABLE_KEY: process.env.NEXT_PUBLIC_STRIPE_PUBLISHABLE_KEY || '',
   },
 }
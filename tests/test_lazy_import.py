@@ -0,0 +1,64 @@
+"""Deferred imports must be safe when several threads touch a module first."""
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "backend", "src")
+
+_FIRST_ACCESS = textwrap.dedent(
+    """
+    import sys, threading
+    from solar_ai_backend.utils.lazy_import import lazy_import
+
+    module = lazy_import(sys.argv[1])
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def touch():
+        barrier.wait()
+        try:
+            getattr(module, sys.argv[2])
+        except Exception as exc:
+            errors.append(repr(exc))
+
+    threads = [threading.Thread(target=touch) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(len(errors), errors[:1])
+    """
+)
+
+
+def _first_access(tmp_path, module: str, attr: str) -> str:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([os.path.abspath(SRC), str(tmp_path), env.get("PYTHONPATH", "")])
+    # Fresh interpreter, so the access really is the first one
+    result = subprocess.run(
+        [sys.executable, "-c", _FIRST_ACCESS, module, attr], env=env, capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+def test_threads_see_fully_imported_module(tmp_path):
+    # Slow module body: attributes defined at the end are missing while it is still importing
+    (tmp_path / "slow_module.py").write_text("import time\ntime.sleep(0.2)\nVALUE = 42\n")
+    assert _first_access(tmp_path, "slow_module", "VALUE") == "0 []"
+
+
+def test_threads_first_access_httpx(tmp_path):
+    assert _first_access(tmp_path, "httpx", "Limits") == "0 []"
+
+
+def test_missing_module_is_placeholder():
+    sys.path.insert(0, os.path.abspath(SRC))
+    from solar_ai_backend.utils.lazy_import import is_available, lazy_import
+
+    module = lazy_import("solar_ai_no_such_module")
+    assert not is_available(module)
+    with pytest.raises(ImportError):
+        module.anything
@@ -0,0 +1,62 @@
+"""Metrics helpers must not raise into the request code they observe."""
+import os
+import subprocess
+import sys
+import textwrap
+from types import SimpleNamespace
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "backend", "src")
+
+_FIRST_USE = textwrap.dedent(
+    """
+    import threading
+    from solar_ai_backend.utils import metrics
+
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def observe():
+        barrier.wait()
+        try:
+            with metrics.observe_stage("vision"):
+                metrics.record_cache("vision", True)
+        except Exception as exc:
+            errors.append(repr(exc))
+
+    threads = [threading.Thread(target=observe) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(len(errors), errors[:1])
+    """
+)
+
+
+def test_threads_first_use_of_metrics():
+    env = dict(os.environ, METRICS_ENABLED="true")
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    env["PYTHONPATH"] = os.pathsep.join([os.path.abspath(SRC), env.get("PYTHONPATH", "")])
+    # Fresh interpreter, so the metrics are created by the threads themselves
+    result = subprocess.run([sys.executable, "-c", _FIRST_USE], env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split()[0] == "0", result.stdout
+
+
+def test_failing_metric_is_swallowed(monkeypatch):
+    sys.path.insert(0, os.path.abspath(SRC))
+    from solar_ai_backend.utils import metrics
+
+    class _Broken:
+        def labels(self, *args):
+            raise ValueError("label mismatch")
+
+    broken = SimpleNamespace(in_flight=_Broken(), stage_seconds=_Broken(), cache_events=_Broken(),
+                             upstream_errors=_Broken(), leads=_Broken())
+    monkeypatch.setattr(metrics, "_initialized", True)
+    monkeypatch.setattr(metrics, "_instance", broken)
+    with metrics.observe_stage("vision"):
+        pass
+    metrics.record_cache("vision", False)
+    metrics.record_error("google", "timeout")
+    metrics.record_leads(1, 1)
@@ -0,0 +1,36 @@
+"""Prompt caching is skipped when the instruction is below the model's minimum."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "src"))
+
+from solar_ai_backend.services.prompt_cache import PromptCache, PromptCacheBackend, min_cache_tokens  # noqa: E402
+
+
+class _CountingBackend(PromptCacheBackend):
+    def __init__(self) -> None:
+        self.creates = 0
+
+    def min_tokens(self, model: str) -> int:
+        return min_cache_tokens(model)
+
+    def create(self, *, model: str, system_instruction: str, display_name: str, ttl_seconds: int) -> str:
+        self.creates += 1
+        return "cachedContents/test"
+
+
+def test_short_instruction_is_never_uploaded():
+    backend = _CountingBackend()
+    cache = PromptCache(backend, system_instruction="x" * 400, version="v")
+    assert cache.handle("gemini-2.5-flash") is None
+    assert cache.handle("gemini-2.5-flash") is None
+    assert backend.creates == 0
+
+
+def test_large_instruction_is_uploaded_once():
+    backend = _CountingBackend()
+    cache = PromptCache(backend, system_instruction="x" * 4 * 1024, version="v")
+    assert cache.handle("models/gemini-2.5-flash") == "cachedContents/test"
+    assert cache.handle("models/gemini-2.5-flash") == "cachedContents/test"
+    assert cache.handle("gemini-2.5-pro") is None
+    assert backend.creates == 1